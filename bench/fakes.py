@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Scripted stand-ins for yt-dlp and ffmpeg, used by run_bench.py.
+
+  python fakes.py yt-dlp [yt-dlp args...]
+  python fakes.py ffmpeg [ffmpeg args...]
+
+They answer the calls the runner makes (-J / -j probes, per-item and whole-playlist downloads,
+--load-info-json conversions) without touching the network. Behaviour is set through environment
+variables so every process of a run sees the same playlist:
+
+  YTGUI_FAKE_ITEMS        entries in the fake playlist (default 10)
+  YTGUI_FAKE_SIZE         bytes per item (default 4 MiB)
+  YTGUI_FAKE_CHUNKS       progress lines per item (default 10)
+  YTGUI_FAKE_ITEM_DELAY   seconds one item takes to "download" (default 0)
+  YTGUI_FAKE_PROBE_DELAY  seconds before a probe answers (default 0)
+  YTGUI_FAKE_STARTUP      seconds every fake process sleeps at start, like yt-dlp's import time (default 0)
+  YTGUI_FAKE_FFMPEG_DELAY seconds one conversion takes (default 0)
+  YTGUI_FAKE_FAIL_RATE    fraction of items that fail, picked deterministically by id (default 0)
+  YTGUI_FAKE_FAIL_KIND    how they fail: unavailable, network or throttled (default unavailable)
+  YTGUI_FAKE_FAIL_TIMES   failing items succeed after this many failed attempts, 0 = never (default 0);
+                          attempts are counted in files under YTGUI_FAKE_STATE (default: temp dir)
+  YTGUI_FAKE_SHUFFLE      seed for reordering the playlist, to exercise sync renumbering (default: no shuffle)
+  YTGUI_FAKE_PLAYLISTS    playlists a channel URL (one with /@) lists; playlist k of it (list=<channel>_k) holds
+                          ITEMS videos starting at video (k-1)*ITEMS/2+1, so neighbours share half (default 3)
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+PLAYLIST_ID = "PLbench"  # replaced by the URL's list= parameter
+PROGRESS_MARKER = "[yt_gui] "  # what the runner's --progress-template lines start with
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+ITEMS = int(_env_float("YTGUI_FAKE_ITEMS", 10))
+SIZE = int(_env_float("YTGUI_FAKE_SIZE", 4 * 1024 * 1024))
+CHUNKS = max(1, int(_env_float("YTGUI_FAKE_CHUNKS", 10)))
+ITEM_DELAY = _env_float("YTGUI_FAKE_ITEM_DELAY", 0.0)
+PROBE_DELAY = _env_float("YTGUI_FAKE_PROBE_DELAY", 0.0)
+STARTUP = _env_float("YTGUI_FAKE_STARTUP", 0.0)
+FFMPEG_DELAY = _env_float("YTGUI_FAKE_FFMPEG_DELAY", 0.0)
+FAIL_RATE = _env_float("YTGUI_FAKE_FAIL_RATE", 0.0)
+FAIL_KIND = os.environ.get("YTGUI_FAKE_FAIL_KIND", "unavailable")
+FAIL_TIMES = int(_env_float("YTGUI_FAKE_FAIL_TIMES", 0))
+STATE_DIR = os.environ.get("YTGUI_FAKE_STATE") or tempfile.gettempdir()
+SHUFFLE = os.environ.get("YTGUI_FAKE_SHUFFLE", "")
+PLAYLISTS = int(_env_float("YTGUI_FAKE_PLAYLISTS", 3))
+OFFSET = 0  # first video number - 1 of the playlist asked for (channel playlists overlap)
+_FAIL_MESSAGES = {
+    "unavailable": "ERROR: [youtube] {vid}: Video unavailable. This video is private",
+    "network": "ERROR: [download] Got error: ('Connection reset by peer')",
+    "throttled": "ERROR: [youtube] {vid}: HTTP Error 429: Too Many Requests",
+}
+
+
+def _order() -> List[int]:
+    """Video numbers in playlist order."""
+    numbers = list(range(OFFSET + 1, OFFSET + ITEMS + 1))
+    if SHUFFLE:
+        random.Random(SHUFFLE).shuffle(numbers)
+    return numbers
+
+
+def video_id(n: int) -> str:
+    return f"bench{n:06d}"
+
+
+def entry(n: int, position: int | None = None) -> Dict:
+    vid = video_id(n)
+    return {
+        "_type": "url",
+        "ie_key": "Youtube",
+        "id": vid,
+        "url": f"https://www.youtube.com/watch?v={vid}",
+        "title": f"Benchmark track {n}",
+        "duration": 180,
+        "playlist_index": position or n,
+        "playlist_count": ITEMS,
+        "playlist_title": f"Benchmark playlist {PLAYLIST_ID}",
+        "playlist_id": PLAYLIST_ID,
+    }
+
+
+def fails(vid: str) -> bool:
+    if not (FAIL_RATE > 0 and random.Random(vid).random() < FAIL_RATE):
+        return False
+    if not FAIL_TIMES:
+        return True
+    counter = os.path.join(STATE_DIR, f"ytgui_fake_{vid}.attempts")
+    try:
+        with open(counter, "r", encoding="utf-8") as f:
+            attempts = int(f.read() or 0)
+    except (OSError, ValueError):
+        attempts = 0
+    with open(counter, "w", encoding="utf-8") as f:
+        f.write(str(attempts + 1))
+    return attempts < FAIL_TIMES
+
+
+def _emit(data: Dict) -> None:
+    print(PROGRESS_MARKER + json.dumps(data), flush=True)
+
+
+def _arg(args: List[str], flag: str) -> List[str]:
+    return [args[i + 1] for i, a in enumerate(args[:-1]) if a == flag]
+
+
+def _download(n: int, args: List[str], count: int | None, position: int | None = None) -> bool:
+    """Prints what yt-dlp prints for one item (via the runner's progress template)."""
+    vid = video_id(n)
+    common = {"id": vid, "index": position if count else None, "count": count, "title": f"Benchmark track {n}"}
+    print(f"[youtube] Extracting URL: https://www.youtube.com/watch?v={vid}", flush=True)
+    if fails(vid):
+        print(_FAIL_MESSAGES.get(FAIL_KIND, _FAIL_MESSAGES["unavailable"]).format(vid=vid), flush=True)
+        return False
+    info = {**entry(n, position), "_type": "video", "acodec": "opus", "ext": "webm"}
+    # Like yt-dlp with --no-part, the file grows under its final name
+    dest = _output_path(info, args, "webm")
+    print(f"[download] Destination: {dest or vid + '.webm'}", flush=True)
+    step = ITEM_DELAY / CHUNKS
+    for c in range(1, CHUNKS + 1):
+        if step:
+            time.sleep(step)
+        done = SIZE * c // CHUNKS
+        if dest:
+            with open(dest, "ab") as f:
+                f.truncate(done)
+        speed = SIZE / ITEM_DELAY if ITEM_DELAY else None
+        eta = int((SIZE - done) / speed) if speed else None
+        _emit({"event": "download", **common, "status": "downloading",
+               "downloaded": done, "total": SIZE, "speed": speed, "eta": eta})
+    _emit({"event": "download", **common, "status": "finished",
+           "downloaded": SIZE, "total": SIZE, "speed": None, "eta": None})
+
+    for out in _arg(args, "-o"):
+        if out.startswith("infojson:"):
+            path = out[len("infojson:"):].replace("%(ext)s", "info.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+    extract = "-x" in args or "--extract-audio" in args
+    if extract:
+        _convert(common, "opus", args)
+    # The converted file when extracting here, otherwise the source (converted later via --load-info-json)
+    _write_output(info, args, (_arg(args, "--audio-format") or ["mp3"])[-1] if extract else "webm")
+    return True
+
+
+def _output_path(info: Dict, args: List[str], ext: str) -> str | None:
+    templates = [o for o in _arg(args, "-o") if not o.startswith("infojson:")]
+    if not templates:
+        return None
+    path = (templates[-1].replace("%(playlist_index)03d", f"{info['playlist_index']:03d}")
+            .replace("%(title)s", info["title"]).replace("%(ext)s", ext))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return path
+
+
+def _write_output(info: Dict, args: List[str], ext: str) -> None:
+    """Creates the item's file (sparse, SIZE bytes) and answers --print-to-file after_move."""
+    path = _output_path(info, args, ext)
+    if path is None:
+        return
+    with open(path, "wb") as f:
+        f.truncate(SIZE)
+    for i, a in enumerate(args[:-2]):
+        if a == "--print-to-file" and args[i + 1].startswith("after_move:"):
+            with open(args[i + 2].replace("%%", "%"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"id": info["id"], "filepath": path}) + "\n")
+
+
+def _convert(common: Dict, acodec: str, args: List[str]) -> None:
+    _emit({"event": "postprocess", **common, "status": "started", "postprocessor": "ExtractAudio", "acodec": acodec})
+    fmt = (_arg(args, "--audio-format") or ["mp3"])[-1]
+    # The shim directory is first on PATH, so this runs the fake ffmpeg
+    subprocess.run(["ffmpeg", "-y", "-i", "in.webm", "-f", fmt, os.devnull],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _emit({"event": "postprocess", **common, "status": "finished", "postprocessor": "ExtractAudio", "acodec": acodec})
+
+
+def fake_ytdlp(args: List[str]) -> int:
+    if "--version" in args:
+        print("2099.01.01 (benchmark stand-in)")
+        return 0
+    url = args[-1] if args else ""
+
+    info_files = _arg(args, "--load-info-json")
+    if info_files:
+        with open(info_files[-1], "r", encoding="utf-8") as f:
+            info = json.load(f)
+        n = int(info.get("playlist_index") or 0)
+        common = {"id": info.get("id"), "index": n or None, "count": ITEMS, "title": info.get("title")}
+        _convert(common, info.get("acodec") or "opus", args)
+        _write_output(info, args, (_arg(args, "--audio-format") or ["mp3"])[-1])
+        return 0
+
+    is_playlist = "list=" in url
+    if is_playlist:
+        global PLAYLIST_ID, OFFSET
+        PLAYLIST_ID = url.split("list=", 1)[1].split("&", 1)[0]
+        number = PLAYLIST_ID.rsplit("_", 1)[-1]
+        if "_" in PLAYLIST_ID and number.isdigit():
+            OFFSET = (int(number) - 1) * (ITEMS // 2)
+    if "/@" in url and ("-J" in args or "-j" in args):
+        channel = url.split("/@", 1)[1].split("/", 1)[0]
+        nested = [{"_type": "url", "ie_key": "YoutubeTab", "id": f"{channel}_{k}",
+                   "url": f"https://www.youtube.com/playlist?list={channel}_{k}", "title": f"{channel} playlist {k}",
+                   "playlist_index": k, "playlist_title": channel} for k in range(1, PLAYLISTS + 1)]
+        time.sleep(PROBE_DELAY)
+        if "-J" in args:
+            print(json.dumps({"_type": "playlist", "id": channel, "title": channel, "entries": nested}), flush=True)
+        else:
+            for e in nested:
+                print(json.dumps(e), flush=True)
+        return 0
+    if "-J" in args:
+        time.sleep(PROBE_DELAY)
+        if is_playlist:
+            info = {"_type": "playlist", "id": PLAYLIST_ID, "title": f"Benchmark playlist {PLAYLIST_ID}",
+                    "entries": [entry(n, pos) for pos, n in enumerate(_order(), start=1)]}
+        else:
+            info = {**entry(1), "_type": "video"}
+        print(json.dumps(info), flush=True)
+        return 0
+    if "-j" in args:
+        time.sleep(PROBE_DELAY)
+        if is_playlist:
+            for pos, n in enumerate(_order(), start=1):
+                print(json.dumps(entry(n, pos)), flush=True)
+        else:
+            print(json.dumps({**entry(1), "_type": "video"}), flush=True)
+        return 0
+
+    if is_playlist and "--no-playlist" not in args:
+        # Whole playlist in one process, as the sequential runner does
+        ok = [_download(n, args, ITEMS, pos) for pos, n in enumerate(_order(), start=1)]
+        return 0 if all(ok) else 1
+    vid = url.rsplit("=", 1)[-1]
+    n = int(vid[len("bench"):]) if vid.startswith("bench") else 1
+    return 0 if _download(n, args, None) else 1
+
+
+def fake_ffmpeg(args: List[str]) -> int:
+    if "-version" in args:
+        print("ffmpeg version 0.0-benchmark")
+        return 0
+    time.sleep(FFMPEG_DELAY)
+    return 0
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] not in ("yt-dlp", "ffmpeg"):
+        print("usage: fakes.py yt-dlp|ffmpeg [args...]", file=sys.stderr)
+        return 2
+    time.sleep(STARTUP)
+    if sys.argv[1] == "yt-dlp":
+        return fake_ytdlp(sys.argv[2:])
+    return fake_ffmpeg(sys.argv[2:])
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
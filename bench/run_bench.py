@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Measures the runner's own overhead (not the network) against the stand-ins in fakes.py.
+
+Usage:
+  python bench/run_bench.py
+  python bench/run_bench.py --sizes 10,100 --workers 1,8
+  python bench/run_bench.py --item-delay 0.2 --fail-rate 0.05 --audio-only
+  python bench/run_bench.py --check   # exit 1 if a case regressed against its last stored run
+
+For every playlist size x worker count it reports items/s, per-item spawn latency (yt-dlp process
+start to its first output, the runner's "spawn" metrics phase), probe latency, peak RSS of the runner and of its largest
+child, and the log pump's per-tick cost and backlog (the GUI's drain step, run headless).
+Each case runs in a fresh interpreter so RSS is per case. Results are appended to
+bench/results.jsonl and compared with the previous run of the same case.
+POSIX only: the stand-ins are put on PATH as shell shims.
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from yt_gui.cache import ProbeCache
+from yt_gui.config import DownloadOptions
+from yt_gui.logview import LatencyStats, drain
+from yt_gui.runner import YtDlpRunner
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLbench"
+DEFAULT_RESULTS = os.path.join(HERE, "results.jsonl")
+PROBE_REPEATS = 3
+POLL_INTERVAL = 0.12  # same tick as the GUI's log pump
+SENTINEL = "__bench_done__"
+
+# metric -> True if higher is better
+TRACKED = {
+    "items_per_s": True,
+    "spawn_ms_p50": False,
+    "probe_ms_p50": False,
+    "peak_rss_mib": False,
+    "pump_ms_p95": False,
+}
+
+
+def _peak_rss_mib(who: int) -> float | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(case: Dict) -> Dict:
+    """Runs one case in this process (PATH must already point at the shims)."""
+    workdir = tempfile.mkdtemp(prefix="yt_gui_bench_")
+    try:
+        log_queue: queue.Queue[str] = queue.Queue()
+        runner = YtDlpRunner(log_queue, probe_cache=ProbeCache(os.path.join(workdir, "cache")))
+
+        probe_ms = []
+        for _ in range(PROBE_REPEATS):
+            started = time.perf_counter()
+            runner.probe(PLAYLIST_URL, refresh=True)
+            probe_ms.append((time.perf_counter() - started) * 1000.0)
+        while not log_queue.empty():
+            log_queue.get_nowait()
+
+        pump = LatencyStats()
+
+        def pump_loop() -> None:
+            while True:
+                backlog = log_queue.qsize()
+                started = time.perf_counter()
+                batch = drain(log_queue, SENTINEL)
+                pump.record(time.perf_counter() - started, len(batch.raw), backlog)
+                if batch.done:
+                    return
+                time.sleep(POLL_INTERVAL)
+
+        pump_thread = threading.Thread(target=pump_loop)
+        pump_thread.start()
+
+        opt = DownloadOptions(
+            url=PLAYLIST_URL,
+            output_dir=os.path.join(workdir, "out"),
+            mode="auto",
+            audio_only=case["audio_only"],
+            audio_format="mp3",
+            subtitles=False,
+            subs_langs="en.*",
+            embed_metadata=False,
+            download_archive="",
+            cookies_from_browser="",
+            workers=case["workers"],
+            job_store=os.path.join(workdir, "jobs.sqlite3"),
+            refresh_probe=True,
+        )
+        started = time.perf_counter()
+        rc = runner.run(opt)
+        wall = time.perf_counter() - started
+
+        log_queue.put(SENTINEL)
+        pump_thread.join()
+
+        snap = runner.tracker.snapshot()
+        items = snap.completed + snap.failed
+        # Only parallel runs start one process per item (and record metrics); the sequential one
+        # streams a single process
+        spawn = runner.metrics.summary()["phases"].get("spawn") if case["workers"] > 1 and runner.metrics else None
+        pump_summary = pump.summary()
+        return {
+            "rc": rc,
+            "items": items,
+            "completed": snap.completed,
+            "failed": snap.failed,
+            "wall_s": round(wall, 3),
+            "items_per_s": round(items / wall, 2) if wall > 0 else None,
+            "spawn_ms_p50": round(spawn["p50_s"] * 1000.0, 2) if spawn else None,
+            "spawn_ms_p95": round(spawn["p95_s"] * 1000.0, 2) if spawn else None,
+            "probe_ms_p50": round(statistics.median(probe_ms), 2),
+            "peak_rss_mib": _peak_rss_mib(resource.RUSAGE_SELF) if resource else None,
+            "child_peak_rss_mib": _peak_rss_mib(resource.RUSAGE_CHILDREN) if resource else None,
+            "pump_ticks": pump_summary["ticks"],
+            "pump_lines": pump_summary["lines"],
+            "pump_ms_p50": pump_summary["render_ms_p50"],
+            "pump_ms_p95": pump_summary["render_ms_p95"],
+            "pump_ms_max": pump_summary["render_ms_max"],
+            "pump_backlog_max": pump_summary["backlog_max"],
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def make_shims(directory: str) -> None:
+    fakes = os.path.join(HERE, "fakes.py")
+    for tool in ("yt-dlp", "ffmpeg"):
+        path = os.path.join(directory, tool)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{fakes}" {tool} "$@"\n')
+        os.chmod(path, 0o755)
+
+
+def case_key(case: Dict) -> str:
+    return json.dumps(case, sort_keys=True)
+
+
+def load_previous(path: str) -> Dict[str, Dict]:
+    """Latest stored metrics per case."""
+    previous: Dict[str, Dict] = {}
+    if not os.path.exists(path):
+        return previous
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "case" in record and "metrics" in record:
+                previous[case_key(record["case"])] = record
+    return previous
+
+
+def compare(metrics: Dict, before: Dict, threshold: float) -> List[str]:
+    """Tracked metrics that got worse than `before` by more than `threshold` (a fraction)."""
+    worse = []
+    for name, higher_is_better in TRACKED.items():
+        new, old = metrics.get(name), before.get(name)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+            worse.append(f"{name} {old} -> {new} ({change:+.0%})")
+    return worse
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the runner against a fake yt-dlp/ffmpeg.")
+    parser.add_argument("--sizes", type=_int_list, default=[10, 100, 1000, 10000], help="Playlist sizes (default: 10,100,1000,10000)")
+    parser.add_argument("--workers", type=_int_list, default=[1, 4, 16], help="Worker counts (default: 1,4,16)")
+    parser.add_argument("--item-delay", type=float, default=0.0, help="Seconds each fake download takes (default: 0)")
+    parser.add_argument("--chunks", type=int, default=10, help="Progress lines per item (default: 10)")
+    parser.add_argument("--size-mib", type=float, default=4.0, help="Reported size per item in MiB (default: 4)")
+    parser.add_argument("--probe-delay", type=float, default=0.0, help="Seconds a fake probe takes (default: 0)")
+    parser.add_argument("--startup", type=float, default=0.0, help="Seconds every fake process sleeps at start (default: 0)")
+    parser.add_argument("--ffmpeg-delay", type=float, default=0.0, help="Seconds a fake conversion takes (default: 0)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of items that fail (default: 0)")
+    parser.add_argument("--audio-only", action="store_true", help="Benchmark audio-only runs (download + transcode stages)")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSONL file results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="Don't append results")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change reported as a regression (default: 0.2)")
+    parser.add_argument("--check", action="store_true", help="Exit with 1 if any case regressed")
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)  # internal: run one case, print its metrics
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    if args.case is not None:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return 0
+    if os.name == "nt":
+        print("The benchmark needs a POSIX shell for its yt-dlp/ffmpeg shims.", file=sys.stderr)
+        return 2
+
+    shim_dir = tempfile.mkdtemp(prefix="yt_gui_shims_")
+    make_shims(shim_dir)
+    previous = load_previous(args.results)
+    regressions = 0
+    meta = {"commit": git_revision(), "python": platform.python_version(), "platform": platform.platform()}
+    try:
+        for size in args.sizes:
+            for workers in args.workers:
+                case = {
+                    "items": size, "workers": workers, "audio_only": args.audio_only,
+                    "item_delay": args.item_delay, "chunks": args.chunks, "size_mib": args.size_mib,
+                    "probe_delay": args.probe_delay, "startup": args.startup,
+                    "ffmpeg_delay": args.ffmpeg_delay, "fail_rate": args.fail_rate,
+                }
+                env = dict(os.environ)
+                env["PATH"] = shim_dir + os.pathsep + env.get("PATH", "")
+                env.update({
+                    "YTGUI_FAKE_ITEMS": str(size),
+                    "YTGUI_FAKE_SIZE": str(int(args.size_mib * 1024 * 1024)),
+                    "YTGUI_FAKE_CHUNKS": str(args.chunks),
+                    "YTGUI_FAKE_ITEM_DELAY": str(args.item_delay),
+                    "YTGUI_FAKE_PROBE_DELAY": str(args.probe_delay),
+                    "YTGUI_FAKE_STARTUP": str(args.startup),
+                    "YTGUI_FAKE_FFMPEG_DELAY": str(args.ffmpeg_delay),
+                    "YTGUI_FAKE_FAIL_RATE": str(args.fail_rate),
+                })
+                proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", json.dumps(case)],
+                                      env=env, capture_output=True, text=True)
+                try:
+                    metrics = json.loads(proc.stdout.strip().splitlines()[-1])
+                except (IndexError, ValueError):
+                    print(f"items={size} workers={workers}: case failed\n{proc.stderr}", file=sys.stderr)
+                    continue
+
+                print(
+                    f"items={size:<6} workers={workers:<3} {metrics['items_per_s']:>9} items/s  "
+                    f"spawn p50 {metrics['spawn_ms_p50']} ms  probe {metrics['probe_ms_p50']} ms  "
+                    f"rss {metrics['peak_rss_mib']} MiB  pump p95 {metrics['pump_ms_p95']} ms "
+                    f"(backlog max {metrics['pump_backlog_max']})",
+                    flush=True,
+                )
+                before = previous.get(case_key(case))
+                if before is not None:
+                    worse = compare(metrics, before["metrics"], args.threshold)
+                    if worse:
+                        regressions += 1
+                        print(f"  REGRESSION vs {before.get('commit') or 'previous run'}: " + "; ".join(worse), flush=True)
+
+                if not args.no_save:
+                    record = {"time": datetime.now(timezone.utc).isoformat(timespec="seconds"), **meta,
+                              "case": case, "metrics": metrics}
+                    with open(args.results, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+    finally:
+        shutil.rmtree(shim_dir, ignore_errors=True)
+
+    if regressions:
+        print(f"{regressions} case(s) regressed by more than {args.threshold:.0%}.")
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Download a YouTube playlist using yt-dlp.
+Download YouTube playlists and videos using yt-dlp.
 
 Requirements:
   - Python 3
@@ -14,77 +14,279 @@ Quick Install:
   - (Windows) install ffmpeg and add it to PATH
 
 Usage:
-  python main.py "https://www.youtube.com/playlist?list=XXXX"
-  python main.py "URL" -o downloads
-  python main.py "URL" --audio-only --audio-format mp3
+  python main_cli.py "https://www.youtube.com/playlist?list=XXXX"
+  python main_cli.py "URL" -o downloads
+  python main_cli.py "URL" --audio-only --audio-format mp3
+  python main_cli.py --batch-file playlists.txt --workers 8 --archive archive.txt
+  python main_cli.py --retry-failed downloads/yt_gui_failed.json
+  python main_cli.py --resume
+  python main_cli.py "URL" --workers 4 --server 127.0.0.1:8765   (run on main_service.py)
+  python main_cli.py "URL" -o /mnt/music --publish /mnt/music/queue.sqlite3   (then, on each node:)
+  python main_cli.py --work /mnt/music/queue.sqlite3 --workers 4
 """
 
 import argparse
+import json
 import os
-import shutil
-import subprocess
+import queue
 import sys
+import threading
+import time
+from typing import Dict, List, Tuple
 
+# Ensure the current directory is in sys.path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def which_or_fail(cmd: str, help_hint: str) -> None:
-    if shutil.which(cmd) is None:
-        print(f"ERROR: Could not find '{cmd}' in PATH.\n{help_hint}", file=sys.stderr)
-        sys.exit(1)
+from dataclasses import fields
 
+from yt_gui.config import DownloadOptions
+from yt_gui.jobstore import JobStore
+from yt_gui.runner import YtDlpRunner
+from yt_gui.service import RemoteRunner
+from yt_gui.utils import expand_path
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Download a YouTube playlist with yt-dlp.")
-    parser.add_argument("url", help="Link to the YouTube playlist")
+
+def read_batch_file(path: str) -> List[str]:
+    """One URL per line; blank lines and lines starting with # are ignored."""
+    urls = []
+    with open(expand_path(path), "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                urls.append(line)
+    return urls
+
+
+def read_failed_report(path: str) -> List[Tuple[str, str, List[str]]]:
+    """(url, output folder, video ids) for each URL with items in a failed-items report."""
+    with open(expand_path(path), "r", encoding="utf-8") as f:
+        report = json.load(f)
+    groups: Dict[Tuple[str, str], List[str]] = {}
+    for item in report.get("items") or []:
+        if item.get("url") and item.get("id"):
+            groups.setdefault((item["url"], item.get("output_dir") or ""), []).append(item["id"])
+    return [(url, output_dir, ids) for (url, output_dir), ids in groups.items()]
+
+
+def unfinished_jobs(path: str) -> List[DownloadOptions]:
+    """Options of every job an earlier parallel run left unfinished."""
+    store = JobStore(expand_path(path) if path.strip() else "")
+    try:
+        records = store.unfinished()
+    finally:
+        store.close()
+    known = {f.name for f in fields(DownloadOptions)}
+    return [DownloadOptions(**{k: v for k, v in r.options.items() if k in known}) for r in records]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Download YouTube playlists and videos with yt-dlp.")
+    parser.add_argument("url", nargs="?", help="Link to the YouTube playlist or video")
+    parser.add_argument("--batch-file", default=None, help="File with one URL per line (# comments allowed)")
     parser.add_argument("-o", "--output", default="downloads", help="Output folder (default: downloads)")
+    parser.add_argument("--mode", choices=["auto", "playlist", "video"], default="auto",
+                        help="Treat URLs as playlists, single videos, or detect (default: auto)")
     parser.add_argument("--audio-only", action="store_true", help="Download audio only")
     parser.add_argument("--audio-format", default="mp3", help="Audio format if --audio-only (mp3, m4a, opus...)")
     parser.add_argument("--subtitles", action="store_true", help="Download subtitles if available")
     parser.add_argument("--lang", default="en.*", help="Subtitle language (default: en.*)")
     parser.add_argument("--no-metadata", action="store_true", help="Do not embed metadata/thumbnail")
     parser.add_argument("--archive", default=None, help="File to avoid re-downloads (download archive)")
-    args = parser.parse_args()
-
-    which_or_fail("yt-dlp", "Install with: pip install -U yt-dlp (or pipx install yt-dlp)")
-    which_or_fail("ffmpeg", "Install ffmpeg and ensure it is in PATH.")
+    parser.add_argument("--cookies-from-browser", default="", help="Browser to read cookies from (chrome, firefox...)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parallel downloads; all URLs share one pool of this size (default: 1)")
+    parser.add_argument("--auto-workers", action="store_true", help="Tune the worker count during the run")
+    parser.add_argument("--min-workers", type=int, default=1, help="Lower bound for --auto-workers (default: 1)")
+    parser.add_argument("--max-workers", type=int, default=16, help="Upper bound for --auto-workers (default: 16)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, metavar="MBPS",
+                        help="Total download rate in MB/s, shared by all workers (default: unlimited)")
+    parser.add_argument("--connections", type=int, default=0, metavar="N",
+                        help="Total connections, split between parallel items and concurrent fragments per item "
+                             "(default: one per item)")
+    parser.add_argument("--transcode-workers", type=int, default=0,
+                        help="Audio conversion pool size for parallel runs (default: CPU cores)")
+    parser.add_argument("--engine", choices=["subprocess", "inprocess"], default="subprocess",
+                        help="Run yt-dlp per item as a subprocess or inside this process (default: subprocess)")
+    parser.add_argument("--sync", action="store_true",
+                        help="Keep an index of each playlist folder: download only new items, renumber moved ones")
+    parser.add_argument("--prune", action="store_true", help="With --sync, delete files of items no longer in the playlist")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Reuse items already downloaded for another playlist (hardlink, reflink or copy)")
+    parser.add_argument("--store-dir", default="", help="Content store for --dedupe (default: <output>/.yt_gui_store)")
+    parser.add_argument("--crawl", action="store_true",
+                        help="Channel or playlist of playlists: list every nested playlist into its own folder, "
+                             "downloading each video once")
+    parser.add_argument("--crawl-workers", type=int, default=4, metavar="N",
+                        help="With --crawl: nested playlists listed at once (default: 4)")
+    parser.add_argument("--scratch", default="", metavar="DIR",
+                        help="Download and convert on this local folder (tmpfs/SSD), then move each finished file "
+                             "into the output folder in one step")
+    parser.add_argument("--scratch-keep-free", type=int, default=512, metavar="MB",
+                        help="With --scratch: new downloads wait instead of leaving less free space than this (default: 512)")
+    parser.add_argument("--metrics-file", default="", metavar="PATH",
+                        help="Append per-item phase timings as JSON lines (parallel runs)")
+    parser.add_argument("--metrics-port", type=int, default=0, metavar="PORT",
+                        help="Serve Prometheus-style metrics at http://127.0.0.1:PORT/metrics during parallel runs")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Parallel runs: times a failed item is retried with backoff (default: 3)")
+    parser.add_argument("--retry-delay", type=float, default=5.0, metavar="SECONDS",
+                        help="Delay before the first retry, doubled each attempt (default: 5)")
+    parser.add_argument("--retry-failed", default=None, metavar="REPORT",
+                        help="Download again only the items listed in a yt_gui_failed.json report")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue every job an interrupted parallel run left unfinished, with its original settings")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Start over even if an unfinished run of the same job is recorded")
+    parser.add_argument("--job-store", default="", metavar="PATH",
+                        help="SQLite file recording jobs for --resume (default: yt_gui/jobs.sqlite3 in the user state folder)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached playlist listings")
+    parser.add_argument("--publish", default="", metavar="QUEUE",
+                        help="Distributed run: list the URLs once into this shared SQLite work queue, for --work nodes")
+    parser.add_argument("--work", default="", metavar="QUEUE",
+                        help="Distributed run: download items claimed from this work queue until it is drained")
+    parser.add_argument("--lease", type=float, default=60.0, metavar="SECONDS",
+                        help="With --work: how long a claimed item stays ours if this node stops renewing it (default: 60)")
+    parser.add_argument("--server", default="", metavar="HOST:PORT",
+                        help="Run the job on a download service (main_service.py) instead of in this process")
+    parser.add_argument("--token", default=os.environ.get("YT_GUI_TOKEN", ""),
+                        help="Token for --server (default: $YT_GUI_TOKEN)")
+    parser.add_argument("--summary", default="-", metavar="PATH",
+                        help="Write the JSON run summary here ('-' = last line of stdout, the default)")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    return parser
 
-    os.makedirs(args.output, exist_ok=True)
 
-    # Template: folder by playlist title + index + title
-    outtmpl = os.path.join(
-        args.output,
-        "%(playlist_title)s",
-        "%(playlist_index)03d - %(title)s.%(ext)s",
-    )
-
-    cmd = [
-        "yt-dlp",
-        "--yes-playlist",
-        "--ignore-errors",
-        "--no-part",
-        "--newline",
-        "-o",
-        outtmpl,
-        args.url,
-    ]
+def main() -> int:
+    parser = build_parser()
+    args = parser.parse_args()
 
-    if args.archive:
-        cmd += ["--download-archive", args.archive]
+    output = expand_path(args.output)
+    # (url, output folder, only these ids)
+    targets: List[Tuple[str, str, List[str]]] = [(args.url, output, [])] if args.url else []
+    if args.batch_file:
+        targets += [(url, output, []) for url in read_batch_file(args.batch_file)]
+    if args.retry_failed:
+        try:
+            targets += read_failed_report(args.retry_failed)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read {args.retry_failed}: {e}")
+        if not targets:
+            print(f"No failed items in {args.retry_failed}.")
+            return 0
+    if args.resume and args.fresh:
+        parser.error("--resume and --fresh exclude each other")
+    resumed: List[DownloadOptions] = []
+    if args.resume:
+        resumed = unfinished_jobs(args.job_store)
+        if not resumed and not targets:
+            print("No unfinished jobs.")
+            return 0
+    if args.work:
+        if targets or resumed or args.publish:
+            parser.error("--work takes its URLs from the queue")
+        targets = [("", output, [])]  # carries this node's worker settings
+    if not targets and not resumed:
+        parser.error("give a URL, --batch-file, --retry-failed or --resume")
+    if args.prune and not args.sync:
+        parser.error("--prune needs --sync")
+    if args.crawl and args.sync:
+        parser.error("--sync does not work with --crawl")
+    if (args.publish or args.work) and (args.sync or args.dedupe or args.server):
+        parser.error("--sync, --dedupe and --server do not work with --publish/--work")
 
-    if not args.no_metadata:
-        cmd += ["--embed-metadata", "--embed-thumbnail"]
+    opts = [
+        DownloadOptions(
+            url=url,
+            output_dir=output_dir or output,
+            mode=args.mode,
+            audio_only=args.audio_only,
+            audio_format=args.audio_format,
+            subtitles=args.subtitles,
+            subs_langs=args.lang,
+            embed_metadata=not args.no_metadata,
+            download_archive=args.archive or "",
+            cookies_from_browser=args.cookies_from_browser,
+            workers=max(1, args.workers),
+            auto_workers=args.auto_workers,
+            min_workers=args.min_workers,
+            max_workers=args.max_workers,
+            rate_limit_mbps=max(0.0, args.rate_limit),
+            connections=max(0, args.connections),
+            transcode_workers=args.transcode_workers,
+            sync=args.sync,
+            prune=args.sync and args.prune,
+            dedupe=args.dedupe,
+            store_dir=args.store_dir,
+            crawl=args.crawl,
+            crawl_workers=max(1, args.crawl_workers),
+            scratch_dir=args.scratch,
+            scratch_keep_free_mb=max(0, args.scratch_keep_free),
+            metrics_file=args.metrics_file,
+            metrics_port=args.metrics_port,
+            retries=max(0, args.retries),
+            retry_delay=max(0.0, args.retry_delay),
+            only_ids=only_ids,
+            resume=not args.fresh,
+            job_store=args.job_store,
+            lease_s=args.lease,
+            refresh_probe=args.refresh,
+            engine=args.engine,
+        )
+        for url, output_dir, only_ids in targets
+    ] + resumed
 
-    if args.subtitles:
-        cmd += ["--write-subs", "--write-auto-subs", "--sub-langs", args.lang, "--embed-subs"]
+    log_queue: queue.Queue[str] = queue.Queue()
+    runner = RemoteRunner(log_queue, args.server, args.token) if args.server else YtDlpRunner(log_queue)
+    result = {"rc": 1}
+    started = time.time()
 
-    if args.audio_only:
-        cmd += ["-x", "--audio-format", args.audio_format]
+    def worker() -> None:
+        try:
+            if args.publish or args.work:
+                result["rc"] = runner.run_many(opts, expand_path(args.publish or args.work), publish=bool(args.publish))
+            else:
+                result["rc"] = runner.run_many(opts)
+        except Exception as e:
+            log_queue.put(f"ERROR: {e}")
 
     # Note: use this only if you have rights to download this content.
-    print("Running:\n  " + " ".join(cmd))
-    proc = subprocess.run(cmd)
-    return proc.returncode
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    last_progress = time.monotonic()
+    try:
+        while thread.is_alive() or not log_queue.empty():
+            try:
+                msg = log_queue.get(timeout=0.2)
+                if not args.quiet:
+                    print(msg, flush=True)
+            except queue.Empty:
+                pass
+            if not args.quiet and time.monotonic() - last_progress >= 10:
+                last_progress = time.monotonic()
+                print(runner.tracker.snapshot().summary(), flush=True)
+    except KeyboardInterrupt:
+        runner.stop()
+        thread.join()
+
+    snap = runner.tracker.snapshot()
+    summary = {
+        "rc": result["rc"],
+        "elapsed_s": round(time.time() - started, 1),
+        "completed": snap.completed,
+        "failed": snap.failed,
+        "downloaded_bytes": snap.downloaded_bytes,
+        "urls": runner.summary() or [{"url": o.url} for o in opts],
+    }
+    if runner.metrics is not None:
+        summary["metrics"] = runner.metrics.summary()
+    text = json.dumps(summary)
+    if args.summary == "-":
+        print(text)
+    else:
+        with open(expand_path(args.summary), "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return result["rc"]
 
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
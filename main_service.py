@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Headless download service: keeps a warm downloader running and takes jobs over a local HTTP/JSON API.
+
+Usage:
+  python main_service.py --port 8765 --workers 8 --max-jobs 4 --root ~/Music
+  python main_cli.py "URL" --workers 4 --server 127.0.0.1:8765
+  python main.py --server 127.0.0.1:8765
+
+  curl -X POST localhost:8765/jobs -d '{"url": "https://www.youtube.com/playlist?list=...", "workers": 4}'
+  curl localhost:8765/jobs
+  curl -N localhost:8765/jobs/1/stream
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+
+# Ensure the current directory is in sys.path so we can import the package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from yt_gui.service import DEFAULT_PORT, DownloadService, ServiceServer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless yt-dlp download service with an HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1, this machine only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Items downloading at once across all jobs (default: 8)")
+    parser.add_argument("--max-jobs", type=int, default=4, help="Jobs running at once; more wait in line (default: 4)")
+    parser.add_argument("--root", default="downloads",
+                        help="Folder jobs write into; paths in requests are resolved inside it (default: downloads)")
+    parser.add_argument("--token", default=os.environ.get("YT_GUI_TOKEN", ""),
+                        help="Require 'Authorization: Bearer TOKEN' on every request (default: $YT_GUI_TOKEN)")
+    args = parser.parse_args()
+    if args.host not in ("127.0.0.1", "localhost", "::1") and not args.token:
+        parser.error("listening beyond this machine needs --token")
+
+    service = DownloadService(workers=max(1, args.workers), max_jobs=args.max_jobs, root=args.root)
+    try:
+        server = ServiceServer(service, args.port, args.host, args.token)
+    except OSError as e:
+        print(f"Cannot listen on {args.host}:{args.port} ({e})", file=sys.stderr)
+        return 1
+    server.start()
+    print(f"Download service on http://{args.host}:{server.port} "
+          f"({args.workers} workers, {service.max_jobs} jobs at once, writing to {service.root}). Ctrl+C stops it.", flush=True)
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    try:
+        while not stopping.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    print("Stopping: cancelling running jobs...", flush=True)
+    server.stop()
+    service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
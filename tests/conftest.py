@@ -0,0 +1,57 @@
+import os
+import sys
+
+# The app runs from a checkout (python main.py), so the tests import yt_gui the same way
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from yt_gui.config import DownloadOptions
+
+FAKES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "fakes.py")
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    """
+    Puts the benchmark's stand-ins for yt-dlp and ffmpeg (bench/fakes.py) first on PATH, with
+    small items and the app's cache and state folders inside tmp_path. Set YTGUI_FAKE_* through
+    the returned monkeypatch to shape the playlist.
+    """
+    if os.name == "nt":
+        pytest.skip("the stand-ins are POSIX shell shims")
+    shims = tmp_path / "bin"
+    shims.mkdir()
+    for tool in ("yt-dlp", "ffmpeg"):
+        path = shims / tool
+        path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKES}" {tool} "$@"\n')
+        path.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{shims}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("YTGUI_FAKE_SIZE", "4096")
+    monkeypatch.setenv("YTGUI_FAKE_CHUNKS", "2")
+    monkeypatch.setenv("YTGUI_FAKE_STATE", str(tmp_path))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    return monkeypatch
+
+
+@pytest.fixture
+def ytdlp_calls(tmp_path, fake_tools):
+    """Records the arguments of every yt-dlp call; returns a function listing them, one string per call."""
+    shim = tmp_path / "bin" / "yt-dlp"
+    log = tmp_path / "calls.log"
+    lines = shim.read_text().splitlines()
+    shim.write_text("\n".join([lines[0], f'echo "$*" >> "{log}"'] + lines[1:]) + "\n")
+    return lambda: log.read_text().splitlines() if log.exists() else []
+
+
+@pytest.fixture
+def make_options(tmp_path):
+    """DownloadOptions for a playlist into tmp_path/out, with the GUI's defaults and any overrides."""
+    def make(url="https://www.youtube.com/playlist?list=PLtest", **overrides):
+        values = dict(url=url, output_dir=str(tmp_path / "out"), mode="auto", audio_only=False, audio_format="mp3",
+                      subtitles=False, subs_langs="en.*", embed_metadata=False, download_archive="",
+                      cookies_from_browser="")
+        return DownloadOptions(**{**values, **overrides})
+
+    return make
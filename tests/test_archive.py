@@ -0,0 +1,39 @@
+import queue
+import threading
+
+from yt_gui.archive import DownloadArchive
+from yt_gui.runner import YtDlpRunner
+
+
+def test_entry_key_matches_yt_dlp_archive_lines():
+    assert DownloadArchive.entry_key({"id": "abc", "ie_key": "Youtube"}) == "youtube abc"
+    assert DownloadArchive.entry_key({"id": "abc", "extractor_key": "Vimeo"}) == "vimeo abc"
+    assert DownloadArchive.entry_key({"id": "abc"}) == "youtube abc"
+    assert DownloadArchive.entry_key({"title": "no id"}) is None
+
+
+def test_archive_is_loaded_once_and_appended_without_duplicates(tmp_path):
+    path = tmp_path / "sub" / "archive.txt"
+    archive = DownloadArchive(str(path))
+    assert len(archive) == 0 and None not in archive
+    threads = [threading.Thread(target=archive.add, args=(f"youtube v{i % 20}",)) for i in range(60)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    archive.add(None)
+    assert sorted(path.read_text().splitlines()) == sorted(f"youtube v{i}" for i in range(20))
+    reloaded = DownloadArchive(str(path))
+    assert len(reloaded) == 20 and "youtube v7" in reloaded
+
+
+def test_archived_entries_are_skipped_before_any_worker_starts(tmp_path, fake_tools, make_options):
+    archive = tmp_path / "archive.txt"
+    archive.write_text("".join(f"youtube bench{n:06d}\n" for n in (2, 5, 9)))
+    runner = YtDlpRunner(queue.Queue())
+    assert runner.run(make_options(workers=4, download_archive=str(archive))) == 0
+    [job] = runner.jobs
+    assert (job.skipped, job.completed, job.failed) == (3, 7, 0)
+    downloaded = sorted(p.name for p in (tmp_path / "out" / "Benchmark playlist PLtest").iterdir())
+    assert len(downloaded) == 7 and not any(f"track {n}." in name for name in downloaded for n in (2, 5, 9))
+    assert len(archive.read_text().splitlines()) == 10  # completions recorded by the runner
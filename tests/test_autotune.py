@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from yt_gui import autotune
+from yt_gui.autotune import HOLD_STEPS, AutoTuner, ConcurrencyLimiter
+from yt_gui.progress import DOWNLOADING, ITEM_FAILED, ProgressEvent, ProgressTracker
+
+
+@pytest.fixture
+def tuner(monkeypatch):
+    monkeypatch.setattr(autotune, "cpu_load", lambda: None)
+    limiter, tracker, log = ConcurrencyLimiter(2), ProgressTracker(), []
+    t = AutoTuner(limiter, tracker, log.append, min_workers=1, max_workers=4, interval=1.0)
+    t.log = log
+    return t
+
+
+def _download(tracker, item, total):
+    tracker.update(item, ProgressEvent(DOWNLOADING, downloaded=total))
+
+
+def test_limiter_waits_for_a_free_slot_and_follows_limit_changes():
+    limiter = ConcurrencyLimiter(1)
+    assert limiter.acquire(lambda: False)
+    got = threading.Event()
+    t = threading.Thread(target=lambda: limiter.acquire(lambda: False) and got.set())
+    t.start()
+    assert not got.wait(0.2)
+    limiter.set_limit(2)
+    assert got.wait(2)
+    t.join()
+    assert limiter.running == 2
+    assert not limiter.acquire(lambda: True)  # full, and asked to stop
+    limiter.release()
+    limiter.release()
+    assert limiter.running == 0
+
+
+def test_adds_a_worker_when_busy_and_backs_off_when_it_did_not_help(tuner):
+    tuner.limiter.acquire(lambda: False)
+    tuner.limiter.acquire(lambda: False)
+    _download(tuner.tracker, 1, 1000)
+    tuner.step()
+    assert tuner.limiter.limit == 3 and "2 -> 3 (all slots busy" in tuner.log[-1]
+
+    _download(tuner.tracker, 1, 1020)  # 20 B/s after 1000 B/s: no gain
+    tuner.step()
+    assert tuner.limiter.limit == 2 and "did not raise throughput" in tuner.log[-1]
+    for _ in range(HOLD_STEPS):
+        tuner.step()
+        assert tuner.limiter.limit == 2 and "backing off" in tuner.log[-1]
+    tuner.step()
+    assert tuner.limiter.limit == 3
+
+
+def test_throttling_halves_and_failures_step_down_within_bounds(tuner):
+    tuner.limiter.set_limit(4)
+    tuner.note_throttle()
+    tuner.step()
+    assert tuner.limiter.limit == 2 and "1 throttled response(s)" in tuner.log[-1]
+    tuner.tracker.update(1, ProgressEvent(ITEM_FAILED))
+    tuner.step()
+    assert tuner.limiter.limit == 1
+    tuner.tracker.update(2, ProgressEvent(ITEM_FAILED))
+    tuner.step()
+    assert tuner.limiter.limit == 1 and tuner.log[-1].startswith("Auto workers: hold")
+
+
+def test_a_busy_cpu_stops_adding_workers(tuner, monkeypatch):
+    monkeypatch.setattr(autotune, "cpu_load", lambda: 3.0)
+    tuner.limiter.acquire(lambda: False)
+    tuner.limiter.acquire(lambda: False)
+    tuner.step()
+    assert tuner.limiter.limit == 1 and "CPU busy" in tuner.log[-1]
@@ -0,0 +1,31 @@
+import queue
+
+from yt_gui.bandwidth import MB, BandwidthBudget
+from yt_gui.runner import YtDlpRunner
+
+
+def test_shares_follow_running_downloads_and_expected_slots():
+    budget = BandwidthBudget(4 * MB)
+    budget.set_slots(4)
+    rates = {}
+    assert budget.acquire("a", lambda bps: rates.__setitem__("a", bps)) == MB  # four expected to run
+    budget.set_slots(2)
+    assert rates["a"] == 2 * MB
+    assert budget.acquire("b", lambda bps: rates.__setitem__("b", bps)) == 2 * MB
+    assert budget.acquire("c") == MB + MB // 3  # more running than expected: split among them
+    assert rates == {"a": MB + MB // 3, "b": MB + MB // 3}
+    budget.release("c")
+    budget.release("b")
+    budget.set_slots(1)  # the last item gets everything
+    assert rates["a"] == 4 * MB
+
+
+def test_parallel_items_share_the_job_rate(fake_tools, ytdlp_calls, make_options):
+    fake_tools.setenv("YTGUI_FAKE_ITEMS", "6")
+    fake_tools.setenv("YTGUI_FAKE_ITEM_DELAY", "0.2")
+    runner = YtDlpRunner(queue.Queue())
+    assert runner.run(make_options(workers=3, rate_limit_mbps=3.0)) == 0
+    limits = [int(c.split("--limit-rate ", 1)[1].split(" ", 1)[0]) for c in ytdlp_calls() if "--no-playlist" in c]
+    assert len(limits) == 6
+    assert limits.count(MB) >= 3  # a third each while the pool is full
+    assert all(limit <= 3 * MB for limit in limits)  # more only once fewer items are left
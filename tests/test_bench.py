@@ -0,0 +1,54 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BENCH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "run_bench.py")
+
+
+@pytest.fixture(scope="module")
+def bench():
+    spec = importlib.util.spec_from_file_location("run_bench", BENCH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_compare_reports_only_tracked_metrics_that_got_worse(bench):
+    before = {"items_per_s": 10.0, "spawn_ms_p50": 100.0, "probe_ms_p50": 50.0, "peak_rss_mib": 30.0, "pump_ms_p95": None}
+    after = {"items_per_s": 7.0, "spawn_ms_p50": 90.0, "probe_ms_p50": 70.0, "peak_rss_mib": 33.0, "pump_ms_p95": 1.0}
+    assert bench.compare(after, before, 0.2) == ["items_per_s 10.0 -> 7.0 (-30%)", "probe_ms_p50 50.0 -> 70.0 (+40%)"]
+    assert bench.compare(after, before, 0.5) == []
+
+
+def test_load_previous_keeps_the_latest_record_per_case(bench, tmp_path):
+    path = tmp_path / "results.jsonl"
+    case = {"items": 10, "workers": 4}
+    path.write_text("\n".join([
+        json.dumps({"case": case, "metrics": {"items_per_s": 1}}),
+        "not json",
+        json.dumps({"case": {"workers": 4, "items": 10}, "metrics": {"items_per_s": 2}}),
+        json.dumps({"case": {"items": 10, "workers": 1}, "metrics": {"items_per_s": 3}}),
+    ]) + "\n")
+    previous = bench.load_previous(str(path))
+    assert previous[bench.case_key(case)]["metrics"] == {"items_per_s": 2}
+    assert len(previous) == 2
+    assert bench.load_previous(str(tmp_path / "missing.jsonl")) == {}
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the stand-ins are POSIX shell shims")
+def test_a_run_records_every_case_and_checks_it_against_the_last_one(tmp_path):
+    results = tmp_path / "results.jsonl"
+    cmd = [sys.executable, BENCH, "--sizes", "3", "--workers", "1,2", "--size-mib", "0.01", "--chunks", "2",
+           "--results", str(results), "--threshold", "1000", "--check"]
+    for _ in range(2):
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=120, env={**os.environ, "XDG_CACHE_HOME": str(tmp_path)})
+        assert proc.returncode == 0, proc.stderr
+    records = [json.loads(line) for line in results.read_text().splitlines()]
+    assert [r["case"]["workers"] for r in records] == [1, 2, 1, 2]
+    assert all(r["metrics"]["completed"] == 3 and r["metrics"]["rc"] == 0 for r in records)
+    assert records[0]["metrics"]["spawn_ms_p50"] is None  # one process for the whole playlist
+    assert records[1]["metrics"]["spawn_ms_p50"] > 0  # the runner's spawn phase, one process per item
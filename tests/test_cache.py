@@ -0,0 +1,48 @@
+import os
+import threading
+
+from yt_gui.cache import ProbeCache
+
+URL = "https://www.youtube.com/playlist?list=PLtest"
+
+
+def test_put_then_get_from_memory_and_disk(tmp_path):
+    info = {"_type": "playlist", "title": "T", "entries": [{"id": "a"}]}
+    ProbeCache(str(tmp_path)).put(URL, "", info)
+    assert ProbeCache(str(tmp_path)).get(URL) == info
+
+
+def test_cookie_source_is_part_of_the_key(tmp_path):
+    cache = ProbeCache(str(tmp_path))
+    cache.put(URL, "firefox", {"title": "with cookies"})
+    assert cache.get(URL) is None
+    assert cache.get(URL, "firefox") == {"title": "with cookies"}
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    ProbeCache(str(tmp_path)).put(URL, "", {"title": "old"})
+    assert ProbeCache(str(tmp_path), ttl=0).get(URL) is None
+
+
+def test_invalidate_removes_both_copies(tmp_path):
+    cache = ProbeCache(str(tmp_path))
+    cache.put(URL, "", {"title": "T"})
+    cache.invalidate(URL)
+    assert cache.get(URL) is None
+    assert ProbeCache(str(tmp_path)).get(URL) is None
+
+
+def test_concurrent_writers_of_one_key_leave_one_valid_file(tmp_path):
+    def write(n):
+        cache = ProbeCache(str(tmp_path))
+        for _ in range(20):
+            cache.put(URL, "", {"writer": n, "entries": [{"id": str(n) * 40}] * 500})
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(os.listdir(tmp_path)) == 1  # no temporary files left behind
+    info = ProbeCache(str(tmp_path)).get(URL)
+    assert info["writer"] in range(8) and len(info["entries"]) == 500
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+import main_cli
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main_cli.py")
+
+
+def _cli(*args):
+    proc = subprocess.run([sys.executable, CLI, *args], capture_output=True, text=True, timeout=120)
+    return proc.returncode, proc.stdout, proc.stderr
+
+
+def test_batch_file_skips_blanks_and_comments(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text("# music\nhttps://a\n\n  https://b  \n#https://c\n")
+    assert main_cli.read_batch_file(str(path)) == ["https://a", "https://b"]
+
+
+def test_failed_report_is_grouped_by_url_and_folder(tmp_path):
+    path = tmp_path / "failed.json"
+    path.write_text(json.dumps({"items": [
+        {"url": "https://a", "output_dir": "/m", "id": "1"},
+        {"url": "https://b", "output_dir": "/m", "id": "2"},
+        {"url": "https://a", "output_dir": "/m", "id": "3"},
+        {"url": "https://a", "output_dir": "/n", "id": "4"},
+        {"url": "https://a", "id": ""},
+    ]}))
+    assert main_cli.read_failed_report(str(path)) == [
+        ("https://a", "/m", ["1", "3"]), ("https://b", "/m", ["2"]), ("https://a", "/n", ["4"]),
+    ]
+
+
+def test_conflicting_options_are_refused(tmp_path):
+    assert _cli("https://a", "--prune")[0] == 2
+    assert _cli("https://a", "--resume", "--fresh")[0] == 2
+    assert _cli("--work", str(tmp_path / "q.sqlite3"), "https://a")[0] == 2
+
+
+def test_a_batch_shares_one_pool_and_ends_with_a_json_summary(tmp_path, fake_tools):
+    fake_tools.setenv("YTGUI_FAKE_ITEMS", "4")
+    batch = tmp_path / "urls.txt"
+    batch.write_text("https://www.youtube.com/playlist?list=PLa\nhttps://www.youtube.com/playlist?list=PLb\n")
+    rc, out, err = _cli("--batch-file", str(batch), "-o", str(tmp_path / "out"), "--workers", "3", "--no-metadata")
+    assert rc == 0, err
+    summary = json.loads(out.strip().splitlines()[-1])
+    assert (summary["rc"], summary["completed"], summary["failed"]) == (0, 8, 0)
+    assert [u["url"][-4:] for u in summary["urls"]] == ["=PLa", "=PLb"]
+    assert all(u["completed"] == 4 for u in summary["urls"])
+    assert sorted(os.listdir(tmp_path / "out")) == ["Benchmark playlist PLa", "Benchmark playlist PLb"]
@@ -0,0 +1,39 @@
+from yt_gui.connections import ConnectionBudget
+
+
+def test_share_follows_the_expected_concurrency():
+    budget = ConnectionBudget(16)
+    budget.set_slots(4)
+    assert budget.acquire("a") == 4
+    budget.set_slots(1)  # the last item of a job
+    assert budget.acquire("b") == 8  # two running: 16 // 2, and 12 are still free
+
+
+def test_subprocess_share_is_capped_by_free_connections():
+    budget = ConnectionBudget(8)
+    budget.set_slots(1)
+    assert budget.acquire("a") == 8
+    assert budget.acquire("b") == 1  # nothing left, but every download gets at least one
+    budget.release("a")
+    assert budget.acquire("c") == 4
+
+
+def test_in_process_downloads_are_rebalanced():
+    budget = ConnectionBudget(12)
+    seen = {}
+    budget.set_slots(1)
+    assert budget.acquire("a", lambda n: seen.__setitem__("a", n)) == 12
+    assert budget.acquire("b", lambda n: seen.__setitem__("b", n)) == 6
+    assert seen == {"a": 6, "b": 6}
+    budget.set_slots(3)
+    assert seen == {"a": 4, "b": 4}
+    budget.set_slots(1)
+    budget.release("b")
+    assert seen["a"] == 12
+
+
+def test_never_below_one_connection():
+    budget = ConnectionBudget(2)
+    budget.set_slots(8)
+    assert budget.acquire("a") == 1
+    assert ConnectionBudget(0).total == 1
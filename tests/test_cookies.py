@@ -0,0 +1,72 @@
+import os
+import queue
+import threading
+import time
+
+from yt_gui import cookies
+from yt_gui.cookies import CookieJarCache, CookieJarExport
+from yt_gui.runner import YtDlpRunner
+
+
+def _jar(tmp_path):
+    path = tmp_path / "jar.txt"
+    path.write_text("# Netscape HTTP Cookie File\n")
+    return CookieJarExport(str(path))
+
+
+def _copies_in_threads(jar, n):
+    threads = [threading.Thread(target=jar.for_worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return list(jar._copies)
+
+
+def test_each_worker_thread_gets_its_own_copy(tmp_path):
+    jar = _jar(tmp_path)
+    copies = _copies_in_threads(jar, 3)
+    assert len(set(copies)) == 3 and all(os.path.exists(p) for p in copies)
+    assert jar.for_worker() == jar.for_worker()
+    jar.cleanup()
+    assert not any(os.path.exists(p) for p in copies + [jar.path])
+
+
+def test_a_runs_cleanup_removes_only_its_own_copies(tmp_path):
+    jar = _jar(tmp_path)
+    cache = CookieJarCache()
+    cache._jars["firefox"] = (time.monotonic(), jar)
+    first = cache.get("firefox", "https://x", lambda msg: None)
+    second = cache.get("firefox", "https://x", lambda msg: None)
+    mine, theirs = _copies_in_threads(first, 2), _copies_in_threads(second, 2)
+
+    first.cleanup()
+    assert not any(os.path.exists(p) for p in mine)
+    assert all(os.path.exists(p) for p in theirs) and os.path.exists(jar.path)
+    second.cleanup()
+    assert os.path.exists(jar.path)  # still cached for the next job
+    cache.cleanup()
+    assert not os.path.exists(jar.path)
+
+
+def test_a_retired_jar_goes_once_its_last_run_ends(tmp_path):
+    jar = _jar(tmp_path)
+    run = jar.for_run()
+    jar.retire()
+    assert os.path.exists(jar.path)
+    run.cleanup()
+    assert not os.path.exists(jar.path)
+
+
+def test_a_parallel_job_exports_the_browser_cookies_once(fake_tools, ytdlp_calls, make_options, monkeypatch):
+    monkeypatch.setattr(cookies, "yt_dlp", None)  # export through the yt-dlp command
+    fake_tools.setenv("YTGUI_FAKE_ITEMS", "6")
+    runner = YtDlpRunner(queue.Queue())
+    assert runner.run(make_options(workers=3, cookies_from_browser="firefox")) == 0
+
+    logged = ytdlp_calls()
+    assert sum("--cookies-from-browser" in c for c in logged) == 1
+    jars = [c.split("--cookies ", 1)[1].split(" ", 1)[0] for c in logged if "--cookies " in c]
+    items = [jar for c, jar in zip([c for c in logged if "--cookies " in c], jars) if "--no-playlist" in c]
+    assert len(items) == 6 and len(set(items)) <= 3  # one copy per worker thread
+    assert not any(os.path.exists(p) for p in jars)  # the export and its copies go with the job
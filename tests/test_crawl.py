@@ -0,0 +1,65 @@
+import os
+import queue
+import time
+
+from yt_gui.config import DownloadOptions
+from yt_gui.runner import _COPY, YtDlpRunner
+
+CHANNEL = "https://www.youtube.com/@chan"
+
+
+def _playlist(name):
+    return {"_type": "url", "ie_key": "YoutubeTab", "url": f"https://www.youtube.com/playlist?list={name}", "title": name}
+
+
+def _video(video_id, position):
+    return {"_type": "url", "ie_key": "Youtube", "id": video_id, "url": f"https://www.youtube.com/watch?v={video_id}",
+            "title": video_id, "playlist_index": position}
+
+
+# url -> (seconds the listing takes, entries); later playlists are listed first
+LISTINGS = {
+    CHANNEL: (0.0, [_playlist("P1"), _playlist("P2"), _playlist("Tab")]),
+    _playlist("P1")["url"]: (0.3, [_video("a", 1), _video("b", 2), _video("c", 3)]),
+    _playlist("P2")["url"]: (0.15, [_video("b", 1), _video("c", 2), _video("d", 3)]),
+    _playlist("Tab")["url"]: (0.0, [_playlist("P4"), _playlist("P1")]),
+    _playlist("P4")["url"]: (0.0, [_video("a", 1), _video("f", 2)]),
+}
+
+
+class _ListingRunner(YtDlpRunner):
+    def _crawl_listing(self, opt, url):
+        delay, entries = LISTINGS[url]
+        time.sleep(delay)
+        title = "chan" if url == CHANNEL else url.rsplit("=", 1)[1]
+        videos = [e for e in entries if not self._is_nested(e)]
+        return title, videos, [e for e in entries if self._is_nested(e)], True
+
+
+def _crawl(tmp_path):
+    opt = DownloadOptions(url=CHANNEL, output_dir=str(tmp_path), mode="auto", audio_only=False, audio_format="",
+                          subtitles=False, subs_langs="", embed_metadata=False, download_archive="",
+                          cookies_from_browser="", crawl=True, crawl_workers=4)
+    runner = _ListingRunner(queue.Queue())
+    scheduled = [(os.path.basename(job.folder), entry["id"], bool(entry.get(_COPY)))
+                 for job, entry, _ in runner._crawled_entries(opt, set())]
+    return runner, scheduled
+
+
+def test_playlists_are_scheduled_in_channel_order_with_later_copies_marked(tmp_path):
+    _, scheduled = _crawl(tmp_path)
+    assert scheduled == [
+        ("P1", "a", False), ("P1", "b", False), ("P1", "c", False),
+        ("P2", "b", True), ("P2", "c", True), ("P2", "d", False),
+        ("P4", "a", True), ("P4", "f", False),
+    ]
+
+
+def test_every_playlist_keeps_its_own_folder_inside_the_channel_folder(tmp_path):
+    runner, _ = _crawl(tmp_path)
+    assert [job.folder for job in runner.jobs] == [str(tmp_path / "chan" / name) for name in ("P1", "P2", "P4")]
+    assert all(os.path.isdir(job.folder) for job in runner.jobs)
+
+
+def test_ownership_is_the_same_on_every_crawl(tmp_path):
+    assert _crawl(tmp_path / "one")[1] == _crawl(tmp_path / "two")[1]
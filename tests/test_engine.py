@@ -0,0 +1,69 @@
+import json
+import threading
+
+import pytest
+
+from yt_gui.engine import _LogAdapter
+from yt_gui.progress import PROGRESS_MARKER
+
+
+def test_log_adapter_drops_debug_and_progress_template_lines():
+    lines = []
+    log = _LogAdapter(lines.append)
+    log.debug("[youtube] abc: Downloading webpage")
+    log.debug("[debug] Invoking http downloader")
+    log.debug(PROGRESS_MARKER + '{"event": "download"}')
+    log.warning("slow")
+    log.error("ERROR: gone")
+    assert lines == ["[youtube] abc: Downloading webpage", "WARNING: slow", "ERROR: gone"]
+
+
+def _engine(stop=lambda: False):
+    pytest.importorskip("yt_dlp")
+    from yt_gui.engine import InProcessEngine
+
+    lines, progress = [], []
+    engine = InProcessEngine(lines.append, stop, lambda index, ev: progress.append((index, ev)))
+    return engine, lines, progress
+
+
+def test_each_worker_thread_keeps_one_instance_per_set_of_flags():
+    engine, _, _ = _engine()
+    base = ["--quiet", "-f", "bestaudio"]
+    mine = engine._get_ydl(base)
+    assert engine._get_ydl(list(base)) is mine
+    assert engine._get_ydl(["--quiet"]) is not mine
+    other = []
+    t = threading.Thread(target=lambda: other.append(engine._get_ydl(base)))
+    t.start()
+    t.join()
+    assert other[0] is not mine
+    engine.rate_setter(base)(1024)
+    assert mine.params["ratelimit"] == 1024
+    engine.close()
+
+
+def test_a_local_item_downloads_with_progress_and_its_final_path(tmp_path):
+    engine, lines, progress = _engine()
+    source = tmp_path / "source.webm"
+    source.write_bytes(b"\0" * 4096)
+    info = tmp_path / "item.info.json"
+    info.write_text(json.dumps({
+        "id": "abc", "title": "A song", "extractor": "generic", "extractor_key": "Generic", "webpage_url": source.as_uri(),
+        "url": source.as_uri(), "ext": "webm", "protocol": "file",
+    }))
+    moved = tmp_path / "moved.txt"
+    base = ["--quiet", "--enable-file-urls", "--no-progress"]
+    item = ["-o", str(tmp_path / "out" / "%(title)s [%(id)s].%(ext)s"), "--no-playlist",
+            "--print-to-file", "after_move:filepath", str(moved), "--load-info-json", str(info)]
+    assert engine.run(base, item, index=3) == 0, lines
+    assert (tmp_path / "out" / "A song [abc].webm").read_bytes() == source.read_bytes()
+    assert moved.read_text().strip() == str(tmp_path / "out" / "A song [abc].webm")
+    assert progress and all(index == 3 for index, _ in progress)
+    engine.close()
+
+
+def test_a_stop_request_ends_the_item_with_a_failure(tmp_path):
+    engine, _, _ = _engine(stop=lambda: True)
+    assert engine.run(["--quiet"], ["https://www.youtube.com/watch?v=abc"], index=1) == 1
+    engine.close()
@@ -0,0 +1,54 @@
+import queue
+import threading
+
+from yt_gui.runner import YtDlpRunner
+
+
+class _BlockedRunner(YtDlpRunner):
+    """Downloads nothing; every item waits until `release` is set."""
+
+    def __init__(self):
+        super().__init__(queue.Queue())
+        self.release = threading.Event()
+        self.downloaded = []
+
+    def _download(self, base_cmd, item_args, index, fetch=True):
+        self.release.wait(10)
+        self.downloaded.append(index)
+        return 0
+
+
+def _listing(count, listed):
+    for n in range(1, count + 1):
+        listed.append(n)
+        yield {"_type": "url", "ie_key": "Youtube", "id": f"v{n}", "url": f"https://www.youtube.com/watch?v=v{n}",
+               "title": f"Track {n}", "playlist_index": n, "playlist_title": "Long"}
+
+
+def test_a_long_listing_is_consumed_only_as_far_as_the_submission_window(fake_tools, make_options):
+    runner, listed = _BlockedRunner(), []
+    info = {"_type": "playlist", "title": "Long", "entries": _listing(500, listed)}
+    done = []
+    t = threading.Thread(target=lambda: done.append(runner.run_parallel(make_options(workers=2), info)))
+    t.start()
+    try:
+        t.join(1.0)
+        assert t.is_alive() and len(listed) <= 10  # window of 4 plus the item waiting for a slot
+    finally:
+        runner.release.set()
+    t.join(30)
+    assert done == [0] and len(listed) == 500
+    assert sorted(runner.downloaded) == list(range(1, 501))
+
+
+def test_entries_stream_from_yt_dlp_as_they_are_printed(fake_tools, make_options):
+    fake_tools.setenv("YTGUI_FAKE_ITEMS", "7")
+    runner = YtDlpRunner(queue.Queue())
+    entries = runner._iter_entries(make_options(), None)
+    first = next(entries)
+    assert (first["id"], first["playlist_index"]) == ("bench000001", 1)
+    rest = list(entries)
+    assert [e["playlist_index"] for e in rest] == [2, 3, 4, 5, 6, 7]
+    # The finished listing went to the probe cache, trimmed to the fields the runner needs
+    cached = runner.probe_cache.get(make_options().url, "")
+    assert len(cached["entries"]) == 7 and "playlist_id" not in cached["entries"][0]
@@ -0,0 +1,58 @@
+import queue
+
+import pytest
+
+from yt_gui.formats import audio_action, audio_format_selector, normalize_acodec
+from yt_gui.runner import YtDlpRunner
+
+
+def test_selector_prefers_a_stream_that_can_be_copied():
+    assert audio_format_selector("m4a") == "bestaudio[acodec^=mp4a]/bestaudio/best"
+    assert audio_format_selector("opus") == "bestaudio[acodec=opus]/bestaudio/best"
+    assert audio_format_selector("wav") == "bestaudio/best"
+
+
+def test_audio_action_by_source_codec():
+    assert normalize_acodec("mp4a.40.2") == "aac"
+    assert normalize_acodec("OPUS") == "opus"
+    assert normalize_acodec(None) == ""
+    assert audio_action("mp4a.40.2", "m4a") == "remux"
+    assert audio_action("mp4a.40.2", "aac") == "remux"
+    assert audio_action("opus", "opus") == "remux"
+    assert audio_action("opus", "mp3") == "transcode"
+    assert audio_action(None, "mp3") == "transcode"
+    assert audio_action("opus", "best") == "remux"
+
+
+def test_yt_dlp_picks_the_copyable_stream_over_a_better_one():
+    yt_dlp = pytest.importorskip("yt_dlp")
+    formats = [  # worst first, as yt-dlp sorts them
+        {"format_id": "140", "acodec": "mp4a.40.2", "vcodec": "none", "abr": 128, "ext": "m4a", "url": "https://x/140"},
+        {"format_id": "251", "acodec": "opus", "vcodec": "none", "abr": 160, "ext": "webm", "url": "https://x/251"},
+    ]
+    ydl = yt_dlp.YoutubeDL({"quiet": True})
+
+    def chosen(audio_format):
+        select = ydl.build_format_selector(audio_format_selector(audio_format))
+        return [f["format_id"] for f in select({"formats": formats, "has_merged_format": False})]
+
+    assert chosen("m4a") == ["140"]
+    assert chosen("opus") == ["251"]
+    assert chosen("mp3") == ["251"]  # nothing to copy: the best stream, transcoded
+
+
+@pytest.mark.parametrize("audio_format, summary", [
+    ("opus", "Audio: 3 remuxed without re-encoding, 0 transcoded."),
+    ("mp3", "Audio: 0 remuxed without re-encoding, 3 transcoded."),
+])
+def test_a_run_reports_remuxed_and_transcoded_items(fake_tools, make_options, audio_format, summary):
+    fake_tools.setenv("YTGUI_FAKE_ITEMS", "3")  # the stand-in's streams are opus
+    log = queue.Queue()
+    runner = YtDlpRunner(log)
+    opt = make_options(audio_only=True, audio_format=audio_format)
+    assert runner._get_format_flags(opt) == ["-f", audio_format_selector(audio_format)]
+    assert runner.run(opt) == 0
+    lines = []
+    while not log.empty():
+        lines.append(log.get_nowait())
+    assert summary in lines
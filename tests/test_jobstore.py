@@ -0,0 +1,110 @@
+import queue
+import time
+
+from yt_gui.config import DownloadOptions
+from yt_gui.jobstore import DONE, ENUMERATING, FAILED, FINISHED, PENDING, READY, RUNNING, JobStore, remove_files, written_file
+from yt_gui.runner import YtDlpRunner
+
+
+def _store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_entries_are_recorded_once_and_listed_by_state(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("key", "https://x", {"workers": 4})
+    store.add_entries(job, [(1, {"id": "a"}), (2, {"id": "b"}), (3, {"id": "c"})])
+    store.add_entries(job, [(1, {"id": "changed"})])  # already recorded: left alone
+    store.set_item(job, 2, DONE)
+    store.set_item(job, 3, FAILED, "boom", attempt=True)
+
+    assert [(seq, e["id"]) for seq, e, _ in store.entries(job, (PENDING, FAILED))] == [(1, "a"), (3, "c")]
+    assert sorted(store.states(job)) == [(1, "a", PENDING), (2, "b", DONE), (3, "c", FAILED)]
+
+
+def test_unfinished_jobs_survive_reopening(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("key", "https://x", {"workers": 4})
+    store.set_job(job, kind="playlist", folder="/music/P", state=READY)
+    store.add_entries(job, [(1, {"id": "a"}), (2, {"id": "b"})])
+    store.set_item(job, 1, DONE)
+    store.set_item(job, 2, RUNNING)
+    store.set_files(job, 2, ["/music/P/002 - b.webm"])
+    store.close()
+
+    store = _store(tmp_path)
+    [record] = store.unfinished("key")
+    assert (record.url, record.kind, record.folder, record.state) == ("https://x", "playlist", "/music/P", READY)
+    assert record.options == {"workers": 4}
+    assert record.pending == 1
+    assert store.entries(job, (RUNNING,)) == [(2, {"id": "b"}, ["/music/P/002 - b.webm"])]
+
+
+def test_finish_closes_all_but_the_kept_job(tmp_path):
+    store = _store(tmp_path)
+    old = store.create("key", "https://x", {})
+    new = store.create("key", "https://x", {})
+    other = store.create("other", "https://y", {})
+    store.add_entries(old, [(1, {"id": "a"})])
+
+    store.finish("key", keep=new)
+    assert [r.id for r in store.unfinished()] == [new, other]
+    assert store.states(old) == []
+    store.finish("key")
+    assert [r.id for r in store.unfinished("key")] == []
+    assert store.unfinished("other")[0].state == ENUMERATING
+    assert FINISHED not in {r.state for r in store.unfinished()}
+
+
+def test_a_job_owned_by_a_live_run_is_not_taken_over(tmp_path):
+    first, second = _store(tmp_path), _store(tmp_path)
+    job = first.create("key", "https://x", {})
+    assert second.holder("key") == first.owner
+    assert second.own(job) == first.owner
+
+    first.close()  # a run that ends gives its jobs up
+    assert second.holder("key") == ""
+    assert second.own(job) == ""
+    assert _store(tmp_path).own(job) == second.owner
+
+
+def test_a_job_of_a_dead_or_silent_run_is_taken_over(tmp_path):
+    store = _store(tmp_path)
+    silent = store.create("key", "https://x", {})
+    dead = store.create("other", "https://y", {})
+    store._db.execute("UPDATE jobs SET owner = 'elsewhere:1', heartbeat = ? WHERE id = ?", (time.time() - 3600, silent))
+    store._db.execute("UPDATE jobs SET owner = ?, heartbeat = ? WHERE id = ?",
+                      (f"{store.owner.split(':')[0]}:999999999", time.time(), dead))
+
+    other = _store(tmp_path)
+    assert other.own(silent) == "" and other.own(dead) == ""
+
+
+def test_opening_a_job_twice_leaves_the_running_one_alone(tmp_path):
+    opt = DownloadOptions(url="https://www.youtube.com/playlist?list=P", output_dir=str(tmp_path), mode="auto",
+                          audio_only=False, audio_format="", subtitles=False, subs_langs="", embed_metadata=False,
+                          download_archive="", cookies_from_browser="", resume=True)
+    first, second = YtDlpRunner(queue.Queue()), YtDlpRunner(queue.Queue())
+    first._jobs_db, second._jobs_db = _store(tmp_path), _store(tmp_path)
+    partial = tmp_path / "P" / "001 - a.webm.part"
+    partial.parent.mkdir()
+    partial.write_bytes(b"x")
+    job = first._jobs_db.create(first._job_key(opt), opt.url, {})
+    first._jobs_db.set_job(job, kind="playlist", folder=str(partial.parent), state=READY)
+    first._jobs_db.add_entries(job, [(1, {"id": "a"})])
+    first._jobs_db.set_item(job, 1, RUNNING)
+    first._jobs_db.set_files(job, 1, [str(partial)])
+
+    assert second._open_job(opt, None) is None
+    assert partial.exists()
+    assert [r.id for r in second._jobs_db.unfinished()] == [job]
+    assert "not starting it twice" in second.log_queue.get_nowait()
+
+
+def test_written_file_and_remove_files(tmp_path):
+    assert written_file("[download] Destination: /m/001 - A.webm") == "/m/001 - A.webm"
+    assert written_file('[Merger] Merging formats into "/m/001 - A.mkv"') == "/m/001 - A.mkv"
+    assert written_file("[download]  50.0% of 3MiB") is None
+    path = tmp_path / "f"
+    path.write_bytes(b"x")
+    assert remove_files([str(path), str(tmp_path / "missing")]) == 1
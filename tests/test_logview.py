@@ -0,0 +1,59 @@
+import queue
+
+from yt_gui.logview import LatencyStats, drain, flood_lines, progress_key
+
+DONE = "__done__"
+
+
+def _queue(lines):
+    q = queue.Queue()
+    for line in lines:
+        q.put(line)
+    return q
+
+
+def test_progress_key_tells_progress_from_regular_lines():
+    assert progress_key("[003]  42.0% of 4.2MiB at 1.1MiB/s ETA 00:03") == "[003]"
+    assert progress_key("  7.5% of ~10MiB") == ""
+    assert progress_key("[003] ? of 4.2MiB") == "[003]"
+    assert progress_key("[003] Queuing: A song") is None
+
+
+def test_progress_is_coalesced_at_its_last_occurrence_between_regular_lines():
+    batch = drain(_queue([
+        "[001] Queuing: A",
+        "[001]  10.0% of 1MiB",
+        "[002] Queuing: B",
+        "[001]  50.0% of 1MiB",
+        "[002]  20.0% of 1MiB",
+        "[001] Done: A",
+        "[001] 100.0% of 1MiB",
+        DONE,
+    ]), DONE)
+    assert batch.done
+    assert batch.entries == [
+        (None, "[001] Queuing: A"),
+        (None, "[002] Queuing: B"),
+        ("[002]", "[002]  20.0% of 1MiB"),
+        (None, "[001] Done: A"),
+        ("[001]", "[001] 100.0% of 1MiB"),
+    ]
+    assert len(batch.raw) == 7  # the on-disk log keeps every line
+
+
+def test_drain_takes_at_most_max_items_per_tick():
+    q = _queue(flood_lines(250, workers=4))
+    first = drain(q, DONE, max_items=100)
+    assert len(first.raw) == 100 and not first.done
+    assert sum(1 for key, _ in first.entries if key is not None) == 4  # one progress line per item
+    rest = drain(q, DONE)
+    assert len(rest.raw) == 150 and q.empty()
+
+
+def test_latency_stats_summary():
+    stats = LatencyStats()
+    for ms in (1, 2, 3, 4):
+        stats.record(ms / 1000.0, 10, ms * 5)
+    summary = stats.summary()
+    assert (summary["ticks"], summary["lines"], summary["backlog_max"]) == (4, 40, 20)
+    assert summary["render_ms_max"] == 4.0 and summary["render_ms_p50"] == 2.5
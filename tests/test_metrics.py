@@ -0,0 +1,53 @@
+import json
+
+from yt_gui.metrics import BUCKETS, SAMPLE_WINDOW, MetricsRecorder, PhaseStats
+
+
+def _item(recorder, tag, marks, rc=0):
+    recorder.submitted(tag, "https://x", f"id{tag}", f"title {tag}")
+    timer = recorder._active[tag]
+    start = timer.marks["submitted"]
+    for name, at in marks.items():
+        timer.mark(name, start + at)
+    recorder.finish(tag, rc)
+
+
+def test_phases_are_measured_between_their_marks(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    recorder = MetricsRecorder(str(path))
+    _item(recorder, 1, {"started": 1.0, "spawn": 1.0, "first_output": 1.25, "download_start": 2.0, "download_end": 5.0})
+    _item(recorder, 2, {"started": 0.5, "spawn": 0.5, "first_output": 0.75}, rc=1)
+    recorder.close()
+
+    summary = recorder.summary()
+    assert (summary["completed"], summary["failed"], summary["exit_codes"]) == (1, 1, {"0": 1, "1": 1})
+    assert summary["phases"]["spawn"]["count"] == 2 and summary["phases"]["spawn"]["sum_s"] == 0.5
+    assert summary["phases"]["download"]["max_s"] == 3.0
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["type"] for r in records] == ["item", "item", "summary"]
+    assert records[0]["phases"]["queue_wait"] == 1.0
+
+
+def test_prometheus_exports_cumulative_histograms():
+    recorder = MetricsRecorder()
+    for tag, seconds in enumerate((0.04, 0.3, 0.3, 7.0, 5000.0), start=1):
+        _item(recorder, tag, {"started": 0.0, "spawn": 0.0, "first_output": seconds})
+    text = recorder.prometheus(active=2)
+    assert "# TYPE yt_gui_phase_seconds histogram" in text
+    assert 'yt_gui_phase_seconds_bucket{phase="spawn",le="0.05"} 1' in text
+    assert 'yt_gui_phase_seconds_bucket{phase="spawn",le="0.5"} 3' in text
+    assert 'yt_gui_phase_seconds_bucket{phase="spawn",le="10.0"} 4' in text
+    assert f'yt_gui_phase_seconds_bucket{{phase="spawn",le="{BUCKETS[-1]}"}} 4' in text
+    assert 'yt_gui_phase_seconds_bucket{phase="spawn",le="+Inf"} 5' in text
+    assert 'yt_gui_phase_seconds_count{phase="spawn"} 5' in text
+    assert "yt_gui_active_items 2" in text
+    assert "quantile" not in text
+
+
+def test_phase_samples_are_bounded_but_totals_are_not():
+    stats = PhaseStats()
+    for i in range(SAMPLE_WINDOW + 500):
+        stats.add(float(i))
+    assert len(stats.recent) == SAMPLE_WINDOW and stats.recent[0] == 500.0
+    assert stats.count == SAMPLE_WINDOW + 500 and stats.max == SAMPLE_WINDOW + 499
+    assert sum(stats.buckets) == sum(1 for i in range(SAMPLE_WINDOW + 500) if i <= BUCKETS[-1])
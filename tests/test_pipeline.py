@@ -0,0 +1,67 @@
+import queue
+import threading
+import time
+
+from yt_gui.pipeline import StageTimings, TranscodeJob, TranscodeStage
+from yt_gui.runner import YtDlpRunner
+
+
+def test_stage_timings_summary():
+    timings = StageTimings("Transcode")
+    assert timings.summary() == "Transcode: no items"
+    timings.record(1.0, True)
+    timings.record(3.0, False)
+    assert timings.summary() == "Transcode: 2 item(s), 1 failed, busy 4.0s, avg 2.00s, max 3.00s"
+
+
+def test_every_submitted_job_is_converted_by_the_pool_before_close_returns():
+    done, threads = [], set()
+
+    def convert(job):
+        time.sleep(0.01)
+        threads.add(threading.current_thread().name)
+        done.append(job.item)
+        return 0 if job.item % 5 else 1
+
+    stage = TranscodeStage(convert, lambda: False, workers=3)
+    stage.start()
+    for i in range(20):
+        assert stage.submit(TranscodeJob(i, f"{i}.info.json", f"{i}.mp3"))
+    stage.close()
+    assert sorted(done) == list(range(20))
+    assert threads <= {"transcode-0", "transcode-1", "transcode-2"} and len(threads) > 1
+    assert "20 item(s), 4 failed" in stage.timings.summary()
+
+
+def test_submit_blocks_on_a_full_queue_until_a_stop():
+    release, stop = threading.Event(), threading.Event()
+    stage = TranscodeStage(lambda job: release.wait() and 0, stop.is_set, workers=1)
+    stage.start()
+    for i in range(3):  # one converting, two queued
+        assert stage.submit(TranscodeJob(i, "", ""))
+    blocked = []
+    t = threading.Thread(target=lambda: blocked.append(stage.submit(TranscodeJob(3, "", ""))))
+    t.start()
+    time.sleep(0.6)
+    assert t.is_alive()
+    stop.set()
+    t.join(2)
+    assert blocked == [False]
+    release.set()
+    stage.close()
+    assert len(stage.timings.durations) == 1  # queued jobs are dropped after a stop
+
+
+def test_audio_only_runs_convert_in_their_own_stage(tmp_path, fake_tools, make_options):
+    fake_tools.setenv("YTGUI_FAKE_ITEMS", "5")
+    log = queue.Queue()
+    runner = YtDlpRunner(log)
+    assert runner.run(make_options(workers=3, audio_only=True, transcode_workers=2)) == 0
+    folder = tmp_path / "out" / "Benchmark playlist PLtest"
+    # The stand-in leaves the downloaded source next to the conversion, which yt-dlp would delete
+    assert len(list(folder.glob("*.mp3"))) == 5 and not list(folder.rglob("*.info.json"))
+    lines = []
+    while not log.empty():
+        lines.append(log.get_nowait())
+    assert "Pipeline: 3 download worker(s), 2 transcode worker(s)." in lines
+    assert any(line.startswith("  Transcode: 5 item(s), 0 failed") for line in lines)
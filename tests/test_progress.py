@@ -0,0 +1,90 @@
+import json
+import queue
+import re
+
+from yt_gui.logview import progress_key
+from yt_gui.progress import (
+    DOWNLOADING, ITEM_FAILED, ITEM_FINISHED, ITEM_STARTED, POSTPROCESSING, PROGRESS_MARKER, ProgressEvent,
+    ProgressTracker, event_from_progress, parse_progress_line, progress_from_hook, progress_template_flags,
+)
+from yt_gui.runner import YtDlpRunner
+
+HOOK = {
+    "status": "downloading", "downloaded_bytes": 512, "total_bytes": None, "total_bytes_estimate": 2048,
+    "speed": 256.0, "eta": 6, "info_dict": {"id": "abc", "playlist_index": 4, "n_entries": 9, "title": 'Say "hi"'},
+}
+
+
+def _render(template, hook):
+    """What yt-dlp prints for a progress template: %(a.b,c.d|null)j fields as JSON."""
+    scope = {"progress": hook, "info": hook["info_dict"]}
+
+    def field(m):
+        for path in m.group(1).split(","):
+            top, key = path.split(".")
+            if scope[top].get(key) is not None:
+                return json.dumps(scope[top][key])
+        return "null"
+
+    return re.sub(r"%\(([^|)]+)\|null\)j", field, template)
+
+
+def test_templates_print_the_same_json_the_hooks_build():
+    flags = progress_template_flags()
+    download = flags[flags.index("--progress-template") + 1]
+    assert download.startswith("download:")
+    data = parse_progress_line(_render(download[len("download:"):], HOOK))
+    built = progress_from_hook("download", HOOK)
+    assert data == {k: v for k, v in built.items() if k in data}
+    assert (data["id"], data["index"], data["total"], data["title"]) == ("abc", 4, 2048, 'Say "hi"')
+
+
+def test_parse_progress_line_ignores_everything_else():
+    assert parse_progress_line("[download] Destination: x.webm") is None
+    assert parse_progress_line(PROGRESS_MARKER + "{not json") is None
+    assert parse_progress_line(PROGRESS_MARKER + "[1, 2]") is None
+
+
+def test_events_from_progress_and_their_log_lines():
+    ev = event_from_progress(4, progress_from_hook("download", HOOK))
+    assert (ev.kind, ev.downloaded, ev.total, ev.video_id) == (DOWNLOADING, 512, 2048, "abc")
+    assert ev.describe() == "[004]  25.0% of 2.0KiB at 256B/s ETA 00:06"
+    assert progress_key(ev.describe()) == "[004]"  # the GUI coalesces these per item
+
+    done = event_from_progress(4, progress_from_hook("download", {**HOOK, "status": "finished", "downloaded_bytes": 2048}))
+    assert (done.downloaded, done.total, done.eta) == (2048, 2048, 0)
+    post = event_from_progress(None, {"event": "postprocess", "status": "started", "postprocessor": "ExtractAudio"})
+    assert (post.kind, post.describe()) == (POSTPROCESSING, "ExtractAudio started")
+    assert event_from_progress(4, {"event": "download", "status": "error"}) is None
+
+
+def test_tracker_counts_bytes_across_streams_and_items():
+    tracker = ProgressTracker()
+    tracker.reset(total=3)
+    tracker.update(1, ProgressEvent(ITEM_STARTED))
+    tracker.update(1, ProgressEvent(DOWNLOADING, downloaded=100, total=100, speed=50.0))
+    tracker.update(1, ProgressEvent(DOWNLOADING, downloaded=30, total=60, speed=10.0))  # the audio stream
+    tracker.update(2, ProgressEvent(ITEM_STARTED))
+    snap = tracker.snapshot()
+    assert (snap.active, snap.downloaded_bytes, snap.speed) == (2, 130, 10.0)
+    tracker.update(1, ProgressEvent(ITEM_FINISHED))
+    tracker.update(2, ProgressEvent(ITEM_FAILED))
+    snap = tracker.snapshot()
+    assert (snap.completed, snap.failed, snap.active, snap.downloaded_bytes) == (1, 1, 0, 130)
+    assert snap.summary() == "Progress: 1 / 3 done, 1 failed | 130B at 0B/s"
+
+
+def test_a_parallel_run_publishes_events_for_every_item(fake_tools, make_options):
+    fake_tools.setenv("YTGUI_FAKE_ITEMS", "4")
+    events = queue.Queue()
+    runner = YtDlpRunner(queue.Queue(), event_queue=events)
+    assert runner.run(make_options(workers=2)) == 0
+    kinds = {}
+    while not events.empty():
+        ev = events.get_nowait()
+        if ev is not None:
+            kinds.setdefault(ev.index, []).append(ev.kind)
+    assert sorted(kinds) == [1, 2, 3, 4]
+    for seen in kinds.values():
+        assert seen[0] == ITEM_STARTED and seen[-1] == ITEM_FINISHED and DOWNLOADING in seen
+    assert runner.tracker.snapshot().completed == 4
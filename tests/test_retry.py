@@ -0,0 +1,93 @@
+import json
+import queue
+import threading
+
+from yt_gui.config import DownloadOptions
+from yt_gui.retry import (
+    FAILED_REPORT_NAME, MAX_DELAY, NETWORK, OTHER, POSTPROCESS, THROTTLED, UNAVAILABLE, CoolDown, RetryQueue, backoff,
+    classify, retry_limit,
+)
+from yt_gui.runner import YtDlpRunner, _Job
+
+
+def test_classify_by_error_output():
+    assert classify(["ERROR: [youtube] x: HTTP Error 429: Too Many Requests"]) == THROTTLED
+    assert classify(["ERROR: [youtube] x: Video unavailable. This video is private"]) == UNAVAILABLE
+    assert classify(["ERROR: [download] Got error: ('Connection reset by peer')"]) == NETWORK
+    assert classify(["ERROR: Postprocessing: Conversion failed!"]) == POSTPROCESS
+    assert classify(["ERROR: something nobody expected"]) == OTHER
+    assert classify([]) == OTHER
+
+
+def test_first_matching_kind_wins():
+    # A throttled request that also mentions a network error is still throttling
+    assert classify(["HTTP Error 429", "Unable to download webpage"]) == THROTTLED
+
+
+def test_retry_limits_per_kind():
+    assert retry_limit(THROTTLED, 3) == 3
+    assert retry_limit(NETWORK, 5) == 5
+    assert retry_limit(POSTPROCESS, 3) == 1
+    assert retry_limit(UNAVAILABLE, 3) == 0
+    assert retry_limit(OTHER, 0) == 0
+
+
+def test_backoff_grows_and_is_capped():
+    for attempt in range(1, 5):
+        delay = backoff(NETWORK, attempt, 2.0)
+        assert 0.5 * 2.0 * 2 ** (attempt - 1) <= delay <= 1.5 * 2.0 * 2 ** (attempt - 1)
+    assert backoff(THROTTLED, 1, 2.0) >= 3.0  # throttling waits three times longer
+    assert backoff(NETWORK, 30, 5.0) <= 1.5 * MAX_DELAY
+
+
+def test_cooldown_starts_after_threshold_hits():
+    cooldown = CoolDown(threshold=3, window=60.0, pause=10.0)
+    assert cooldown.note() == 0.0
+    assert cooldown.note() == 0.0
+    assert cooldown.note() == 10.0
+    assert cooldown.note() == 0.0  # already cooling down
+
+
+def test_retry_queue_submits_in_due_order_and_returns_the_rest_on_close():
+    done = threading.Event()
+    submitted = []
+
+    def submit(item):
+        submitted.append(item)
+        if len(submitted) == 2:
+            done.set()
+
+    retries = RetryQueue(submit)
+    retries.start()
+    retries.schedule("late", 0.2)
+    retries.schedule("early", 0.0)
+    retries.schedule("never", 60.0)
+    assert done.wait(5)
+    assert submitted == ["early", "late"]
+    assert retries.close() == ["never"]
+
+
+def _batch(runner, folder, results):
+    """Ends a batch in which each URL failed the given video ids."""
+    runner.jobs = []
+    for url, ids in results.items():
+        opt = DownloadOptions(url=url, output_dir=str(folder), mode="auto", audio_only=False, audio_format="",
+                              subtitles=False, subs_langs="", embed_metadata=False, download_archive="",
+                              cookies_from_browser="")
+        job = _Job(opt=opt, kind="playlist", folder=str(folder), archive=None, base_cmd=[], failed=len(ids))
+        job.failures = [{"url": url, "output_dir": str(folder), "id": i, "kind": NETWORK} for i in ids]
+        runner.jobs.append(job)
+    runner._write_failed_report(runner.jobs[0].opt)
+    path = folder / FAILED_REPORT_NAME
+    return sorted((f["url"], f["id"]) for f in json.loads(path.read_text())["items"]) if path.exists() else None
+
+
+def test_batches_sharing_an_output_folder_share_the_failed_report(tmp_path):
+    runner = YtDlpRunner(queue.Queue())
+    assert _batch(runner, tmp_path, {"A": ["a1", "a2"]}) == [("A", "a1"), ("A", "a2")]
+    # Another playlist into the same folder keeps A's failures next to its own
+    assert _batch(runner, tmp_path, {"B": ["b1"]}) == [("A", "a1"), ("A", "a2"), ("B", "b1")]
+    # A clean run of B drops only B's entries; A again only fails a2
+    assert _batch(runner, tmp_path, {"B": []}) == [("A", "a1"), ("A", "a2")]
+    assert _batch(runner, tmp_path, {"A": ["a2"]}) == [("A", "a2")]
+    assert _batch(runner, tmp_path, {"A": []}) is None
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from yt_gui.service import options_from_json
+
+URL = "https://www.youtube.com/playlist?list=P"
+
+
+def test_defaults_are_filled_in_and_paths_resolved_inside_the_root(tmp_path):
+    [opt] = options_from_json({"url": URL, "workers": 4, "rate_limit_mbps": 2, "only_ids": ["a"],
+                               "download_archive": "archive.txt"}, str(tmp_path))
+    assert (opt.workers, opt.rate_limit_mbps, opt.only_ids, opt.mode) == (4, 2, ["a"], "auto")
+    assert opt.output_dir == os.path.realpath(tmp_path)
+    assert opt.download_archive == os.path.realpath(tmp_path / "archive.txt")
+    assert opt.metrics_file == ""  # left empty: stays off
+
+
+def test_a_list_of_jobs_is_accepted(tmp_path):
+    opts = options_from_json([{"url": URL, "output_dir": "A"}, {"url": URL, "output_dir": str(tmp_path / "B")}], str(tmp_path))
+    assert [o.output_dir for o in opts] == [os.path.realpath(tmp_path / "A"), os.path.realpath(tmp_path / "B")]
+
+
+@pytest.mark.parametrize("item", [
+    {"workers": "4"},
+    {"workers": True},
+    {"audio_only": "yes"},
+    {"rate_limit_mbps": None},
+    {"only_ids": "abc"},
+    {"only_ids": [1]},
+    {"mode": "everything"},
+    {"engine": "shell"},
+    {"colour": "red"},
+])
+def test_wrong_values_and_unknown_options_are_refused(tmp_path, item):
+    with pytest.raises(ValueError):
+        options_from_json({"url": URL, **item}, str(tmp_path))
+
+
+@pytest.mark.parametrize("name", ["output_dir", "download_archive", "store_dir", "metrics_file", "job_store", "scratch_dir"])
+def test_paths_leading_out_of_the_root_are_refused(tmp_path, name):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "link").symlink_to(tmp_path)
+    for value in ("../elsewhere", str(tmp_path / "elsewhere"), "link/elsewhere", "~/.bashrc"):
+        with pytest.raises(ValueError, match="outside"):
+            options_from_json({"url": URL, name: value}, str(root))
+
+
+def test_browser_profiles_are_taken_by_name_only(tmp_path):
+    [opt] = options_from_json({"url": URL, "cookies_from_browser": "firefox+gnomekeyring:work"}, str(tmp_path))
+    assert opt.cookies_from_browser == "firefox+gnomekeyring:work"
+    with pytest.raises(ValueError):
+        options_from_json({"url": URL, "cookies_from_browser": "chrome:/home/someone/.config/chrome"}, str(tmp_path))
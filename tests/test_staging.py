@@ -0,0 +1,95 @@
+import errno
+import os
+import queue
+import socket
+import threading
+
+import pytest
+
+from yt_gui import staging
+from yt_gui.runner import YtDlpRunner
+from yt_gui.staging import MB, ScratchSpace, estimate_size, move_into_place
+
+
+def test_estimate_size_from_size_or_duration():
+    assert estimate_size({"filesize": 10 * MB}, False) == 20 * MB
+    assert estimate_size({"duration": 100}, True) == 100 * 24 * 1024 * 2
+    assert estimate_size({"duration": 100}, False) == 100 * 640 * 1024 * 2
+    assert estimate_size({}, True) == 400 * MB
+
+
+def _cross_device(monkeypatch, src):
+    """os.replace as if src were on another filesystem than its destination."""
+    real = os.replace
+
+    def replace(a, b):
+        if str(a) == str(src):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        real(a, b)
+
+    monkeypatch.setattr(staging.os, "replace", replace)
+
+
+def test_move_renames_or_copies_across_filesystems(tmp_path, monkeypatch):
+    src, dest = tmp_path / "a.webm", tmp_path / "out" / "A.webm"
+    src.write_bytes(b"x" * 1000)
+    move_into_place(str(src), str(dest))
+    assert dest.read_bytes() == b"x" * 1000 and not src.exists()
+
+    src.write_bytes(b"y" * 1000)
+    _cross_device(monkeypatch, src)
+    move_into_place(str(src), str(dest))
+    assert dest.read_bytes() == b"y" * 1000 and not src.exists()
+    assert os.listdir(dest.parent) == ["A.webm"]
+
+
+def test_a_failed_copy_leaves_neither_a_partial_file_nor_a_missing_source(tmp_path, monkeypatch):
+    src, dest = tmp_path / "a.webm", tmp_path / "out" / "A.webm"
+    src.write_bytes(b"x" * 1000)
+    _cross_device(monkeypatch, src)
+
+    def full(*args):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(staging.shutil, "copyfileobj", full)
+    with pytest.raises(OSError):
+        move_into_place(str(src), str(dest))
+    assert src.exists() and os.listdir(dest.parent) == []
+
+
+def test_folders_of_dead_runs_are_removed(tmp_path):
+    prefix = f"yt_gui_{socket.gethostname()}_"
+    (tmp_path / f"{prefix}999999999_x").mkdir()
+    (tmp_path / f"{prefix}{os.getpid()}_live").mkdir()
+    scratch = ScratchSpace(str(tmp_path), 0)
+    assert scratch.stale == [f"{prefix}999999999_x"]
+    assert (tmp_path / f"{prefix}{os.getpid()}_live").exists()
+    assert os.path.dirname(scratch.folder()) == scratch.path
+    scratch.close()
+    assert not os.path.exists(scratch.path)
+
+
+def test_downloads_wait_for_room_but_one_always_goes(tmp_path, monkeypatch):
+    scratch = ScratchSpace(str(tmp_path), keep_free=100 * MB)
+    monkeypatch.setattr(scratch, "free", lambda: 150 * MB)
+    assert scratch.reserve("big", 500 * MB, lambda: False)  # alone: let through
+    waited, got = [], threading.Event()
+    t = threading.Thread(target=lambda: scratch.reserve("next", 10 * MB, lambda: False, waited.append) and got.set())
+    t.start()
+    assert not got.wait(0.3) and waited == [150 * MB]
+    scratch.note("big", 490 * MB, 250 * MB)  # the real size is known and mostly written: room now
+    scratch.release("big")
+    assert got.wait(3)
+    t.join()
+    assert not scratch.reserve("third", 100 * MB, lambda: True)  # stopped while waiting
+    scratch.close()
+
+
+def test_a_staged_run_moves_finished_files_and_removes_its_scratch(tmp_path, fake_tools, make_options):
+    fake_tools.setenv("YTGUI_FAKE_ITEMS", "4")
+    scratch = tmp_path / "scratch"
+    runner = YtDlpRunner(queue.Queue())
+    assert runner.run(make_options(workers=2, audio_only=True, scratch_dir=str(scratch))) == 0
+    folder = tmp_path / "out" / "Benchmark playlist PLtest"
+    assert len(list(folder.glob("*.mp3"))) == 4
+    assert os.listdir(scratch) == []
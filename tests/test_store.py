@@ -0,0 +1,57 @@
+import os
+import threading
+import time
+
+from yt_gui.store import ContentStore, content_key, place
+
+OPTIONS = {"audio_only": True, "audio_format": "mp3", "embed_metadata": True, "subs_langs": ""}
+
+
+def _file(path, data=b"audio"):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_content_key_depends_on_video_and_output_options():
+    key = content_key({"id": "abc", "ie_key": "Youtube"}, OPTIONS)
+    assert key == content_key({"id": "abc", "extractor_key": "Youtube"}, OPTIONS)
+    assert key != content_key({"id": "abd"}, OPTIONS)
+    assert key != content_key({"id": "abc"}, dict(OPTIONS, audio_format="opus"))
+    assert content_key({"title": "no id"}, OPTIONS) is None
+
+
+def test_add_then_materialize_into_another_folder(tmp_path):
+    store = ContentStore(str(tmp_path / "store"))
+    key = content_key({"id": "abc"}, OPTIONS)
+    store.add(key, _file(str(tmp_path / "001 - Song.mp3")), "Song.mp3", 4.0)
+
+    item = store.get(key)
+    assert item.name == "Song.mp3" and item.size == 5
+    dest = str(tmp_path / "other" / "007 - Song.mp3")
+    assert store.materialize(key, dest) in ("hardlink", "reflink", "copy")
+    with open(dest, "rb") as f:
+        assert f.read() == b"audio"
+
+
+def test_placing_over_an_existing_hardlink_leaves_no_temporary_file(tmp_path):
+    src = _file(str(tmp_path / "src"))
+    dest = str(tmp_path / "dest")
+    place(src, dest)
+    place(src, dest)
+    assert sorted(os.listdir(tmp_path)) == ["dest", "src"]
+
+
+def test_claim_waits_for_the_worker_producing_the_key(tmp_path):
+    store = ContentStore(str(tmp_path / "store"))
+    key = content_key({"id": "abc"}, OPTIONS)
+    assert store.claim(key, lambda: False) is None  # this caller produces it
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(store.claim(key, lambda: False)))
+    waiter.start()
+    time.sleep(0.2)
+    assert waiter.is_alive()
+    store.add(key, _file(str(tmp_path / "f.mp3")), "f.mp3", 1.0)
+    store.release(key)
+    waiter.join(5)
+    assert got and got[0] is not None and got[0].name == "f.mp3"
@@ -0,0 +1,73 @@
+import os
+
+from yt_gui.syncindex import FolderIndex, renumbered, unnumbered
+
+
+def _file(folder, name, size=10):
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return path
+
+
+def _entry(video_id, index):
+    return {"id": video_id, "playlist_index": index}
+
+
+def test_number_prefix_helpers():
+    assert unnumbered("005 - Song - Live.mp3") == "Song - Live.mp3"
+    assert unnumbered("Song.mp3") == "Song.mp3"
+    assert renumbered(os.path.join("a", "005 - Song.mp3"), 12) == os.path.join("a", "012 - Song.mp3")
+
+
+def test_plan_sorts_items_into_new_moved_unchanged_removed(tmp_path):
+    folder = str(tmp_path)
+    index = FolderIndex(folder)
+    index.record("a", _file(folder, "001 - A.mp3"), 1)
+    index.record("b", _file(folder, "002 - B.mp3"), 2)
+    index.record("c", _file(folder, "003 - C.mp3"), 3)
+
+    plan = index.plan([_entry("a", 1), _entry("c", 2), _entry("d", 3)])
+    assert [e["id"] for e in plan.new] == ["d"]
+    assert plan.moved == [("c", 2)]
+    assert plan.unchanged == 1
+    assert plan.removed == ["b"]
+
+
+def test_missing_or_truncated_file_is_downloaded_again(tmp_path):
+    folder = str(tmp_path)
+    index = FolderIndex(folder)
+    index.record("a", _file(folder, "001 - A.mp3"), 1)
+    index.record("b", _file(folder, "002 - B.mp3"), 2)
+    os.remove(os.path.join(folder, "001 - A.mp3"))
+    _file(folder, "002 - B.mp3", size=3)
+
+    plan = index.plan([_entry("a", 1), _entry("b", 2)])
+    assert [e["id"] for e in plan.new] == ["a", "b"]
+
+
+def test_apply_moves_swaps_positions_without_clobbering(tmp_path):
+    folder = str(tmp_path)
+    index = FolderIndex(folder)
+    index.record("a", _file(folder, "001 - A.mp3", 1), 1)
+    index.record("b", _file(folder, "002 - B.mp3", 2), 2)
+
+    plan = index.plan([_entry("b", 1), _entry("a", 2)])
+    assert index.apply_moves(plan.moved, lambda msg: None) == 2
+    assert os.path.getsize(os.path.join(folder, "001 - B.mp3")) == 2
+    assert os.path.getsize(os.path.join(folder, "002 - A.mp3")) == 1
+    assert index.plan([_entry("b", 1), _entry("a", 2)]).unchanged == 2
+
+
+def test_prune_deletes_files_and_index_survives_reload(tmp_path):
+    folder = str(tmp_path)
+    index = FolderIndex(folder)
+    index.record("a", _file(folder, "001 - A.mp3"), 1)
+    index.record("b", _file(folder, "002 - B.mp3"), 2)
+    assert index.prune(["b"], lambda msg: None) == 1
+    index.save()
+
+    assert not os.path.exists(os.path.join(folder, "002 - B.mp3"))
+    reloaded = FolderIndex(folder)
+    assert len(reloaded) == 1
+    assert reloaded.plan([_entry("a", 1)]).unchanged == 1
@@ -0,0 +1,90 @@
+from yt_gui.config import DownloadOptions
+from yt_gui.jobstore import DONE, FAILED, PENDING, READY
+from yt_gui.workqueue import WorkQueue, worker_options
+
+
+def _queues(tmp_path, n=2):
+    queues = [WorkQueue(str(tmp_path / "queue.sqlite3")) for _ in range(n)]
+    for i, q in enumerate(queues):
+        q.owner = f"node{i}:1"  # one process here; workers differ by owner
+    return queues
+
+
+def _publish(q, items=2, key="key"):
+    job = q.create(key, "https://x", {"url": "https://x"})
+    q.set_job(job, kind="playlist", folder="/music/P", state=READY)
+    q.add_entries(job, [(seq, {"id": f"v{seq}", "playlist_index": seq}) for seq in range(1, items + 1)])
+    return job
+
+
+def test_each_item_is_claimed_by_one_worker(tmp_path):
+    a, b = _queues(tmp_path)
+    _publish(a)
+    first, second = a.claim(), b.claim()
+    assert {first[1], second[1]} == {1, 2}
+    assert first[4] == "" and second[4] == ""  # nobody held them before
+    assert a.claim() is None and b.claim() is None
+
+
+def test_only_the_lease_holder_can_settle_an_item(tmp_path):
+    a, b = _queues(tmp_path)
+    job = _publish(a, items=1)
+    a.claim()
+    b.set_item(job, 1, DONE)
+    assert a.states(job)[0][2] == PENDING
+    a.set_item(job, 1, DONE)
+    assert a.states(job)[0][2] == DONE
+
+
+def test_an_expired_lease_is_taken_over_with_the_files_left_behind(tmp_path):
+    a, b = _queues(tmp_path)
+    job = _publish(a, items=1)
+    a.claim()
+    a.set_files(job, 1, ["/music/P/001 - v1.webm"])
+    assert b.claim() is None
+    with b._lock:
+        b._db.execute("UPDATE leases SET expires = 0")  # node0 stopped renewing
+    record, seq, entry, files, previous = b.claim()
+    assert (record.id, seq, entry["id"], files, previous) == (job, 1, "v1", ["/music/P/001 - v1.webm"], "node0:1")
+    a.set_item(job, 1, FAILED)  # the old holder is ignored now
+    b.set_item(job, 1, DONE)
+    assert a.states(job)[0][2] == DONE
+
+
+def test_drained_once_every_item_is_settled(tmp_path):
+    (q,) = _queues(tmp_path, 1)
+    assert not q.drained()  # nothing published yet
+    job = _publish(q)
+    assert q.open_items("key") == 2 and not q.drained()
+    for _ in range(2):
+        _, seq, _, _, _ = q.claim()
+        q.set_item(job, seq, DONE if seq == 1 else FAILED)
+    assert q.open_items("key") == 0 and q.drained()
+    assert q.counts() == (1, 0, {DONE: 1, FAILED: 1})
+
+
+def test_reopen_requeues_failed_items_and_waits_for_the_new_listing(tmp_path):
+    (q,) = _queues(tmp_path, 1)
+    job = _publish(q)
+    for _ in range(2):
+        _, seq, _, _, _ = q.claim()
+        q.set_item(job, seq, DONE if seq == 1 else FAILED)
+
+    assert q.reopen(job) == 1
+    assert not q.drained()  # being listed again
+    assert q.claim()[1] == 2
+    q.set_item(job, 2, DONE)
+    q.add_entries(job, [(3, {"id": "v3"})])
+    assert [seq for seq, _, _ in q.entries(job, (PENDING,))] == [3]
+
+
+def test_worker_options_keep_local_settings():
+    published = {"url": "https://x", "output_dir": "/music", "mode": "auto", "audio_only": True, "audio_format": "opus",
+                 "subtitles": False, "subs_langs": "", "embed_metadata": True, "download_archive": "/music/a.txt",
+                 "cookies_from_browser": "chrome", "workers": 16, "unknown_option": 1}
+    local = DownloadOptions(url="", output_dir="/elsewhere", mode="auto", audio_only=False, audio_format="mp3",
+                            subtitles=False, subs_langs="", embed_metadata=False, download_archive="",
+                            cookies_from_browser="", workers=3)
+    opt = worker_options(published, local)
+    assert (opt.output_dir, opt.audio_format, opt.download_archive) == ("/music", "opus", "/music/a.txt")
+    assert (opt.workers, opt.cookies_from_browser, opt.resume) == (3, "", False)
@@ -0,0 +1,53 @@
+import os
+import threading
+from typing import Set
+from .utils import safe_mkdir
+
+
+class DownloadArchive:
+    """
+    A yt-dlp download archive ("<extractor> <id>" per line), read once into a set.
+    Parallel workers record completions through add(), which serializes appends
+    so lines are never interleaved or lost.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._ids: Set[str] = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self._ids.add(line)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def entry_key(entry: dict) -> str | None:
+        video_id = entry.get("id")
+        if not video_id:
+            return None
+        ie_key = entry.get("ie_key") or entry.get("extractor_key") or "Youtube"
+        return f"{ie_key.lower()} {video_id}"
+
+    def __contains__(self, key: str | None) -> bool:
+        return key is not None and key in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, key: str | None) -> None:
+        if key is None:
+            return
+        with self._lock:
+            if key in self._ids:
+                return
+            safe_mkdir(os.path.dirname(self.path) or ".")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(key + "\n")
+            self._ids.add(key)
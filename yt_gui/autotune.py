@@ -0,0 +1,146 @@
+import os
+import threading
+from typing import Callable
+from .progress import ProgressTracker, format_bytes
+
+DEFAULT_TUNE_INTERVAL = 10.0  # seconds between decisions
+CPU_BUSY = 0.9  # 1-minute load per core above which we stop adding workers
+MIN_GAIN = 1.05  # a step up must improve throughput by at least 5% to be kept
+HOLD_STEPS = 3  # steps without increases after backing off
+
+
+def cpu_load() -> float | None:
+    """1-minute load average per core, or None where the OS doesn't report it (Windows)."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class ConcurrencyLimiter:
+    """A semaphore whose limit can be changed while workers are waiting on it."""
+
+    def __init__(self, limit: int) -> None:
+        self._cond = threading.Condition()
+        self._limit = max(1, limit)
+        self._running = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def set_limit(self, limit: int) -> None:
+        with self._cond:
+            self._limit = max(1, limit)
+            self._cond.notify_all()
+
+    def acquire(self, should_stop: Callable[[], bool]) -> bool:
+        with self._cond:
+            while self._running >= self._limit:
+                if should_stop():
+                    return False
+                self._cond.wait(0.5)
+            self._running += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+
+class AutoTuner:
+    """
+    Ramps the limiter between min_workers and max_workers from measured behaviour:
+    aggregate bytes/s, failures and throttling (HTTP 429) since the last step, and CPU load
+    from postprocessing. Every decision is logged.
+    """
+
+    def __init__(
+        self,
+        limiter: ConcurrencyLimiter,
+        tracker: ProgressTracker,
+        log: Callable[[str], None],
+        min_workers: int,
+        max_workers: int,
+        interval: float = DEFAULT_TUNE_INTERVAL,
+    ) -> None:
+        self.limiter = limiter
+        self.tracker = tracker
+        self._log = log
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.interval = interval
+        self._throttles = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_bytes = 0
+        self._last_failed = 0
+        self._rate_before_increase: float | None = None
+        self._hold = 0
+
+    def note_throttle(self) -> None:
+        with self._lock:
+            self._throttles += 1
+
+    def start(self) -> None:
+        snap = self.tracker.snapshot()
+        self._last_bytes = snap.downloaded_bytes
+        self._last_failed = snap.failed
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.step()
+
+    def step(self) -> None:
+        snap = self.tracker.snapshot()
+        rate = (snap.downloaded_bytes - self._last_bytes) / self.interval
+        failed = snap.failed - self._last_failed
+        self._last_bytes, self._last_failed = snap.downloaded_bytes, snap.failed
+        with self._lock:
+            throttles, self._throttles = self._throttles, 0
+        load = cpu_load()
+
+        current = self.limiter.limit
+        target = current
+        if throttles:
+            target, reason = current // 2, f"{throttles} throttled response(s)"
+        elif failed:
+            target, reason = current - 1, f"{failed} failed item(s)"
+        elif load is not None and load > CPU_BUSY:
+            target, reason = current - 1, f"CPU busy (load/core {load:.2f})"
+        elif self._rate_before_increase is not None and rate < self._rate_before_increase * MIN_GAIN:
+            target, reason = current - 1, "last increase did not raise throughput"
+        elif self._hold > 0:
+            reason = f"backing off ({self._hold} step(s) left)"
+        elif self.limiter.running >= current:
+            target, reason = current + 1, "all slots busy"
+        else:
+            reason = "idle slots available"
+
+        target = max(self.min_workers, min(self.max_workers, target))
+        if target < current:
+            self._hold = HOLD_STEPS
+        elif self._hold > 0:
+            self._hold -= 1
+        self._rate_before_increase = rate if target > current else None
+        if target != current:
+            self.limiter.set_limit(target)
+        action = "hold" if target == current else f"{current} -> {target}"
+        load_text = f"{load:.2f}" if load is not None else "n/a"
+        self._log(
+            f"Auto workers: {action} ({reason}; {format_bytes(rate)}/s, "
+            f"{failed} failed, {throttles} throttled, load/core {load_text})"
+        )
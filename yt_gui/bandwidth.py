@@ -0,0 +1,45 @@
+import threading
+from typing import Callable, Dict
+
+MB = 1024 * 1024
+
+
+class BandwidthBudget:
+    """
+    A job-wide download rate split evenly among the downloads that are running.
+    Shares are recomputed whenever a download starts or finishes, or the expected
+    concurrency changes. Downloads that registered a setter (in-process engine) are
+    re-limited on the fly; subprocesses get the share current when they start.
+    """
+
+    def __init__(self, total_bps: int) -> None:
+        self.total_bps = max(1, int(total_bps))
+        self._lock = threading.Lock()
+        self._active: Dict[object, Callable[[int], None] | None] = {}
+        self._slots = 1  # downloads expected to run at once (pool limit, fewer near the end)
+
+    def _share(self) -> int:
+        return max(1, self.total_bps // max(1, len(self._active), self._slots))
+
+    def _rebalance(self) -> None:
+        share = self._share()
+        for setter in self._active.values():
+            if setter is not None:
+                setter(share)
+
+    def set_slots(self, slots: int) -> None:
+        with self._lock:
+            if slots != self._slots:
+                self._slots = max(1, slots)
+                self._rebalance()
+
+    def acquire(self, key: object, setter: Callable[[int], None] | None = None) -> int:
+        with self._lock:
+            self._active[key] = setter
+            self._rebalance()
+            return self._share()
+
+    def release(self, key: object) -> None:
+        with self._lock:
+            self._active.pop(key, None)
+            self._rebalance()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Tuple
+from .utils import cache_dir, safe_mkdir
+
+DEFAULT_PROBE_TTL = 3600.0  # seconds
+
+
+class ProbeCache:
+    """
+    Flat-playlist probe results keyed by URL and cookie source.
+    Held in memory and mirrored to one JSON file per key on disk, both expiring after `ttl` seconds.
+    """
+
+    def __init__(self, directory: str = "", ttl: float = DEFAULT_PROBE_TTL) -> None:
+        self.directory = directory or os.path.join(cache_dir(), "probes")
+        self.ttl = ttl
+        self._mem: Dict[str, Tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str, cookies_from_browser: str) -> str:
+        return hashlib.sha1(f"{url}\n{cookies_from_browser}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, url: str, cookies_from_browser: str = "") -> dict | None:
+        key = self._key(url, cookies_from_browser)
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+        if hit and now - hit[0] < self.ttl:
+            return hit[1]
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        stored_at = float(data.get("stored_at", 0))
+        if now - stored_at >= self.ttl:
+            return None
+        info = data.get("info")
+        with self._lock:
+            self._mem[key] = (stored_at, info)
+        return info
+
+    def put(self, url: str, cookies_from_browser: str, info: dict) -> None:
+        key = self._key(url, cookies_from_browser)
+        now = time.time()
+        with self._lock:
+            self._mem[key] = (now, info)
+        try:
+            safe_mkdir(self.directory)
+            # A private temp file per writer: threads and other processes may store the same key at once
+            fd, tmp = tempfile.mkstemp(prefix=key + ".", suffix=".tmp", dir=self.directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"url": url, "stored_at": now, "info": info}, f)
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            pass  # the in-memory copy still saves the second probe
+
+    def invalidate(self, url: str, cookies_from_browser: str = "") -> None:
+        key = self._key(url, cookies_from_browser)
+        with self._lock:
+            self._mem.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List
 
 @dataclass
 class DownloadOptions:
@@ -13,3 +14,27 @@ class DownloadOptions:
     download_archive: str  # empty means none
     cookies_from_browser: str  # empty means none
     workers: int = 1  # 1 means sequential
+    auto_workers: bool = False  # tune concurrency during the run, starting at `workers`
+    min_workers: int = 1
+    max_workers: int = 16
+    rate_limit_mbps: float = 0.0  # total download rate for the whole job in MB/s, 0 = unlimited
+    connections: int = 0  # total connections for the job, split between parallel items and their fragments; 0 = one per item
+    transcode_workers: int = 0  # audio-only parallel runs: conversion pool size, 0 = CPU cores
+    sync: bool = False  # keep an index of the output folder: download only new items, renumber moved ones
+    prune: bool = False  # sync: delete files of items no longer in the playlist
+    dedupe: bool = False  # reuse items already fetched for another playlist (content store) instead of downloading
+    store_dir: str = ""  # dedupe: content store location, empty means <output_dir>/.yt_gui_store
+    metrics_file: str = ""  # parallel runs: append per-item timings here as JSON lines, empty means none
+    metrics_port: int = 0  # parallel runs: serve Prometheus-style metrics on 127.0.0.1:<port>, 0 = off
+    retries: int = 3  # parallel runs: times a failed item is requeued (fewer for kinds unlikely to recover)
+    retry_delay: float = 5.0  # seconds before the first retry; doubles with each attempt
+    only_ids: List[str] = field(default_factory=list)  # download only these video ids (re-running failed items)
+    resume: bool = True  # parallel runs: continue an unfinished earlier run of the same job instead of starting over
+    job_store: str = ""  # SQLite file recording jobs and item states, empty means the default in the state folder
+    lease_s: float = 60.0  # distributed workers: seconds a claimed item stays theirs without a heartbeat
+    scratch_dir: str = ""  # download and post-process on this local disk, then move finished files into output_dir
+    scratch_keep_free_mb: int = 512  # staging: new downloads wait rather than leave less free space than this
+    crawl: bool = False  # channel or playlist of playlists: list the nested playlists too, one folder each
+    crawl_workers: int = 4  # crawl: nested playlists listed at once
+    refresh_probe: bool = False  # ignore cached playlist info and enumerate again
+    engine: str = "subprocess"  # "subprocess" | "inprocess" (parallel playlist items only)
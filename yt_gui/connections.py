@@ -0,0 +1,51 @@
+import threading
+from typing import Callable, Dict, Tuple
+
+
+class ConnectionBudget:
+    """
+    A job-wide number of connections split between the downloads that run in parallel
+    and the fragments each of them fetches at once (yt-dlp --concurrent-fragments).
+    Every download gets an even share of the connections for the expected concurrency,
+    so when fewer items are left than workers (the end of a job, or a single long video)
+    each remaining one fetches more fragments. Downloads that registered a setter
+    (in-process engine) are re-balanced on the fly; a subprocess keeps the share current
+    when it starts, limited to the connections not held by others.
+    """
+
+    def __init__(self, total: int) -> None:
+        self.total = max(1, int(total))
+        self._lock = threading.Lock()
+        self._active: Dict[object, Tuple[int, Callable[[int], None] | None]] = {}  # key -> (held, setter)
+        self._slots = 1  # downloads expected to run at once (pool limit, fewer near the end)
+
+    def _share(self) -> int:
+        return max(1, self.total // max(1, len(self._active), self._slots))
+
+    def _rebalance(self) -> None:
+        share = self._share()
+        for key, (held, setter) in self._active.items():
+            if setter is not None and held != share:
+                setter(share)
+                self._active[key] = (share, setter)
+
+    def set_slots(self, slots: int) -> None:
+        with self._lock:
+            if slots != self._slots:
+                self._slots = max(1, slots)
+                self._rebalance()
+
+    def acquire(self, key: object, setter: Callable[[int], None] | None = None) -> int:
+        """Registers a download and returns how many fragments it may fetch at once."""
+        with self._lock:
+            self._active[key] = (0, setter)
+            self._rebalance()
+            if setter is None:
+                free = self.total - sum(held for held, _ in self._active.values())
+                self._active[key] = (max(1, min(self._share(), free)), None)
+            return self._active[key][0]
+
+    def release(self, key: object) -> None:
+        with self._lock:
+            self._active.pop(key, None)
+            self._rebalance()
@@ -0,0 +1,140 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+try:
+    import yt_dlp
+    from yt_dlp.cookies import extract_cookies_from_browser
+except ImportError:  # optional; export falls back to running yt-dlp once
+    yt_dlp = None
+
+
+class CookieJarExport:
+    """
+    Browser cookies exported once per job into a private (0600) Netscape cookie file.
+    yt-dlp rewrites its --cookies file when it exits, so concurrent processes each get
+    their own copy per worker thread instead of sharing one file.
+    """
+
+    def __init__(self, path: str, parent: "CookieJarExport | None" = None) -> None:
+        self.path = path
+        self._copies: List[str] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._parent = parent  # set on a run's view of a cached jar (see for_run)
+        self._runs = 0
+        self._retired = False
+
+    @classmethod
+    def export(cls, browser: str, url: str, log: Callable[[str], None]) -> "CookieJarExport | None":
+        fd, path = tempfile.mkstemp(prefix="yt_gui_cookies_", suffix=".txt")
+        os.close(fd)
+        log(f"Exporting cookies from {browser} once for this job...")
+        try:
+            if yt_dlp is not None:
+                spec = yt_dlp.parse_options(["--cookies-from-browser", browser]).ydl_opts["cookiesfrombrowser"]
+                name, profile, keyring, container = spec
+                jar = extract_cookies_from_browser(name, profile, keyring=keyring, container=container)
+                jar.save(path)
+            else:
+                # yt-dlp saves the cookies it loaded into the --cookies file on exit
+                cmd = ["yt-dlp", "--cookies-from-browser", browser, "--cookies", path,
+                       "--flat-playlist", "--skip-download", "--playlist-items", "1", "--quiet", "--no-warnings", url]
+                subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+        except Exception as e:
+            detail = e.stderr.strip() if isinstance(e, subprocess.CalledProcessError) and e.stderr else str(e)
+            log(f"Cookie export failed; each process will read the browser instead. ({detail})")
+            _remove(path)
+            return None
+        return cls(path)
+
+    def for_worker(self) -> str:
+        """Path of this thread's private copy of the jar."""
+        path = getattr(self._local, "path", None)
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="yt_gui_cookies_", suffix=".txt")
+            os.close(fd)
+            shutil.copyfile(self.path, path)
+            self._local.path = path
+            with self._lock:
+                self._copies.append(path)
+        return path
+
+    def for_run(self) -> "CookieJarExport":
+        """
+        A view of this jar for one run: it reads the same exported file, but its worker copies
+        are its own and its cleanup() removes only those.
+        """
+        with self._lock:
+            self._runs += 1
+        return CookieJarExport(self.path, parent=self)
+
+    def retire(self) -> None:
+        """Removes the jar once the last run using it has cleaned up."""
+        with self._lock:
+            self._retired = True
+            idle = self._runs == 0
+        if idle:
+            self.cleanup()
+
+    def _run_ended(self) -> None:
+        with self._lock:
+            self._runs -= 1
+            idle = self._retired and self._runs == 0
+        if idle:
+            self.cleanup()
+
+    def cleanup(self) -> None:
+        with self._lock:
+            paths, self._copies = ([] if self._parent is not None else [self.path]) + self._copies, []
+        for p in paths:
+            _remove(p)
+        if self._parent is not None:
+            parent, self._parent = self._parent, None
+            parent._run_ended()
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class CookieJarCache:
+    """
+    Exported jars kept per browser across jobs (long-running service), re-exported after `ttl`
+    seconds so rotated cookies are picked up. Each job gets its own view of a jar (for_run), to
+    clean up when it ends; a replaced jar is removed once no job uses it, the others by cleanup().
+    """
+
+    def __init__(self, ttl: float = 3600.0) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._jars: Dict[str, Tuple[float, CookieJarExport | None]] = {}
+
+    def get(self, browser: str, url: str, log: Callable[[str], None]) -> CookieJarExport | None:
+        """A view of the browser's jar for one job; the caller must call its cleanup() when done."""
+        with self._lock:
+            hit = self._jars.get(browser)
+            if hit is not None and time.monotonic() - hit[0] < self.ttl:
+                if hit[1] is not None:
+                    log(f"Using the cookies exported from {browser} earlier.")
+                    return hit[1].for_run()
+                return None
+            if hit is not None and hit[1] is not None:
+                hit[1].retire()
+            jar = CookieJarExport.export(browser, url, log)
+            self._jars[browser] = (time.monotonic(), jar)
+            return jar.for_run() if jar is not None else None
+
+    def cleanup(self) -> None:
+        with self._lock:
+            jars = [jar for _, jar in self._jars.values() if jar is not None]
+            self._jars = {}
+        for jar in jars:
+            jar.retire()
@@ -0,0 +1,153 @@
+import threading
+from typing import Callable, Dict, List, Tuple
+from .progress import PROGRESS_MARKER, progress_from_hook
+
+try:
+    import yt_dlp
+    from yt_dlp.utils import DownloadCancelled, DownloadError
+except ImportError:  # optional; the runner falls back to one yt-dlp process per item
+    yt_dlp = None
+
+
+def inprocess_available() -> bool:
+    return yt_dlp is not None
+
+
+class _LogAdapter:
+    """Routes YoutubeDL output into the runner's log, like the subprocess stdout reader does."""
+
+    def __init__(self, log: Callable[[str], None]) -> None:
+        self._log = log
+
+    def debug(self, msg: str) -> None:
+        # yt-dlp sends regular screen output through debug() too; only drop verbose lines
+        # and progress-template output, which the engine's hooks report as events instead
+        if not msg.startswith(("[debug] ", PROGRESS_MARKER)):
+            self._log(msg)
+
+    def info(self, msg: str) -> None:
+        self._log(msg)
+
+    def warning(self, msg: str) -> None:
+        self._log(f"WARNING: {msg}")
+
+    def error(self, msg: str) -> None:
+        self._log(msg)
+
+
+class InProcessEngine:
+    """
+    Drives yt_dlp.YoutubeDL inside this process.
+    Each worker thread keeps one configured instance per set of base flags, so
+    extractors, cookies and config are only set up once per worker.
+    Flags are the same command-line arguments the subprocess path builds.
+    """
+
+    def __init__(
+        self,
+        log: Callable[[str], None],
+        should_stop: Callable[[], bool],
+        on_progress: Callable[[int | None, dict], None] | None = None,
+    ) -> None:
+        if yt_dlp is None:
+            raise RuntimeError("yt_dlp module not importable. Install with: python -m pip install -U yt-dlp")
+        self._log = log
+        self._should_stop = should_stop
+        self._on_progress = on_progress
+        self._local = threading.local()
+        self._instances: List["yt_dlp.YoutubeDL"] = []
+        self._instances_lock = threading.Lock()
+
+    def _check_stop(self) -> None:
+        if self._should_stop():
+            raise DownloadCancelled("Stop requested")
+
+    def _download_hook(self, d: dict) -> None:
+        self._check_stop()
+        if self._on_progress is not None:
+            self._on_progress(getattr(self._local, "index", None), progress_from_hook("download", d))
+
+    def _postprocess_hook(self, d: dict) -> None:
+        self._check_stop()
+        if self._on_progress is not None:
+            self._on_progress(getattr(self._local, "index", None), progress_from_hook("postprocess", d))
+
+    def _get_ydl(self, base: List[str]) -> "yt_dlp.YoutubeDL":
+        instances: Dict[Tuple[str, ...], yt_dlp.YoutubeDL] | None = getattr(self._local, "instances", None)
+        if instances is None:
+            instances = self._local.instances = {}
+        key = tuple(base)
+        ydl = instances.get(key)
+        if ydl is None:
+            params = yt_dlp.parse_options(list(base)).ydl_opts
+            params["logger"] = _LogAdapter(self._log)
+            params["progress_hooks"] = [self._download_hook]
+            params["postprocessor_hooks"] = [self._postprocess_hook]
+            ydl = yt_dlp.YoutubeDL(params)
+            instances[key] = ydl
+            with self._instances_lock:
+                self._instances.append(ydl)
+        return ydl
+
+    def current_index(self) -> int | None:
+        """Index of the item the calling worker thread is running."""
+        return getattr(self._local, "index", None)
+
+    def rate_setter(self, base: List[str]) -> Callable[[int], None]:
+        """Changes the rate limit of this thread's instance; yt-dlp reads it on every chunk."""
+        ydl = self._get_ydl(base)
+
+        def set_rate(bps: int) -> None:
+            ydl.params["ratelimit"] = bps
+
+        return set_rate
+
+    def fragments_setter(self, base: List[str]) -> Callable[[int], None]:
+        """Changes how many fragments this thread's instance fetches at once; read as each format starts downloading."""
+        ydl = self._get_ydl(base)
+
+        def set_fragments(n: int) -> None:
+            ydl.params["concurrent_fragment_downloads"] = n
+
+        return set_fragments
+
+    def run(self, base: List[str], item: List[str], index: int | None = None) -> int:
+        """
+        base: shared flags (without the leading "yt-dlp"), reused across items.
+        item: per-item flags: -o, --no-playlist, --print-to-file, --load-info-json and the URL.
+        index: playlist index reported with this item's progress events.
+        Returns a yt-dlp style exit code.
+        """
+        if self._should_stop():
+            return 1
+        self._local.index = index
+        ydl = self._get_ydl(base)
+        parsed = yt_dlp.parse_options(list(base) + list(item))
+        ydl.params["outtmpl"].update(parsed.ydl_opts["outtmpl"])
+        ydl.params["noplaylist"] = parsed.ydl_opts.get("noplaylist")
+        # --print-to-file after_move:... is how the runner learns an item's final path (sync, dedupe, staging)
+        ydl.params["print_to_file"] = parsed.ydl_opts.get("print_to_file") or {}
+        # The exit code is sticky on a YoutubeDL instance; reset it per item
+        ydl._download_retcode = 0
+        try:
+            if parsed.options.load_info_filename:
+                return ydl.download_with_info_file(parsed.options.load_info_filename)
+            return ydl.download(parsed.urls)
+        except DownloadCancelled:
+            self._log("Download cancelled.")
+            return 1
+        except DownloadError:
+            # Already reported through the logger
+            return 1
+        except Exception as e:
+            self._log(f"ERROR: {e}")
+            return 1
+
+    def close(self) -> None:
+        with self._instances_lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception:
+                pass
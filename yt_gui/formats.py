@@ -0,0 +1,36 @@
+from typing import Dict
+
+# For each --audio-format, source streams ffmpeg can copy into the target container
+# instead of re-encoding (mirrors yt-dlp's FFmpegExtractAudio copy rules)
+_COPYABLE_SOURCES: Dict[str, str] = {
+    "m4a": "bestaudio[acodec^=mp4a]",
+    "aac": "bestaudio[acodec^=mp4a]",
+    "opus": "bestaudio[acodec=opus]",
+    "mp3": "bestaudio[acodec=mp3]",
+    "vorbis": "bestaudio[acodec=vorbis]",
+    "flac": "bestaudio[acodec=flac]",
+    "alac": "bestaudio[acodec=alac]",
+}
+
+
+def audio_format_selector(audio_format: str) -> str:
+    """yt-dlp -f selector preferring a stream that can be remuxed into audio_format."""
+    preferred = _COPYABLE_SOURCES.get(audio_format)
+    return f"{preferred}/bestaudio/best" if preferred else "bestaudio/best"
+
+
+def normalize_acodec(acodec: str | None) -> str:
+    codec = (acodec or "").lower()
+    if codec.startswith("mp4a"):
+        return "aac"
+    return codec.split(".")[0]
+
+
+def audio_action(acodec: str | None, audio_format: str) -> str:
+    """"remux" if yt-dlp will copy the source codec into audio_format, else "transcode"."""
+    codec = normalize_acodec(acodec)
+    if audio_format == "best":
+        return "remux"
+    if codec == "aac" and audio_format in ("m4a", "aac"):
+        return "remux"
+    return "remux" if codec and codec == audio_format else "transcode"
@@ -1,27 +1,63 @@
-import re
+import argparse
+import json
+import os
 import queue
+import re
+import sqlite3
 import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
+from typing import Dict, List, TextIO
 from .config import DownloadOptions
+from .jobstore import JobStore
+from .logview import DEFAULT_MAX_LOG_LINES, LatencyStats, LogBatch, drain, flood_lines
 from .runner import YtDlpRunner
+from .service import RemoteRunner
 from .utils import expand_path
 
+_TAG_RE = re.compile(r"^\[(\d+)\] ")
+
 
 class App(tk.Tk):
-    def __init__(self) -> None:
+    def __init__(self, max_log_lines: int = DEFAULT_MAX_LOG_LINES, log_file: str = "", server: str = "", token: str = "") -> None:
         super().__init__()
         self.title("YouTube Downloader (yt-dlp)")
         self.geometry("900x650")
 
         self.log_queue: queue.Queue[str] = queue.Queue()
-        self.runner = YtDlpRunner(self.log_queue)
+        # With a server the downloads run in the download service (main_service.py) and this window only follows them
+        self.runner = RemoteRunner(self.log_queue, server, token) if server else YtDlpRunner(self.log_queue)
 
         self.worker_thread: threading.Thread | None = None
 
+        # The log widget keeps only the most recent lines; the optional file gets everything
+        self.max_log_lines = max(1, max_log_lines)
+        self._log_file: TextIO | None = open(expand_path(log_file), "a", encoding="utf-8") if log_file else None
+        self._progress_marks: Dict[str, str] = {}  # item key -> mark at the start of its progress line
+        self._mark_seq = 0
+        self.latency: LatencyStats | None = None
+
         self._build_ui()
+        if server:
+            self._append_log(f"Downloads run on the service at {self.runner.server}.")
+        else:
+            self._note_unfinished_jobs()
         self._poll_log_queue()
 
+    def _note_unfinished_jobs(self) -> None:
+        try:
+            store = JobStore()
+            try:
+                records = store.unfinished()
+            finally:
+                store.close()
+        except (OSError, sqlite3.Error):
+            return
+        for r in records:
+            self._append_log(f"Unfinished download: {r.url} ({r.pending} item(s) left). "
+                             "Start it again with the same settings to resume.")
+
     def _build_ui(self) -> None:
         pad = {"padx": 10, "pady": 6}
 
@@ -47,6 +83,10 @@ class App(tk.Tk):
         ttk.Label(mode_frame, text="Workers:").pack(side="left", padx=(20, 5))
         self.workers_var = tk.IntVar(value=1)
         ttk.Spinbox(mode_frame, from_=1, to=32, textvariable=self.workers_var, width=5).pack(side="left")
+        self.inprocess_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(mode_frame, text="In-process engine", variable=self.inprocess_var).pack(side="left", padx=(10, 0))
+        self.refresh_probe_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(mode_frame, text="Refresh playlist info", variable=self.refresh_probe_var).pack(side="left", padx=(10, 0))
 
         # Output directory
         ttk.Label(frm, text="Output folder:").grid(row=2, column=0, sticky="w")
@@ -106,6 +146,52 @@ class App(tk.Tk):
             row=7, column=0, columnspan=4, sticky="w"
         )
 
+        # Adaptive workers
+        self.auto_workers_var = tk.BooleanVar(value=False)
+        self.min_workers_var = tk.IntVar(value=1)
+        self.max_workers_var = tk.IntVar(value=16)
+        auto_frame = ttk.Frame(frm)
+        auto_frame.grid(row=8, column=0, columnspan=4, sticky="w")
+        ttk.Checkbutton(auto_frame, text="Auto-tune workers", variable=self.auto_workers_var).pack(side="left")
+        ttk.Label(auto_frame, text="Min:").pack(side="left", padx=(12, 6))
+        ttk.Spinbox(auto_frame, from_=1, to=32, textvariable=self.min_workers_var, width=5).pack(side="left")
+        ttk.Label(auto_frame, text="Max:").pack(side="left", padx=(12, 6))
+        ttk.Spinbox(auto_frame, from_=1, to=32, textvariable=self.max_workers_var, width=5).pack(side="left")
+
+        # Bandwidth budget for the whole job
+        self.rate_limit_var = tk.DoubleVar(value=0.0)
+        ttk.Label(auto_frame, text="Max MB/s (0 = unlimited):").pack(side="left", padx=(24, 6))
+        ttk.Spinbox(auto_frame, from_=0, to=1000, increment=0.5, textvariable=self.rate_limit_var, width=6).pack(side="left")
+
+        # Connections for the whole job, split between items and their fragments
+        self.connections_var = tk.IntVar(value=0)
+        ttk.Label(auto_frame, text="Connections (0 = one per item):").pack(side="left", padx=(24, 6))
+        ttk.Spinbox(auto_frame, from_=0, to=128, textvariable=self.connections_var, width=5).pack(side="left")
+
+        # Folder sync
+        self.sync_var = tk.BooleanVar(value=False)
+        self.prune_var = tk.BooleanVar(value=False)
+        sync_frame = ttk.Frame(frm)
+        sync_frame.grid(row=9, column=0, columnspan=4, sticky="w")
+        ttk.Checkbutton(sync_frame, text="Sync folder (only new items, renumber moved ones)", variable=self.sync_var,
+                        command=self._sync_prune_state).pack(side="left")
+        self.prune_check = ttk.Checkbutton(sync_frame, text="Delete items removed from the playlist", variable=self.prune_var)
+        self.prune_check.pack(side="left", padx=(12, 0))
+        self.dedupe_var = tk.BooleanVar(value=False)
+        self.crawl_var = tk.BooleanVar(value=False)
+        reuse_frame = ttk.Frame(frm)
+        reuse_frame.grid(row=10, column=0, columnspan=4, sticky="w")
+        ttk.Checkbutton(reuse_frame, text="Reuse items already downloaded for other playlists (hardlink/copy)",
+                        variable=self.dedupe_var).pack(side="left")
+        ttk.Checkbutton(reuse_frame, text="Crawl channel / playlist of playlists (one folder each)",
+                        variable=self.crawl_var).pack(side="left", padx=(12, 0))
+
+        # Staging on a fast local disk
+        ttk.Label(frm, text="Scratch folder (optional):").grid(row=11, column=0, sticky="w")
+        self.scratch_var = tk.StringVar(value="")
+        ttk.Entry(frm, textvariable=self.scratch_var, width=60).grid(row=11, column=1, sticky="we")
+        ttk.Button(frm, text="Browse…", command=self._browse_scratch).grid(row=11, column=2, sticky="w")
+
         # Buttons
         btn_frame = ttk.Frame(self)
         btn_frame.pack(fill="x", **pad)
@@ -135,12 +221,18 @@ class App(tk.Tk):
         frm.columnconfigure(1, weight=1)
         self._sync_audio_state()
         self._sync_subs_state()
+        self._sync_prune_state()
 
     def _browse_output(self) -> None:
         folder = filedialog.askdirectory(initialdir=expand_path(self.out_var.get() or "~/Downloads"))
         if folder:
             self.out_var.set(folder)
 
+    def _browse_scratch(self) -> None:
+        folder = filedialog.askdirectory(initialdir=expand_path(self.scratch_var.get() or "/tmp"))
+        if folder:
+            self.scratch_var.set(folder)
+
     def _browse_archive(self) -> None:
         file_path = filedialog.asksaveasfilename(
             initialdir=expand_path(self.out_var.get() or "~/Downloads"),
@@ -158,11 +250,66 @@ class App(tk.Tk):
     def _sync_subs_state(self) -> None:
         self.subs_lang_entry.configure(state=("normal" if self.subs_var.get() else "disabled"))
 
+    def _sync_prune_state(self) -> None:
+        self.prune_check.configure(state=("normal" if self.sync_var.get() else "disabled"))
+
     def _append_log(self, msg: str) -> None:
+        if self._log_file is not None:
+            self._log_file.write(msg + "\n")
         self.log_text.insert("end", msg + "\n")
+        self._trim_log()
+        self.log_text.see("end")
+
+    def _render_batch(self, batch: LogBatch) -> None:
+        if self._log_file is not None:
+            self._log_file.write("\n".join(batch.raw) + "\n")
+            self._log_file.flush()
+        lines: List[str] = []  # regular lines not inserted yet, so runs of them go in at once
+        for key, line in batch.entries:
+            if key is None:
+                # A regular line from an item ends coalescing into that item's current progress line
+                m = _TAG_RE.match(line)
+                self._release_progress_mark(m.group(0).strip() if m else "")
+                lines.append(line)
+                continue
+            if lines:
+                self.log_text.insert("end", "\n".join(lines) + "\n")
+                lines = []
+            mark = self._progress_marks.get(key)
+            if mark is None:
+                self._mark_seq += 1
+                mark = f"progress{self._mark_seq}"
+                self.log_text.mark_set(mark, "end-1c")
+                self.log_text.mark_gravity(mark, "left")
+                self.log_text.insert("end", line + "\n")
+                self._progress_marks[key] = mark
+            else:
+                self.log_text.delete(mark, f"{mark} lineend")
+                self.log_text.insert(mark, line)
+        if lines:
+            self.log_text.insert("end", "\n".join(lines) + "\n")
+        self._trim_log()
         self.log_text.see("end")
 
+    def _release_progress_mark(self, key: str) -> None:
+        mark = self._progress_marks.pop(key, None)
+        if mark is not None:
+            self.log_text.mark_unset(mark)
+
+    def _trim_log(self) -> None:
+        lines = int(self.log_text.index("end-1c").split(".")[0]) - 1
+        excess = lines - self.max_log_lines
+        if excess <= 0:
+            return
+        cut = f"{excess + 1}.0"
+        for key, mark in list(self._progress_marks.items()):
+            if self.log_text.compare(mark, "<", cut):
+                self._release_progress_mark(key)
+        self.log_text.delete("1.0", cut)
+
     def _clear_log(self) -> None:
+        for key in list(self._progress_marks):
+            self._release_progress_mark(key)
         self.log_text.delete("1.0", "end")
 
     def _set_running(self, running: bool) -> None:
@@ -192,6 +339,18 @@ class App(tk.Tk):
             download_archive=self.archive_var.get(),
             cookies_from_browser=self.cookies_var.get(),
             workers=self.workers_var.get(),
+            auto_workers=bool(self.auto_workers_var.get()),
+            min_workers=self.min_workers_var.get(),
+            max_workers=self.max_workers_var.get(),
+            rate_limit_mbps=max(0.0, self.rate_limit_var.get()),
+            connections=max(0, self.connections_var.get()),
+            sync=bool(self.sync_var.get()),
+            prune=bool(self.sync_var.get() and self.prune_var.get()),
+            dedupe=bool(self.dedupe_var.get()),
+            crawl=bool(self.crawl_var.get()),
+            scratch_dir=self.scratch_var.get(),
+            refresh_probe=bool(self.refresh_probe_var.get()),
+            engine=("inprocess" if self.inprocess_var.get() else "subprocess"),
         )
         return opt
 
@@ -223,27 +382,64 @@ class App(tk.Tk):
         self.runner.stop()
 
     def _poll_log_queue(self) -> None:
-        try:
-            while True:
-                msg = self.log_queue.get_nowait()
-                if msg == "__GUI_DONE__":
-                    self._set_running(False)
-                else:
-                    self._append_log(msg)
-                    # Attempt to parse progress "Downloading video X of Y"
-                    # Pattern matches: "[download] Downloading video 1 of 5" or "... item 1 of 5"
-                    match = re.search(r'Downloading (?:video|item) (\d+) of (\d+)', msg)
-                    if match:
-                        current = match.group(1)
-                        total = match.group(2)
-                        self.progress_var.set(f"Progress: {current} / {total} songs downloaded")
-        except queue.Empty:
-            pass
+        started = time.perf_counter()
+        # One insert per tick for everything pending, with progress lines coalesced per item
+        batch = drain(self.log_queue, "__GUI_DONE__")
+        if batch.raw:
+            self._render_batch(batch)
+        if batch.done:
+            self._set_running(False)
+        if self.worker_thread is not None:
+            # Totals come from the runner's structured progress events, not from log text
+            self.progress_var.set(self.runner.tracker.snapshot().summary())
+        if self.latency is not None:
+            self.update_idletasks()
+            self.latency.record(time.perf_counter() - started, len(batch.raw), self.log_queue.qsize())
         self.after(120, self._poll_log_queue)
 
+    def run_flood(self, count: int, workers: int = 16) -> None:
+        """Pushes `count` synthetic log lines and prints per-tick render latency once they are drained."""
+        self.latency = LatencyStats()
+        lines: List[str] = flood_lines(count, workers)
+
+        def producer() -> None:
+            for line in lines:
+                self.log_queue.put(line)
+
+        threading.Thread(target=producer, daemon=True).start()
+
+        def check_done() -> None:
+            assert self.latency is not None
+            if self.latency.lines >= count:
+                print(json.dumps(self.latency.summary()))
+                self.destroy()
+            else:
+                self.after(200, check_done)
+
+        self.after(200, check_done)
+
+    def destroy(self) -> None:
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        super().destroy()
+
+
+def main_gui(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="YouTube downloader GUI (yt-dlp).")
+    parser.add_argument("--max-log-lines", type=int, default=DEFAULT_MAX_LOG_LINES,
+                        help=f"Lines kept in the log view (default: {DEFAULT_MAX_LOG_LINES})")
+    parser.add_argument("--log-file", default="", help="Also append the full log to this file")
+    parser.add_argument("--server", default="", metavar="HOST:PORT",
+                        help="Run downloads on a download service (main_service.py) instead of in this window")
+    parser.add_argument("--token", default=os.environ.get("YT_GUI_TOKEN", ""), help="Token for --server")
+    parser.add_argument("--flood", type=int, default=0, metavar="N",
+                        help="Measure log rendering latency with N synthetic lines, then exit")
+    args = parser.parse_args(argv)
 
-def main_gui() -> int:
     # On Windows, make sure the GUI doesn't open a console if you run pythonw.exe
-    app = App()
+    app = App(max_log_lines=args.max_log_lines, log_file=args.log_file, server=args.server, token=args.token)
+    if args.flood:
+        app.run_flood(args.flood)
     app.mainloop()
     return 0
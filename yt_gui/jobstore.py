@@ -0,0 +1,264 @@
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
+from .utils import safe_mkdir, state_dir
+
+JOBS_DB_NAME = "jobs.sqlite3"
+# A job whose owner has not renewed its heartbeat for this long belongs to a dead run
+OWNER_STALE = 60.0
+
+# Item states
+PENDING = "pending"
+RUNNING = "running"  # a worker had it; after a crash its files may be partial
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"  # in the download archive or filtered out
+
+# Job states
+ENUMERATING = "enumerating"  # entries are still being recorded
+READY = "ready"  # the whole listing is recorded
+FINISHED = "finished"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT '',
+    folder TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    owner TEXT NOT NULL DEFAULT '',
+    heartbeat REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, state);
+CREATE TABLE IF NOT EXISTS items (
+    job_id INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    video_id TEXT NOT NULL DEFAULT '',
+    entry TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    files TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+# Lines where yt-dlp names a file it is about to write
+_FILE_RE = re.compile(r'^\[\w+\] (?:Destination: |Merging formats into "|Writing video (?:subtitles|thumbnail).* to: )(.+?)"?$')
+
+
+def written_file(line: str) -> str | None:
+    """The path in a yt-dlp output line announcing a file it writes, if it is one."""
+    m = _FILE_RE.match(line)
+    return m.group(1) if m else None
+
+
+def _owner_alive(owner: str, heartbeat: float) -> bool:
+    """Whether the run named host:pid[:instance] still works on a job: a fresh heartbeat, and a live process on this host."""
+    if not owner or time.time() - heartbeat >= OWNER_STALE:
+        return False
+    parts = owner.split(":")
+    if parts[0] != socket.gethostname() or len(parts) < 2:
+        return True
+    try:
+        os.kill(int(parts[1]), 0)
+    except ProcessLookupError:
+        return False
+    except (ValueError, OSError):
+        pass
+    return True
+
+
+def remove_files(paths: Iterable[str]) -> int:
+    """Deletes the files that exist; returns how many."""
+    removed = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+@dataclass
+class JobRecord:
+    id: int
+    url: str
+    options: dict  # asdict(DownloadOptions) of the run that created it
+    kind: str
+    folder: str
+    state: str
+    pending: int = 0  # items not done yet (pending, running or failed)
+
+
+class JobStore:
+    """
+    Durable record of parallel runs in SQLite: each job (URL plus output settings), its
+    enumerated entries and every item's state, so an interrupted run picks up where it stopped
+    instead of enumerating and downloading again. Thread-safe; one connection shared by the
+    workers, writes are small and committed immediately (WAL journal).
+    """
+
+    journal_mode = "WAL"
+    shared = False  # other processes or hosts work on the same jobs (see workqueue.WorkQueue)
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path or os.path.join(state_dir(), JOBS_DB_NAME)
+        safe_mkdir(os.path.dirname(self.path) or ".")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._db.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, decl in (("owner", "TEXT NOT NULL DEFAULT ''"), ("heartbeat", "REAL NOT NULL DEFAULT 0")):
+            if column not in columns:  # stores written before jobs had owners
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {decl}")
+        # Unique per store: two runs in one process (the service) must not pass for each other
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._beat: threading.Thread | None = None
+        self._beat_stop = threading.Event()
+
+    def close(self) -> None:
+        self._beat_stop.set()
+        if self._beat is not None:
+            self._beat.join()
+        with self._lock:
+            try:
+                self._db.execute("UPDATE jobs SET owner = '' WHERE owner = ?", (self.owner,))
+            except sqlite3.Error:
+                pass
+            self._db.close()
+
+    def _keep_alive(self) -> None:
+        while not self._beat_stop.wait(OWNER_STALE / 4):
+            try:
+                with self._lock:
+                    self._db.execute("UPDATE jobs SET heartbeat = ? WHERE owner = ?", (time.time(), self.owner))
+            except sqlite3.Error:
+                pass  # busy: try again next beat
+
+    def _start_beat(self) -> None:
+        if self._beat is None:
+            self._beat = threading.Thread(target=self._keep_alive, daemon=True, name="job-heartbeat")
+            self._beat.start()
+
+    def holder(self, key: str) -> str:
+        """Another live run owning an unfinished job with `key`, or ""."""
+        with self._lock:
+            rows = self._db.execute("SELECT owner, heartbeat FROM jobs WHERE key = ? AND state != ? AND owner NOT IN ('', ?)",
+                                    (key, FINISHED, self.owner)).fetchall()
+        return next((owner for owner, heartbeat in rows if _owner_alive(owner, heartbeat)), "")
+
+    def own(self, job_id: int) -> str:
+        """Takes the job over unless another live run owns it; returns that run, or "" once it is ours."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                owner, heartbeat = self._db.execute("SELECT owner, heartbeat FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if owner != self.owner and _owner_alive(owner, heartbeat):
+                    self._db.execute("COMMIT")
+                    return owner
+                self._db.execute("UPDATE jobs SET owner = ?, heartbeat = ? WHERE id = ?", (self.owner, time.time(), job_id))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        self._start_beat()
+        return ""
+
+    def _record(self, row: tuple) -> JobRecord:
+        job_id, url, options, kind, folder, state = row
+        pending = self._db.execute(
+            "SELECT COUNT(*) FROM items WHERE job_id = ? AND state IN (?, ?, ?)", (job_id, PENDING, RUNNING, FAILED)
+        ).fetchone()[0]
+        return JobRecord(job_id, url, json.loads(options), kind, folder, state, pending)
+
+    def unfinished(self, key: str | None = None) -> List[JobRecord]:
+        """Jobs a previous run did not finish, oldest first; only those with `key` if given."""
+        query = "SELECT id, url, options, kind, folder, state FROM jobs WHERE state != ?"
+        args: tuple = (FINISHED,)
+        if key is not None:
+            query += " AND key = ?"
+            args += (key,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id", args).fetchall()
+            return [self._record(row) for row in rows]
+
+    def create(self, key: str, url: str, options: dict) -> int:
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO jobs (key, url, options, state, created, updated, owner, heartbeat) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, json.dumps(options), ENUMERATING, now, now, self.owner, now),
+            )
+        self._start_beat()
+        return int(cur.lastrowid)
+
+    def set_job(self, job_id: int, **fields: str) -> None:
+        """Updates kind, folder and/or state."""
+        names = [name for name in ("kind", "folder", "state") if name in fields]
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET {', '.join(f'{n} = ?' for n in names)}, updated = ? WHERE id = ?",
+                [fields[n] for n in names] + [time.time(), job_id],
+            )
+
+    def finish(self, key: str, keep: int | None = None) -> None:
+        """Closes every unfinished job with `key` except `keep`, dropping their item rows."""
+        with self._lock:
+            rows = self._db.execute("SELECT id FROM jobs WHERE key = ? AND state != ?", (key, FINISHED)).fetchall()
+            for (job_id,) in rows:
+                if job_id == keep:
+                    continue
+                self._db.execute("DELETE FROM items WHERE job_id = ?", (job_id,))
+                self._db.execute("UPDATE jobs SET state = ?, updated = ? WHERE id = ?", (FINISHED, time.time(), job_id))
+
+    def add_entries(self, job_id: int, entries: List[Tuple[int, dict]]) -> None:
+        """Records enumerated entries as (seq, entry); already recorded ones are left alone."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO items (job_id, seq, video_id, entry, state) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, seq, entry.get("id") or "", json.dumps(entry), PENDING) for seq, entry in entries],
+            )
+            self._db.execute("COMMIT")
+
+    def entries(self, job_id: int, states: Tuple[str, ...]) -> List[Tuple[int, dict, List[str]]]:
+        """(seq, entry, files written so far) of the job's items in the given states, in order."""
+        marks = ", ".join("?" * len(states))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT seq, entry, files FROM items WHERE job_id = ? AND state IN ({marks}) ORDER BY seq",
+                (job_id,) + states,
+            ).fetchall()
+        return [(seq, json.loads(entry), json.loads(files)) for seq, entry, files in rows]
+
+    def states(self, job_id: int) -> List[Tuple[int, str, str]]:
+        """(seq, video id, state) of every recorded item."""
+        with self._lock:
+            return self._db.execute("SELECT seq, video_id, state FROM items WHERE job_id = ?", (job_id,)).fetchall()
+
+    def set_item(self, job_id: int, seq: int, state: str, error: str = "", attempt: bool = False) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE items SET state = ?, error = ?, attempts = attempts + ? WHERE job_id = ? AND seq = ?",
+                (state, error, int(attempt), job_id, seq),
+            )
+
+    def set_files(self, job_id: int, seq: int, files: List[str]) -> None:
+        with self._lock:
+            self._db.execute("UPDATE items SET files = ? WHERE job_id = ? AND seq = ?", (json.dumps(files), job_id, seq))
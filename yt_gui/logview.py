@@ -0,0 +1,94 @@
+import queue
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+DEFAULT_MAX_LOG_LINES = 5000
+DEFAULT_MAX_BATCH = 10000  # lines drained per GUI tick, so one tick never stalls the main loop
+
+# Progress lines as logged by the runner (ProgressEvent.describe), optionally tagged with the item index
+_PROGRESS_RE = re.compile(r"^(\[\d+\] )?\s*(?:\d+\.\d%|\?)\s+of ")
+
+
+def progress_key(line: str) -> str | None:
+    """Item key of a progress line ("" for untagged ones), or None for regular log lines."""
+    m = _PROGRESS_RE.match(line)
+    if not m:
+        return None
+    return (m.group(1) or "").strip()
+
+
+@dataclass
+class LogBatch:
+    # (progress item key, or None for a regular line; line) in arrival order, each item's
+    # progress coalesced into its latest line, which sits where that line arrived
+    entries: List[Tuple[str | None, str]] = field(default_factory=list)
+    raw: List[str] = field(default_factory=list)  # everything drained, for the on-disk log
+    done: bool = False  # the end-of-run sentinel was seen
+
+
+def drain(q: "queue.Queue[str]", sentinel: str, max_items: int = DEFAULT_MAX_BATCH) -> LogBatch:
+    """Takes everything pending (up to max_items) and coalesces progress lines per item."""
+    batch = LogBatch()
+    latest: Dict[str, int] = {}  # progress key -> position of its latest line in batch.entries
+    for _ in range(max_items):
+        try:
+            msg = q.get_nowait()
+        except queue.Empty:
+            break
+        if msg == sentinel:
+            batch.done = True
+            continue
+        batch.raw.append(msg)
+        key = progress_key(msg)
+        if key is not None:
+            latest[key] = len(batch.entries)
+        batch.entries.append((key, msg))
+    if len(latest) < sum(1 for key, _ in batch.entries if key is not None):
+        batch.entries = [(key, msg) for i, (key, msg) in enumerate(batch.entries) if key is None or latest[key] == i]
+    return batch
+
+
+class LatencyStats:
+    """Per-tick render timings of the log pump, for measuring GUI update latency."""
+
+    def __init__(self) -> None:
+        self.render_ms: List[float] = []
+        self.lines = 0
+        self.backlog_max = 0
+        self.started = time.perf_counter()
+
+    def record(self, render_s: float, lines: int, backlog: int) -> None:
+        self.render_ms.append(render_s * 1000.0)
+        self.lines += lines
+        self.backlog_max = max(self.backlog_max, backlog)
+
+    def summary(self) -> dict:
+        ms = sorted(self.render_ms) or [0.0]
+
+        def pct(p: float) -> float:
+            return ms[min(len(ms) - 1, int(p * len(ms)))]
+
+        return {
+            "ticks": len(self.render_ms),
+            "lines": self.lines,
+            "elapsed_s": round(time.perf_counter() - self.started, 3),
+            "render_ms_p50": round(statistics.median(ms), 3),
+            "render_ms_p95": round(pct(0.95), 3),
+            "render_ms_max": round(ms[-1], 3),
+            "backlog_max": self.backlog_max,
+        }
+
+
+def flood_lines(count: int, workers: int = 16) -> List[str]:
+    """Synthetic log traffic shaped like a parallel run: mostly per-item progress, some regular lines."""
+    out: List[str] = []
+    for i in range(count):
+        item = i % workers + 1
+        if i % 50 == 0:
+            out.append(f"[{item:03d}] Queuing: Synthetic track {i}")
+        else:
+            out.append(f"[{item:03d}] {(i % 1000) / 10:5.1f}% of 4.2MiB at 1.1MiB/s ETA 00:03")
+    return out
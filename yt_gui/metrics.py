@@ -0,0 +1,301 @@
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, TextIO
+
+# Phases, in the order they happen, and the marks that bound them
+PHASES = (
+    ("queue_wait", "submitted", "started"),  # waiting for a worker slot
+    ("spawn", "spawn", "first_output"),  # yt-dlp process start until it prints anything
+    ("extract", "first_output", "download_start"),  # metadata extraction
+    ("download", "download_start", "download_end"),
+    ("transcode_wait", "transcode_queued", "transcode_started"),  # audio pipeline: waiting for a converter
+    ("postprocess", "postprocess_start", "postprocess_end"),  # ffmpeg: conversion, embedding
+)
+_LAST_WINS = ("download_end", "postprocess_end")  # marks that move forward with every event
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+# Upper bounds (seconds) of the Prometheus histogram buckets, from a process start to a long download
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+SAMPLE_WINDOW = 10000  # latest durations per phase kept for the percentiles
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+@dataclass
+class ItemTimer:
+    tag: int
+    url: str = ""
+    video_id: str = ""
+    title: str = ""
+    marks: Dict[str, float] = field(default_factory=dict)
+    phases: Dict[str, float] = field(default_factory=dict)  # measured directly (archive write)
+    bytes: int = 0
+    stream_bytes: int = 0  # bytes of the stream in progress
+    retries: int = 0
+    throttled: int = 0
+    requeued: int = 0  # attempts the runner's retry scheduler made
+
+    def mark(self, name: str, at: float | None = None) -> None:
+        at = time.monotonic() if at is None else at
+        if name in _LAST_WINS or name not in self.marks:
+            self.marks[name] = at
+
+    def durations(self) -> Dict[str, float]:
+        out = dict(self.phases)
+        for phase, begin, end in PHASES:
+            if begin in self.marks and end in self.marks:
+                out[phase] = max(0.0, self.marks[end] - self.marks[begin])
+        if "started" in self.marks and "finished" in self.marks:
+            out["total"] = self.marks["finished"] - self.marks["started"]
+        return {k: round(v, 4) for k, v in out.items()}
+
+
+@dataclass
+class PhaseStats:
+    """Totals and histogram of one phase over the whole run, percentiles over its latest samples."""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(BUCKETS))  # not cumulative
+    recent: Deque[float] = field(default_factory=lambda: deque(maxlen=SAMPLE_WINDOW))
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class MetricsRecorder:
+    """
+    Per-item, per-phase timings of a run. The runner marks phase boundaries as they happen;
+    finished items are appended to a JSON-lines file (if given) and counted per phase for the
+    run summary and the Prometheus endpoint, in fixed memory however long the run. Thread-safe.
+    """
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._active: Dict[int, ItemTimer] = {}
+        self._phases: Dict[str, PhaseStats] = {}
+        self._file: TextIO | None = open(path, "a", encoding="utf-8") if path else None
+        self.started = time.monotonic()
+        self.completed = 0
+        self.failed = 0
+        self.reused = 0
+        self.bytes = 0
+        self.retries = 0
+        self.throttled = 0
+        self.requeued = 0
+        self.exit_codes: Dict[int, int] = {}
+
+    def _timer(self, tag: int) -> ItemTimer:
+        timer = self._active.get(tag)
+        if timer is None:
+            timer = self._active[tag] = ItemTimer(tag)
+        return timer
+
+    def submitted(self, tag: int, url: str, video_id: str, title: str) -> None:
+        with self._lock:
+            timer = self._timer(tag)
+            timer.url, timer.video_id, timer.title = url, video_id, title
+            timer.mark("submitted")
+
+    def mark(self, tag: int | None, name: str) -> None:
+        if tag is None:
+            return
+        with self._lock:
+            if tag in self._active:
+                self._active[tag].mark(name)
+
+    def add_phase(self, tag: int, phase: str, seconds: float) -> None:
+        with self._lock:
+            if tag in self._active:
+                timer = self._active[tag]
+                timer.phases[phase] = timer.phases.get(phase, 0.0) + seconds
+
+    def note_bytes(self, tag: int | None, downloaded: int | None) -> None:
+        """Progress of the stream being downloaded; a smaller value means the next stream started."""
+        if tag is None or downloaded is None:
+            return
+        with self._lock:
+            timer = self._active.get(tag)
+            if timer is None:
+                return
+            if downloaded < timer.stream_bytes:
+                timer.bytes += timer.stream_bytes
+            timer.stream_bytes = downloaded
+
+    def note_line(self, tag: int | None, line: str) -> None:
+        """Counts yt-dlp's retry and throttling messages against the item."""
+        if tag is None:
+            return
+        retry = "Retrying (" in line
+        throttled = "HTTP Error 429" in line or "Too Many Requests" in line
+        if not (retry or throttled):
+            return
+        with self._lock:
+            timer = self._active.get(tag)
+            if timer is not None:
+                timer.retries += retry
+                timer.throttled += throttled
+            self.retries += retry
+            self.throttled += throttled
+
+    def note_retry(self, tag: int) -> None:
+        """The runner requeued a failed item; its timer keeps running across attempts."""
+        with self._lock:
+            timer = self._active.get(tag)
+            if timer is not None:
+                timer.requeued += 1
+            self.requeued += 1
+
+    def finish(self, tag: int, rc: int, reused: bool = False) -> None:
+        with self._lock:
+            timer = self._active.pop(tag, None)
+            if timer is None:
+                return
+            timer.mark("finished")
+            timer.bytes += timer.stream_bytes
+            durations = timer.durations()
+            for phase, seconds in durations.items():
+                self._phases.setdefault(phase, PhaseStats()).add(seconds)
+            if rc == 0:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.reused += reused
+            self.bytes += timer.bytes
+            self.exit_codes[rc] = self.exit_codes.get(rc, 0) + 1
+            if self._file is not None:
+                record = {
+                    "type": "item", "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                    "tag": tag, "id": timer.video_id, "title": timer.title, "url": timer.url, "rc": rc,
+                    "reused": reused, "bytes": timer.bytes, "retries": timer.retries,
+                    "requeued": timer.requeued, "throttled": timer.throttled, "phases": durations,
+                }
+                self._file.write(json.dumps(record) + "\n")
+                self._file.flush()
+
+    def summary(self) -> dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            items = self.completed + self.failed
+            phases = {}
+            for phase, stats in self._phases.items():
+                recent = sorted(stats.recent)
+                phases[phase] = {
+                    "count": stats.count,
+                    "sum_s": round(stats.total, 3),
+                    **{f"p{int(q * 100)}_s": round(percentile(recent, q), 3) for q in QUANTILES},
+                    "max_s": round(stats.max, 3),
+                }
+            return {
+                "items": items, "completed": self.completed, "failed": self.failed, "reused": self.reused,
+                "bytes": self.bytes, "retries": self.retries, "requeued": self.requeued,
+                "throttled": self.throttled, "exit_codes": {str(k): v for k, v in sorted(self.exit_codes.items())},
+                "elapsed_s": round(elapsed, 3), "items_per_s": round(items / elapsed, 3) if elapsed > 0 else 0.0,
+                "phases": phases,
+            }
+
+    def summary_lines(self) -> List[str]:
+        s = self.summary()
+        lines = [f"Metrics: {s['items']} item(s) in {s['elapsed_s']:.1f}s ({s['items_per_s']:.2f}/s), "
+                 f"{s['failed']} failed, {s['requeued']} requeued, {s['retries']} retries, {s['throttled']} throttled"]
+        for phase, _, _ in PHASES + (("archive", "", ""), ("total", "", "")):
+            p = s["phases"].get(phase)
+            if p:
+                lines.append(f"  {phase:<15} n={p['count']:<5} p50 {p['p50_s']:.2f}s  p95 {p['p95_s']:.2f}s  "
+                             f"p99 {p['p99_s']:.2f}s  max {p['max_s']:.2f}s")
+        return lines
+
+    def close(self) -> None:
+        """Appends the run summary to the metrics file and closes it."""
+        summary = self.summary()
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps({"type": "summary", **summary}) + "\n")
+                self._file.close()
+                self._file = None
+
+    def prometheus(self, active: int = 0) -> str:
+        """Current totals in the Prometheus text exposition format; phases as fixed-bucket histograms."""
+        with self._lock:
+            counts = (self.completed, self.failed, self.reused, self.bytes, self.retries, self.requeued, self.throttled)
+            exit_codes = sorted(self.exit_codes.items())
+            phases = [(phase, stats.count, stats.total, list(stats.buckets)) for phase, stats in self._phases.items()]
+        completed, failed, reused, downloaded, retries, requeued, throttled = counts
+        out = [
+            "# TYPE yt_gui_items_total counter",
+            f'yt_gui_items_total{{result="completed"}} {completed}',
+            f'yt_gui_items_total{{result="failed"}} {failed}',
+            "# TYPE yt_gui_items_reused_total counter",
+            f"yt_gui_items_reused_total {reused}",
+            "# TYPE yt_gui_downloaded_bytes_total counter",
+            f"yt_gui_downloaded_bytes_total {downloaded}",
+            "# TYPE yt_gui_retries_total counter",
+            f"yt_gui_retries_total {retries}",
+            "# TYPE yt_gui_requeued_total counter",
+            f"yt_gui_requeued_total {requeued}",
+            "# TYPE yt_gui_throttled_total counter",
+            f"yt_gui_throttled_total {throttled}",
+            "# TYPE yt_gui_active_items gauge",
+            f"yt_gui_active_items {active}",
+            "# TYPE yt_gui_exit_codes_total counter",
+        ]
+        out += [f'yt_gui_exit_codes_total{{code="{code}"}} {n}' for code, n in exit_codes]
+        out.append("# TYPE yt_gui_phase_seconds histogram")
+        for phase, count, total, buckets in phases:
+            seen = 0
+            for bound, n in zip(BUCKETS, buckets):
+                seen += n
+                out.append(f'yt_gui_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {seen}')
+            out.append(f'yt_gui_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {count}')
+            out.append(f'yt_gui_phase_seconds_sum{{phase="{phase}"}} {round(total, 3)}')
+            out.append(f'yt_gui_phase_seconds_count{{phase="{phase}"}} {count}')
+        return "\n".join(out) + "\n"
+
+
+class MetricsServer:
+    """Serves a recorder's metrics at http://127.0.0.1:<port>/metrics in a background thread."""
+
+    def __init__(self, render: Callable[[], str], port: int, host: str = "127.0.0.1") -> None:
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
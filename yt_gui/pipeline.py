@@ -0,0 +1,92 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List
+
+
+@dataclass
+class StageTimings:
+    name: str
+    durations: List[float] = field(default_factory=list)
+    failures: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.durations.append(seconds)
+            if not ok:
+                self.failures += 1
+
+    def summary(self) -> str:
+        with self._lock:
+            n = len(self.durations)
+            total = sum(self.durations)
+            failures = self.failures
+        if not n:
+            return f"{self.name}: no items"
+        return (f"{self.name}: {n} item(s), {failures} failed, busy {total:.1f}s, "
+                f"avg {total / n:.2f}s, max {max(self.durations):.2f}s")
+
+
+@dataclass
+class TranscodeJob:
+    item: Any  # the runner's item this conversion belongs to
+    info_json: str
+    out_file: str
+
+
+class TranscodeStage:
+    """
+    Second pipeline stage: a pool of threads sized to the CPU cores, fed by the download
+    stage through a bounded queue. submit() blocks while the queue is full, so downloads
+    never run more than a few items ahead of conversion.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[[TranscodeJob], int],
+        should_stop: Callable[[], bool],
+        workers: int = 0,
+    ) -> None:
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.timings = StageTimings("Transcode")
+        self._run_job = run_job
+        self._should_stop = should_stop
+        self._queue: queue.Queue[TranscodeJob | None] = queue.Queue(maxsize=self.workers * 2)
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for n in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"transcode-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, job: TranscodeJob) -> bool:
+        while not self._should_stop():
+            try:
+                self._queue.put(job, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def close(self) -> None:
+        """Waits until every queued job has been converted (or skipped after a stop)."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        self._threads.clear()
+
+    def _loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if self._should_stop():
+                continue
+            started = time.monotonic()
+            rc = self._run_job(job)
+            self.timings.record(time.monotonic() - started, rc == 0)
@@ -0,0 +1,203 @@
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Event kinds
+ITEM_STARTED = "started"
+DOWNLOADING = "downloading"
+POSTPROCESSING = "postprocessing"
+ITEM_FINISHED = "finished"
+ITEM_FAILED = "failed"
+
+# Lines yt-dlp prints through --progress-template start with this marker and carry one JSON object
+PROGRESS_MARKER = "[yt_gui] "
+
+_COMMON_FIELDS = (
+    '"id": %(info.id|null)j, "index": %(info.playlist_index|null)j, '
+    '"count": %(info.n_entries|null)j, "title": %(info.title|null)j, "status": %(progress.status|null)j'
+)
+_DOWNLOAD_TEMPLATE = (
+    PROGRESS_MARKER + '{"event": "download", ' + _COMMON_FIELDS + ", "
+    '"downloaded": %(progress.downloaded_bytes|null)j, '
+    '"total": %(progress.total_bytes,progress.total_bytes_estimate|null)j, '
+    '"speed": %(progress.speed|null)j, "eta": %(progress.eta|null)j}'
+)
+_POSTPROCESS_TEMPLATE = (
+    PROGRESS_MARKER + '{"event": "postprocess", ' + _COMMON_FIELDS + ", "
+    '"postprocessor": %(progress.postprocessor|null)j, "acodec": %(info.acodec|null)j}'
+)
+
+
+def progress_template_flags() -> List[str]:
+    return [
+        "--progress-template", "download:" + _DOWNLOAD_TEMPLATE,
+        "--progress-template", "postprocess:" + _POSTPROCESS_TEMPLATE,
+    ]
+
+
+def parse_progress_line(line: str) -> dict | None:
+    if not line.startswith(PROGRESS_MARKER):
+        return None
+    try:
+        data = json.loads(line[len(PROGRESS_MARKER):])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def progress_from_hook(event: str, d: dict) -> dict:
+    """Builds the same dict the progress templates print, from a yt-dlp progress/postprocessor hook."""
+    info = d.get("info_dict") or {}
+    return {
+        "event": event,
+        "id": info.get("id"),
+        "index": info.get("playlist_index"),
+        "count": info.get("n_entries"),
+        "title": info.get("title"),
+        "status": d.get("status"),
+        "downloaded": d.get("downloaded_bytes"),
+        "total": d.get("total_bytes") or d.get("total_bytes_estimate"),
+        "speed": d.get("speed"),
+        "eta": d.get("eta"),
+        "postprocessor": d.get("postprocessor"),
+        "acodec": info.get("acodec"),
+    }
+
+
+def format_bytes(n: float | None) -> str:
+    if n is None:
+        return "?"
+    n = float(n)
+    if n < 1024:
+        return f"{n:.0f}B"
+    for unit in ("KiB", "MiB"):
+        n /= 1024
+        if n < 1024:
+            return f"{n:.1f}{unit}"
+    return f"{n / 1024:.1f}GiB"
+
+
+@dataclass
+class ProgressEvent:
+    kind: str
+    index: int | None = None
+    video_id: str = ""
+    title: str = ""
+    downloaded: int | None = None
+    total: int | None = None
+    speed: float | None = None
+    eta: int | None = None
+    postprocessor: str = ""
+    acodec: str = ""
+    message: str = ""
+    time: float = field(default_factory=time.time)
+
+    def describe(self) -> str:
+        tag = f"[{self.index:03d}] " if self.index is not None else ""
+        if self.kind == DOWNLOADING:
+            pct = f"{100.0 * self.downloaded / self.total:5.1f}%" if self.downloaded is not None and self.total else "  ?  "
+            speed = f"{format_bytes(self.speed)}/s" if self.speed else "?/s"
+            eta = f"{int(self.eta) // 60:02d}:{int(self.eta) % 60:02d}" if self.eta is not None else "--:--"
+            return f"{tag}{pct} of {format_bytes(self.total)} at {speed} ETA {eta}"
+        if self.kind == POSTPROCESSING:
+            return f"{tag}{self.postprocessor} {self.message}".rstrip()
+        return f"{tag}{self.kind} {self.title}".rstrip()
+
+
+def event_from_progress(index: int | None, data: dict) -> ProgressEvent | None:
+    """Turns a progress-template/hook dict into a typed event; None for statuses we don't track."""
+    status = data.get("status")
+    common = dict(index=index, video_id=data.get("id") or "", title=data.get("title") or "")
+    if data.get("event") == "download":
+        if status == "downloading":
+            return ProgressEvent(DOWNLOADING, downloaded=data.get("downloaded"), total=data.get("total"),
+                                 speed=data.get("speed"), eta=data.get("eta"), **common)
+        if status == "finished":
+            total = data.get("total") or data.get("downloaded")
+            return ProgressEvent(DOWNLOADING, downloaded=total, total=total, eta=0, **common)
+        return None
+    if data.get("event") == "postprocess" and status in ("started", "finished"):
+        return ProgressEvent(POSTPROCESSING, postprocessor=data.get("postprocessor") or "",
+                             acodec=data.get("acodec") or "", message=status, **common)
+    return None
+
+
+@dataclass
+class ProgressSnapshot:
+    total: int
+    completed: int
+    failed: int
+    active: int
+    downloaded_bytes: int
+    speed: float  # current aggregate bytes/s across active items
+    average_speed: float  # bytes/s since the run started
+
+    def summary(self) -> str:
+        total = self.total if self.total else "?"
+        text = f"Progress: {self.completed} / {total} done"
+        if self.failed:
+            text += f", {self.failed} failed"
+        if self.active:
+            text += f", {self.active} active"
+        return text + f" | {format_bytes(self.downloaded_bytes)} at {format_bytes(self.speed)}/s"
+
+
+class ProgressTracker:
+    """Aggregates per-item events into run-wide counters. Thread-safe."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, total: int = 0) -> None:
+        with self._lock:
+            self._total = total
+            self._completed = 0
+            self._failed = 0
+            self._started_at = time.time()
+            self._active: Dict[object, float] = {}  # item -> latest speed
+            self._item_bytes: Dict[object, int] = {}  # item -> bytes of the stream in progress
+            self._done_bytes = 0  # bytes of finished streams
+
+    def set_total(self, total: int) -> None:
+        with self._lock:
+            self._total = total
+
+    def update(self, item: object, ev: ProgressEvent) -> None:
+        with self._lock:
+            if ev.kind == ITEM_STARTED:
+                self._active[item] = 0.0
+            elif ev.kind == DOWNLOADING:
+                self._active[item] = ev.speed or 0.0
+                if ev.downloaded is not None:
+                    prev = self._item_bytes.get(item, 0)
+                    if ev.downloaded < prev:
+                        # A new stream of the same item (e.g. audio after video) started
+                        self._done_bytes += prev
+                    self._item_bytes[item] = ev.downloaded
+            elif ev.kind == POSTPROCESSING:
+                if item in self._active:
+                    self._active[item] = 0.0
+            elif ev.kind in (ITEM_FINISHED, ITEM_FAILED):
+                self._active.pop(item, None)
+                self._done_bytes += self._item_bytes.pop(item, 0)
+                if ev.kind == ITEM_FINISHED:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    def snapshot(self) -> ProgressSnapshot:
+        with self._lock:
+            downloaded = self._done_bytes + sum(self._item_bytes.values())
+            elapsed = max(time.time() - self._started_at, 1e-6)
+            return ProgressSnapshot(
+                total=self._total,
+                completed=self._completed,
+                failed=self._failed,
+                active=len(self._active),
+                downloaded_bytes=downloaded,
+                speed=sum(self._active.values()),
+                average_speed=downloaded / elapsed,
+            )
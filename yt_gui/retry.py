@@ -0,0 +1,145 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Any, Callable, List, Tuple
+
+FAILED_REPORT_NAME = "yt_gui_failed.json"  # written to the output folder when items fail for good
+
+# Failure kinds
+THROTTLED = "throttled"
+NETWORK = "network"
+UNAVAILABLE = "unavailable"
+POSTPROCESS = "postprocess"
+OTHER = "other"
+
+# Checked in this order against an item's error output; the first match wins
+_SIGNATURES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    (THROTTLED, ("HTTP Error 429", "Too Many Requests", "rate-limit", "rate limit", "not a bot")),
+    (UNAVAILABLE, (
+        "Video unavailable", "Private video", "This video is private", "has been removed",
+        "account associated with this video has been terminated", "not available in your country",
+        "members-only", "Join this channel", "copyright", "HTTP Error 404", "live event will begin",
+        "Premieres in", "confirm your age",
+    )),
+    (POSTPROCESS, ("Postprocessing", "ffmpeg", "ffprobe", "Conversion failed")),
+    (NETWORK, (
+        "timed out", "Connection reset", "Connection refused", "Connection aborted", "Remote end closed",
+        "Temporary failure in name resolution", "Name or service not known", "Network is unreachable",
+        "IncompleteRead", "HTTP Error 5", "HTTP Error 403", "Unable to download", "SSL", "Got error",
+    )),
+)
+
+# Retries allowed per kind; None means the configured maximum
+_RETRY_LIMITS = {THROTTLED: None, NETWORK: None, POSTPROCESS: 1, UNAVAILABLE: 0, OTHER: 1}
+MAX_DELAY = 300.0
+
+
+def classify(lines: List[str]) -> str:
+    text = "\n".join(lines)
+    for kind, needles in _SIGNATURES:
+        if any(needle in text for needle in needles):
+            return kind
+    return OTHER
+
+
+def retry_limit(kind: str, max_retries: int) -> int:
+    limit = _RETRY_LIMITS.get(kind)
+    return max_retries if limit is None else min(limit, max_retries)
+
+
+def backoff(kind: str, attempt: int, base: float) -> float:
+    """Exponential delay before retry number `attempt` (1-based), with +-50% jitter so retries spread out."""
+    if kind == THROTTLED:
+        base *= 3
+    return min(MAX_DELAY, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+
+class CoolDown:
+    """
+    Pauses new downloads for everyone when throttling clusters: `threshold` throttled
+    responses within `window` seconds start a pause of `pause` seconds, doubled each time
+    it triggers again soon after the previous one ended.
+    """
+
+    def __init__(self, threshold: int = 5, window: float = 60.0, pause: float = 60.0) -> None:
+        self.threshold = threshold
+        self.window = window
+        self.base_pause = pause
+        self._pause = pause
+        self._lock = threading.Lock()
+        self._hits: List[float] = []
+        self._until = 0.0
+
+    def note(self) -> float:
+        """Records a throttled response; returns the pause length if this starts a cool-down, else 0."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._until:
+                return 0.0
+            self._hits = [t for t in self._hits if now - t < self.window] + [now]
+            if len(self._hits) < self.threshold:
+                return 0.0
+            if now - self._until < self.window:
+                self._pause = min(MAX_DELAY * 2, self._pause * 2)
+            else:
+                self._pause = self.base_pause
+            self._until = now + self._pause
+            self._hits = []
+            return self._pause
+
+    def wait(self, should_stop: Callable[[], bool]) -> None:
+        while not should_stop():
+            with self._lock:
+                left = self._until - time.monotonic()
+            if left <= 0:
+                return
+            time.sleep(min(left, 0.5))
+
+
+class RetryQueue:
+    """
+    Holds failed items until their backoff expires, then hands them to `submit` from its own
+    thread, so waiting never occupies a download worker.
+    """
+
+    def __init__(self, submit: Callable[[Any], None]) -> None:
+        self._submit = submit
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="retry-queue", daemon=True)
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def schedule(self, item: Any, delay: float) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), item))
+            self._cond.notify()
+
+    def close(self) -> List[Any]:
+        """Stops the queue; returns the items that were still waiting."""
+        with self._cond:
+            self._closed = True
+            left = [item for _, _, item in self._heap]
+            self._heap.clear()
+            self._cond.notify()
+        self._thread.join()
+        return left
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._closed:
+                    return
+                _, _, item = heapq.heappop(self._heap)
+            self._submit(item)
@@ -1,21 +1,186 @@
+import hashlib
 import json
 import os
 import queue
+import re
+import sqlite3
 import subprocess
+import tempfile
 import time
 import threading
 import concurrent.futures
-from typing import List
+from datetime import datetime, timezone
+from dataclasses import asdict, dataclass, field, replace
+from typing import Dict, Generator, List, Set, Tuple
 from .config import DownloadOptions
+from .archive import DownloadArchive
+from .autotune import AutoTuner, ConcurrencyLimiter
+from .bandwidth import MB, BandwidthBudget
+from .cache import ProbeCache
+from .connections import ConnectionBudget
+from .cookies import CookieJarCache, CookieJarExport
+from .engine import InProcessEngine, inprocess_available
+from .jobstore import DONE, ENUMERATING, FAILED, PENDING, READY, RUNNING, SKIPPED, JobRecord, JobStore, remove_files, written_file
+from .formats import audio_action, audio_format_selector, normalize_acodec
+from .metrics import MetricsRecorder, MetricsServer
+from .retry import FAILED_REPORT_NAME, CoolDown, RetryQueue, backoff, classify, retry_limit
+from .pipeline import StageTimings, TranscodeJob, TranscodeStage
+from .store import STORE_DIRNAME, ContentStore, StoredItem, content_key
+from .staging import ScratchSpace, estimate_size, move_into_place
+from .syncindex import FolderIndex, renumbered, unnumbered
+from .progress import (
+    DOWNLOADING, ITEM_FAILED, ITEM_FINISHED, ITEM_STARTED, POSTPROCESSING, ProgressEvent, ProgressTracker,
+    event_from_progress, format_bytes, parse_progress_line, progress_template_flags,
+)
 from .utils import which_or_none, safe_mkdir, expand_path
+from .workqueue import WorkQueue, worker_options
+
+# Entry fields kept when a streamed listing is cached
+_LISTING_FIELDS = ("_type", "ie_key", "id", "url", "title", "playlist_index", "playlist_title", "duration")
+# ... and when entries are recorded in the job store, plus what a single video's item needs
+_JOURNAL_FIELDS = _LISTING_FIELDS + ("webpage_url", "extractor_key")
+_SEQ = "_yt_gui_seq"  # entry key: the item's row in the job store
+_COPY = "_yt_gui_copy"  # entry key: a crawl listed the video in an earlier playlist too
+# Flat entries that are playlists themselves: a channel's tabs and the playlists it lists
+_NESTED_IE_KEYS = ("YoutubeTab", "YoutubePlaylist")
+# Levels a crawl follows below its URL: channel -> tab -> playlist
+_CRAWL_DEPTH = 3
+
+
+def _safe_title(title: str) -> str:
+    return "".join([c if c.isalnum() or c in (" ", "-", "_", ".") else "_" for c in title])
+
+
+def _prepend(first: dict, rest: Generator[dict, None, bool]) -> Generator[dict, None, bool]:
+    # Like itertools.chain, but close() also stops the underlying enumeration
+    try:
+        yield first
+        return (yield from rest)
+    finally:
+        rest.close()
+
+
+@dataclass
+class _Job:
+    """One URL of a parallel run: where its items go, how they are fetched, and how it went."""
+    opt: DownloadOptions
+    kind: str  # "playlist" | "video" | "unknown" (enumeration failed)
+    folder: str
+    archive: DownloadArchive | None
+    base_cmd: List[str]
+    fetch_cmd: List[str] = field(default_factory=list)  # audio pipeline, stage 1
+    convert_cmd: List[str] = field(default_factory=list)  # audio pipeline, stage 2
+    stage_dir: str = ""  # info JSON handoff between the stages; "" when not pipelined
+    index: FolderIndex | None = None  # sync mode: what the folder already holds
+    scratch: str = ""  # staging: items are downloaded and post-processed here, then moved into folder
+    key: str = ""  # job store key (URL plus output settings)
+    record: int | None = None  # job store id
+    enumerated: bool = False  # the job store holds the complete listing
+    seen: int = 0
+    skipped: int = 0
+    completed: int = 0
+    failed: int = 0
+    reused: int = 0  # items placed from the content store
+    reused_bytes: int = 0
+    saved_seconds: float = 0.0  # what producing the reused items took the first time
+    retried: int = 0  # retry attempts made by the scheduler
+    failures: List[dict] = field(default_factory=list)  # items that failed for good, for the report
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def summary(self) -> dict:
+        return {
+            "url": self.opt.url, "type": self.kind, "folder": self.folder, "items": self.seen,
+            "skipped": self.skipped, "completed": self.completed, "failed": self.failed, "retried": self.retried,
+            "reused": self.reused, "reused_bytes": self.reused_bytes, "saved_s": round(self.saved_seconds, 1),
+        }
+
+
+@dataclass
+class _Item:
+    job: _Job
+    entry: dict
+    tag: int  # run-wide ordinal: log tag and progress key
+    index: int | None  # playlist position used in the file name; None for single videos
+    key: str | None = None  # content store key while this item is being produced
+    started: float = 0.0
+    attempt: int = 0  # retries so far
+    files: List[str] = field(default_factory=list)  # written by the current attempt, deleted if it fails
+
+    @property
+    def seq(self) -> int:
+        return self.entry.get(_SEQ, 0)
+
+    @property
+    def url(self) -> str:
+        if self.job.kind == "video":
+            return self.entry.get("webpage_url") or self.job.opt.url
+        return self.entry.get("url") or f"https://www.youtube.com/watch?v={self.entry.get('id')}"
+
+    @property
+    def title(self) -> str:
+        return self.entry.get("title", "Video")
+
+    @property
+    def out_template(self) -> str:
+        folder = self.job.scratch or self.job.folder
+        if self.index is None:
+            return os.path.join(folder, "%(title)s.%(ext)s")
+        return os.path.join(folder, f"{self.index:03d} - %(title)s.%(ext)s")
+
 
 class YtDlpRunner:
-    def __init__(self, log_queue: queue.Queue[str]) -> None:
+    def __init__(
+        self,
+        log_queue: queue.Queue[str],
+        probe_cache: ProbeCache | None = None,
+        event_queue: queue.Queue[ProgressEvent] | None = None,
+        archives: Dict[str, DownloadArchive] | None = None,
+        cookie_cache: CookieJarCache | None = None,
+        budget: ConcurrencyLimiter | None = None,
+    ) -> None:
+        """
+        archives, cookie_cache and budget let a long-running host (service.py) share warm state
+        between runners: loaded download archives, exported cookies, and a cap on how many items
+        all of them download at once.
+        """
         self.log_queue = log_queue
+        self.probe_cache = probe_cache or ProbeCache()
+        self._shared_archives = archives
+        self._cookie_cache = cookie_cache
+        self._budget = budget
+        # Typed progress events go here (if given); tracker keeps the run-wide totals
+        self.event_queue = event_queue
+        self.tracker = ProgressTracker()
+        self._current_item: object = None  # item of the single-process run, told apart by its progress lines
         self.proc: subprocess.Popen[str] | None = None
         self._active_procs: List[subprocess.Popen[str]] = []
         self._proc_lock = threading.Lock()
         self._stop_requested = False
+        self._engine: InProcessEngine | None = None
+        self._tuner: AutoTuner | None = None
+        self._cookies: CookieJarExport | None = None  # per-job cookie jar exported from the browser
+        self._audio_format = ""  # requested --audio-format of the current run, "" if not audio-only
+        self._audio_actions = {"remux": 0, "transcode": 0}
+        self._audio_lock = threading.Lock()
+        self._transcoder: TranscodeStage | None = None
+        self._bandwidth: BandwidthBudget | None = None
+        self._connections: ConnectionBudget | None = None
+        self._store: ContentStore | None = None
+        self._scratch: ScratchSpace | None = None
+        self.metrics: MetricsRecorder | None = None  # per-item phase timings of the last parallel run
+        self._retries: RetryQueue | None = None
+        self._cooldown: CoolDown | None = None
+        self._errors: Dict[int, List[str]] = {}  # tag -> error lines of the item's current attempt
+        self._errors_lock = threading.Lock()
+        self._open_items = 0  # submitted items without a final result yet
+        self._open_cond = threading.Condition()
+        self.failed_report = ""  # failed-items report written by the last parallel run, if any
+        self._jobs_db: JobStore | None = None
+        self._running: Dict[int, _Item] = {}  # tag -> item, while a worker or the transcoder has it
+        self._handoff = ""  # prefix of handoff file names, unique per process when workers share folders
+        self._download_timings = StageTimings("Download")
+        self._archives: Dict[str, DownloadArchive] = archives if archives is not None else {}  # one per file
+        self.jobs: List[_Job] = []
 
     def _register_proc(self, proc: subprocess.Popen[str]) -> None:
         with self._proc_lock:
@@ -47,43 +212,165 @@ class YtDlpRunner:
     def _log(self, msg: str) -> None:
         self.log_queue.put(msg)
 
+    def _log_output(self, line: str, index: int | None = None) -> None:
+        """Logs a line of yt-dlp output, noting errors, throttling and retries for the scheduler, tuner and metrics."""
+        if index is None and self._engine is not None:
+            index = self._engine.current_index()
+            if self.metrics is not None:
+                self.metrics.mark(index, "first_output")
+        if "HTTP Error 429" in line or "Too Many Requests" in line:
+            if self._tuner is not None:
+                self._tuner.note_throttle()
+            pause = self._cooldown.note() if self._cooldown is not None else 0.0
+            if pause:
+                self._log(f"Throttled repeatedly; pausing new downloads for {pause:.0f}s.")
+        if self.metrics is not None:
+            self.metrics.note_line(index, line)
+        if index is not None and line.startswith(("ERROR:", "WARNING:")):
+            with self._errors_lock:
+                self._errors.setdefault(index, []).append(line)
+        path = written_file(line) if index is not None else None
+        if path is not None:
+            self._note_file(index, path)
+        self._log(line)
+
+    def _emit(self, item: object, ev: ProgressEvent) -> None:
+        self.tracker.update(item, ev)
+        if self.metrics is not None and isinstance(item, int):
+            if ev.kind == DOWNLOADING:
+                self.metrics.mark(item, "download_start")
+                self.metrics.mark(item, "download_end")
+                self.metrics.note_bytes(item, ev.downloaded)
+            elif ev.kind == POSTPROCESSING:
+                self.metrics.mark(item, "postprocess_start")
+                self.metrics.mark(item, "postprocess_end")
+        if self._scratch is not None and isinstance(item, int) and ev.kind == DOWNLOADING:
+            self._scratch.note(item, ev.downloaded or 0, ev.total)
+        if self.event_queue is not None:
+            self.event_queue.put(ev)
+
+    def _on_progress(self, index: int | None, data: dict) -> None:
+        item: object = index
+        if index is None:
+            # One yt-dlp process for the whole playlist: the progress data says which item it is
+            index = data.get("index")
+            item = index if index is not None else data.get("id")
+            if data.get("count"):
+                self.tracker.set_total(data["count"])
+            if item != self._current_item:
+                if self._current_item is not None:
+                    self._emit(self._current_item, ProgressEvent(ITEM_FINISHED))
+                self._current_item = item
+                self._emit(item, ProgressEvent(ITEM_STARTED, index=index, video_id=data.get("id") or "", title=data.get("title") or ""))
+        ev = event_from_progress(index, data)
+        if ev is not None:
+            self._emit(item, ev)
+            self._log(ev.describe())
+            if ev.kind == POSTPROCESSING and ev.postprocessor == "ExtractAudio" and ev.message == "started":
+                self._log_audio_action(ev)
+
+    def _log_audio_action(self, ev: ProgressEvent) -> None:
+        if not self._audio_format:
+            return
+        action = audio_action(ev.acodec, self._audio_format)
+        with self._audio_lock:
+            self._audio_actions[action] += 1
+        tag = f"[{ev.index:03d}] " if ev.index is not None else ""
+        verb = "remuxed" if action == "remux" else "transcoded"
+        self._log(f"{tag}Audio {verb} ({normalize_acodec(ev.acodec) or '?'} -> {self._audio_format})")
+
+    def _read_output(self, proc: subprocess.Popen[str], index: int | None) -> None:
+        assert proc.stdout is not None
+        first = True
+        for line in proc.stdout:
+            if self._stop_requested:
+                proc.terminate()
+                break
+            if first and self.metrics is not None:
+                self.metrics.mark(index, "first_output")
+                first = False
+            line = line.rstrip("\n")
+            data = parse_progress_line(line)
+            if data is None:
+                self._log_output(line, index)
+            else:
+                self._on_progress(index, data)
+
     def check_deps(self) -> None:
         if not which_or_none("yt-dlp"):
             raise RuntimeError("yt-dlp not found in PATH. Install with: python -m pip install -U yt-dlp")
         if not which_or_none("ffmpeg"):
             raise RuntimeError("ffmpeg not found in PATH. Install ffmpeg and ensure it is in PATH.")
 
-    def probe_url_type(self, url: str, cookies_from_browser: str = "") -> str:
+    def probe(self, url: str, cookies_from_browser: str = "", refresh: bool = False) -> dict | None:
         """
-        Returns "playlist" or "video" using yt-dlp JSON output.
-        Uses --flat-playlist to keep it lightweight when possible.
+        Returns the flat-playlist JSON for url, or None if probing failed.
+        Results are cached per URL and cookie source; refresh=True forces a new probe.
         """
+        if refresh:
+            self.probe_cache.invalidate(url, cookies_from_browser)
+        else:
+            info = self.probe_cache.get(url, cookies_from_browser)
+            if info is not None:
+                self._log("Using cached playlist info (use refresh to re-enumerate).")
+                return info
+
         cmd = ["yt-dlp", "-J", "--no-warnings", "--flat-playlist", "--skip-download", url]
-        if cookies_from_browser:
+        if self._cookies is not None:
+            cmd += self._cookie_args()
+        elif cookies_from_browser:
             cmd += ["--cookies-from-browser", cookies_from_browser]
 
-        self._log("Probing URL type...")
+        self._log("Probing URL...")
         try:
-            out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True)
+            out = subprocess.check_output(cmd, stderr=subprocess.PIPE, text=True)
             info = json.loads(out)
-            t = info.get("_type", "")
-            # yt-dlp uses _type like "playlist" for playlists; for single videos it often has no _type or "video"
-            if t == "playlist":
-                return "playlist"
-            return "video"
         except subprocess.CalledProcessError as e:
-            self._log("Probe failed; falling back to auto behavior.\n" + (e.output or ""))
-            return "video"
+            self._log("Probe failed.\n" + (e.stderr or ""))
+            return None
         except Exception as e:
-            self._log(f"Probe failed; falling back to auto behavior. ({e})")
+            self._log(f"Probe failed. ({e})")
+            return None
+        self.probe_cache.put(url, cookies_from_browser, info)
+        return info
+
+    def probe_url_type(self, url: str, cookies_from_browser: str = "", refresh: bool = False) -> str:
+        """
+        Returns "playlist" or "video" using yt-dlp JSON output.
+        Uses --flat-playlist to keep it lightweight when possible.
+        """
+        return self._info_type(self.probe(url, cookies_from_browser, refresh))
+
+    def _info_type(self, info: dict | None) -> str:
+        if info is None:
+            self._log("Falling back to auto behavior.")
             return "video"
+        # yt-dlp uses _type like "playlist" for playlists; for single videos it often has no _type or "video"
+        if info.get("_type", "") == "playlist":
+            return "playlist"
+        return "video"
+
+    def _get_common_flags(self, opt: DownloadOptions, use_archive: bool = True) -> List[str]:
+        return self._get_fetch_flags(opt, use_archive) + self._get_format_flags(opt) + self._get_postprocess_flags(opt)
+
+    def _get_format_flags(self, opt: DownloadOptions) -> List[str]:
+        if not opt.audio_only:
+            return []
+        # Prefer a source stream that can be copied into the target container, so ffmpeg
+        # only re-encodes when no such stream exists
+        return ["-f", audio_format_selector(opt.audio_format.strip() or "mp3")]
 
-    def _get_common_flags(self, opt: DownloadOptions) -> List[str]:
-        cmd = ["yt-dlp", "--ignore-errors", "--no-part", "--newline"]
-        if opt.cookies_from_browser:
+    def _get_fetch_flags(self, opt: DownloadOptions, use_archive: bool = True) -> List[str]:
+        cmd = ["yt-dlp", "--ignore-errors", "--no-part", "--newline"] + progress_template_flags()
+        # With an exported jar, --cookies is added per process (see _cookie_args)
+        if self._cookies is None and opt.cookies_from_browser:
             cmd += ["--cookies-from-browser", opt.cookies_from_browser]
-        if opt.download_archive.strip():
+        if use_archive and opt.download_archive.strip():
             cmd += ["--download-archive", expand_path(opt.download_archive)]
+        return cmd
+
+    def _get_postprocess_flags(self, opt: DownloadOptions) -> List[str]:
+        cmd: List[str] = []
         if opt.embed_metadata:
             cmd += ["--embed-metadata", "--embed-thumbnail"]
         if opt.subtitles:
@@ -92,27 +379,63 @@ class YtDlpRunner:
             cmd += ["-x", "--audio-format", opt.audio_format.strip() or "mp3"]
         return cmd
 
-    def _run_cmd(self, cmd: List[str]) -> int:
+    def _run_cmd(self, cmd: List[str], index: int | None = None) -> int:
         if self._stop_requested:
             return 1
-        
+        if self.metrics is not None:
+            self.metrics.mark(index, "spawn")
         process = subprocess.Popen(
             cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
             text=True, bufsize=1, universal_newlines=True
         )
         self._register_proc(process)
-
-        assert process.stdout is not None
-        for line in process.stdout:
-            if self._stop_requested:
-                process.terminate()
-                break
-            self._log(line.rstrip("\n"))
+        self._read_output(process, index)
 
         rc = process.wait()
         self._unregister_proc(process)
         return rc
 
+    def _cookie_args(self) -> List[str]:
+        if self._cookies is None:
+            return []
+        return ["--cookies", self._cookies.for_worker()]
+
+    def _download(self, base_cmd: List[str], item_args: List[str], index: int, fetch: bool = True) -> int:
+        """Runs one yt-dlp call for an item; fetch=False (post-processing only) takes no connections."""
+        budget = self._bandwidth
+        connections = self._connections if fetch else None
+        key = object()
+        try:
+            if self._engine is not None:
+                # In-process instances only write the jar back when the engine closes them, one after another
+                base = base_cmd[1:] + (["--cookies", self._cookies.path] if self._cookies is not None else [])
+                if budget is not None:
+                    set_rate = self._engine.rate_setter(base)
+                    set_rate(budget.acquire(key, set_rate))
+                if connections is not None:
+                    set_fragments = self._engine.fragments_setter(base)
+                    set_fragments(connections.acquire(key, set_fragments))
+                return self._engine.run(base, item_args, index)
+            limit = ["--limit-rate", str(budget.acquire(key))] if budget is not None else []
+            if connections is not None:
+                limit += ["--concurrent-fragments", str(connections.acquire(key))]
+            return self._run_cmd(base_cmd + self._cookie_args() + limit + item_args, index)
+        finally:
+            if budget is not None:
+                budget.release(key)
+            if connections is not None:
+                connections.release(key)
+
+    def _start_engine(self, opt: DownloadOptions) -> None:
+        self._engine = None
+        if opt.engine != "inprocess":
+            return
+        if not inprocess_available():
+            self._log("In-process engine unavailable (yt_dlp module not importable); using subprocesses.")
+            return
+        self._engine = InProcessEngine(self._log_output, lambda: self._stop_requested, self._on_progress)
+        self._log("Using in-process yt-dlp engine.")
+
     def build_cmd(self, opt: DownloadOptions, resolved_type: str) -> List[str]:
         # Legacy/Single builder
         safe_mkdir(opt.output_dir)
@@ -121,7 +444,7 @@ class YtDlpRunner:
         else:
             outtmpl = os.path.join(opt.output_dir, "%(title)s.%(ext)s")
 
-        cmd = self._get_common_flags(opt)
+        cmd = self._get_common_flags(opt) + self._cookie_args()
         cmd += ["-o", outtmpl, opt.url]
 
         if opt.mode == "playlist":
@@ -130,65 +453,1228 @@ class YtDlpRunner:
             cmd.insert(1, "--no-playlist")
         return cmd
 
-    def run_parallel(self, opt: DownloadOptions) -> int:
-        self._log(f"Preparing parallel download (workers={opt.workers})...")
-        
-        probe_cmd = ["yt-dlp", "-J", "--flat-playlist", "--no-warnings", opt.url]
-        if opt.cookies_from_browser:
-            probe_cmd += ["--cookies-from-browser", opt.cookies_from_browser]
-            
+    @staticmethod
+    def _is_nested(entry: dict) -> bool:
+        # A listed channel tab or playlist rather than a video
+        return entry.get("_type") == "playlist" or (
+            entry.get("_type") in ("url", "url_transparent") and entry.get("ie_key") in _NESTED_IE_KEYS)
+
+    @staticmethod
+    def _is_playlist_entry(entry: dict) -> bool:
+        # Flat playlist entries are url references; a single video comes back fully extracted
+        return entry.get("_type") in ("url", "url_transparent") or entry.get("playlist_index") is not None
+
+    def _iter_entries(self, opt: DownloadOptions, info: dict | None) -> Generator[dict, None, bool]:
+        """
+        Yields playlist entries as yt-dlp prints them (--flat-playlist -j, one JSON object per line),
+        so downloads can start while enumeration continues. Iterates `info` instead when it is given
+        and stores a finished listing in the probe cache. A single-video URL yields the video's own info.
+        Returns True if the listing is complete (enumeration neither failed nor was stopped).
+        """
+        if info is not None:
+            if info.get("_type") == "playlist":
+                yield from info.get("entries") or []
+            else:
+                yield info
+            return True
+
+        cmd = ["yt-dlp", "-j", "--no-warnings", "--flat-playlist", "--skip-download"] + self._cookie_args()
+        if self._cookies is None and opt.cookies_from_browser:
+            cmd += ["--cookies-from-browser", opt.cookies_from_browser]
+        if opt.mode == "playlist":
+            cmd.append("--yes-playlist")
+        elif opt.mode == "video":
+            cmd.append("--no-playlist")
+        cmd.append(opt.url)
+        self._log("Enumerating playlist (streaming)...")
+
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1, universal_newlines=True
+        )
+        self._register_proc(process)
+        # Only the fields the runner needs are kept for the cache, not whole entry dicts
+        listing: List[dict] = []
+        title = ""
         try:
-            out = subprocess.check_output(probe_cmd, stderr=subprocess.STDOUT, text=True)
-            info = json.loads(out)
-        except Exception as e:
-            self._log(f"Failed to fetch playlist info: {e}")
+            assert process.stdout is not None
+            for line in process.stdout:
+                if self._stop_requested:
+                    break
+                line = line.strip()
+                if not line.startswith("{"):
+                    if line:
+                        self._log(line)
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    self._log(line)
+                    continue
+                if not self._is_playlist_entry(entry):
+                    # Single video: cache and hand back its info as-is
+                    if opt.mode != "video":
+                        self.probe_cache.put(opt.url, opt.cookies_from_browser, entry)
+                    yield entry
+                    continue
+                title = title or entry.get("playlist_title") or entry.get("playlist") or ""
+                listing.append({k: entry.get(k) for k in _LISTING_FIELDS if entry.get(k) is not None})
+                yield entry
+        finally:
+            if process.poll() is None:
+                process.terminate()
+            rc = process.wait()
+            self._unregister_proc(process)
+        if rc == 0 and listing and not self._stop_requested and opt.mode != "video":
+            self.probe_cache.put(opt.url, opt.cookies_from_browser,
+                                 {"_type": "playlist", "title": title, "entries": listing})
+        elif rc != 0 and not self._stop_requested:
+            self._log(f"Playlist enumeration exited with code {rc}.")
+        return rc == 0 and not self._stop_requested
+
+    def run_parallel(self, opt: DownloadOptions, info: dict | None = None) -> int:
+        return self.run_batch([opt], info)
+
+    def _job_key(self, opt: DownloadOptions) -> str:
+        raw = json.dumps({"url": opt.url, "output_dir": opt.output_dir, "only_ids": sorted(opt.only_ids),
+                          **self._output_options(opt)}, sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _open_job(self, opt: DownloadOptions, info: dict | None) -> Tuple[_Job, Generator[dict, None, bool | None]] | None:
+        """
+        Starts enumerating opt.url and sets up where and how its items are downloaded. With a job
+        store, an unfinished earlier run of the same job is resumed: from its recorded listing if
+        that was complete, otherwise by enumerating again and skipping what is already done.
+        """
+        key = self._job_key(opt)
+        record = None
+        if self._jobs_db is not None:
+            # Workers of a shared queue run the same jobs on purpose; elsewhere a job still owned by
+            # a live run is left alone rather than cleaned up and downloaded twice
+            busy = "" if self._jobs_db.shared else self._jobs_db.holder(key)
+            if busy:
+                self._log(f"Another run ({busy}) is still downloading {opt.url}; not starting it twice.")
+                return None
+            if not opt.resume:
+                self._jobs_db.finish(key)
+            previous = self._jobs_db.unfinished(key)
+            record = previous[-1] if previous else None
+            if record is not None and not self._jobs_db.shared:
+                busy = self._jobs_db.own(record.id)
+                if busy:
+                    self._log(f"Another run ({busy}) is still downloading {opt.url}; not starting it twice.")
+                    return None
+            self._jobs_db.finish(key, keep=record.id if record is not None else None)
+            if record is not None and not self._jobs_db.shared:
+                # In a shared queue, running items belong to live workers until their leases expire
+                self._clean_partial(record)
+            if record is not None and record.state == READY and isinstance(self._jobs_db, WorkQueue):
+                # Published before: list it again for new items, and give failed ones another go
+                requeued = self._jobs_db.reopen(record.id)
+                record.state = ENUMERATING
+                self._log(f"{opt.url} was published before; listing it again for new items"
+                          + (f", {requeued} failed item(s) requeued." if requeued else "."))
+            elif record is not None and record.state == READY:
+                self._log(f"Resuming the unfinished job for {opt.url}: {record.pending} item(s) left.")
+                job = self._setup_job(opt, record.kind, record.folder)
+                job.key, job.record, job.enumerated = key, record.id, True
+                if opt.sync and job.kind == "playlist":
+                    job.index = FolderIndex(job.folder)
+                return job, self._resumed_entries(job)
+            elif record is not None:
+                self._log(f"Resuming the unfinished job for {opt.url}; its listing was cut short, enumerating again.")
+
+        # A sync diffs against the playlist as it is now, never a cached listing; the cache holds
+        # what a URL lists, which --mode video overrides
+        if info is None and not opt.refresh_probe and not opt.sync and opt.mode != "video":
+            info = self.probe_cache.get(opt.url, opt.cookies_from_browser)
+            if info is not None:
+                self._log("Using cached playlist info (use refresh to re-enumerate).")
+        entries = self._iter_entries(opt, info)
+        first = next(entries, None)
+        if first is None:
+            self._log(f"No entries found for {opt.url}")
+            return None
+
+        if not self._is_playlist_entry(first):
+            kind, folder = "video", opt.output_dir
+            self._log(f"Single video: {first.get('title', opt.url)}")
+        else:
+            if info is not None and info.get("title"):
+                playlist_title = info["title"]
+            else:
+                playlist_title = first.get("playlist_title") or first.get("playlist") or "Unknown_Playlist"
+            kind, folder = "playlist", os.path.join(opt.output_dir, _safe_title(playlist_title))
+            expected = first.get("playlist_count") or first.get("n_entries")
+            self._log(f"Destination: {folder}" + (f" ({expected} items)" if expected else ""))
+        job = self._setup_job(opt, kind, folder)
+        listing: Generator[dict, None, bool | None] = _prepend(first, entries)
+        if opt.sync and kind == "playlist":
+            job.index = FolderIndex(folder)
+            listing = self._sync_entries(job, listing)
+        if self._jobs_db is not None:
+            job.key = key
+            job.record = record.id if record is not None else self._jobs_db.create(key, opt.url, asdict(opt))
+            self._jobs_db.set_job(job.record, kind=kind, folder=folder)
+            listing = self._journal_entries(job, listing, record is not None)
+        return job, listing
+
+    def _setup_job(self, opt: DownloadOptions, kind: str, folder: str) -> _Job:
+        safe_mkdir(folder)
+
+        # The runner owns the archive in parallel mode: archived entries are dropped before
+        # they are submitted and completions are recorded here instead of by every worker.
+        archive = None
+        if opt.download_archive.strip():
+            path = expand_path(opt.download_archive)
+            archive = self._archives.get(path)
+            if archive is None:
+                archive = self._archives.setdefault(path, DownloadArchive(path))
+
+        job = _Job(opt=opt, kind=kind, folder=folder, archive=archive,
+                   base_cmd=self._get_common_flags(opt, use_archive=False))
+        if self._scratch is not None:
+            job.scratch = self._scratch.folder()
+        if opt.audio_only:
+            # Audio-only runs are split in two stages: downloads on the worker pool (network-bound),
+            # conversion/embedding on a CPU-sized pool, connected by a bounded queue.
+            fmt = self._get_format_flags(opt)
+            job.fetch_cmd = self._get_fetch_flags(opt, use_archive=False) + fmt + ["--write-info-json"]
+            job.convert_cmd = self._get_fetch_flags(opt, use_archive=False) + fmt + self._get_postprocess_flags(opt)
+            job.stage_dir = os.path.join(job.scratch or folder, ".yt_gui_stage")
+            safe_mkdir(job.stage_dir)
+        return job
+
+    def _journal_entries(self, job: _Job, entries: Generator[dict, None, bool | None],
+                         resumed: bool) -> Generator[dict, None, None]:
+        """
+        Records entries in the job store as they are enumerated and numbers them. Written in
+        batches that start at one entry and double, so the first item starts at once and a long
+        listing costs few commits. When resuming a job whose listing was cut short, the recorded
+        unfinished items go first and enumeration only adds the videos not recorded yet.
+        """
+        assert self._jobs_db is not None and job.record is not None
+        known: Set[str] = set()
+        seq = 0
+        batch: List[dict] = []
+        size = 1
+        position = 0
+        complete = False
+        try:
+            if resumed:
+                for recorded, video_id, state in self._jobs_db.states(job.record):
+                    known.add(video_id)
+                    seq = max(seq, recorded)
+                    if state in (DONE, SKIPPED):
+                        job.seen += 1
+                        job.skipped += 1
+                for _, entry, _ in self._jobs_db.entries(job.record, (PENDING, FAILED)):
+                    yield entry
+            while True:
+                try:
+                    entry = next(entries)
+                except StopIteration as done:
+                    complete = done.value is not False and not self._stop_requested
+                    break
+                position += 1
+                if entry.get("id") in known:
+                    continue
+                seq += 1
+                if job.kind == "playlist":
+                    # Fixed now, so a resumed run names files the same way
+                    entry = dict(entry, playlist_index=entry.get("playlist_index") or position)
+                batch.append(dict(entry, **{_SEQ: seq}))
+                if len(batch) >= size:
+                    self._jobs_db.add_entries(job.record, [(e[_SEQ], self._journal_entry(e)) for e in batch])
+                    yield from batch
+                    batch = []
+                    size = min(size * 2, 256)
+            if batch:
+                self._jobs_db.add_entries(job.record, [(e[_SEQ], self._journal_entry(e)) for e in batch])
+                yield from batch
+        finally:
+            entries.close()
+        if complete:
+            job.enumerated = True
+            self._jobs_db.set_job(job.record, state=READY)
+
+    @staticmethod
+    def _journal_entry(entry: dict) -> dict:
+        return {k: entry[k] for k in _JOURNAL_FIELDS + (_SEQ, _COPY) if entry.get(k) is not None}
+
+    def _resumed_entries(self, job: _Job) -> Generator[dict, None, None]:
+        """The recorded entries of a resumed job that are not done yet."""
+        assert self._jobs_db is not None and job.record is not None
+        finished = sum(1 for _, _, state in self._jobs_db.states(job.record) if state in (DONE, SKIPPED))
+        job.seen += finished
+        job.skipped += finished
+        for _, entry, _ in self._jobs_db.entries(job.record, (PENDING, FAILED)):
+            yield entry
+
+    def _clean_partial(self, record: JobRecord) -> None:
+        """
+        Items a crashed or killed run was working on: deletes the files they had started, which
+        --no-part leaves under their final names and yt-dlp would take for finished downloads,
+        and the run's own handoff files (audio pipeline info JSON, moved-file reports).
+        """
+        assert self._jobs_db is not None
+        removed = 0
+        interrupted = self._jobs_db.entries(record.id, (RUNNING,))
+        for seq, _, files in interrupted:
+            removed += remove_files(files)
+            self._jobs_db.set_files(record.id, seq, [])
+            self._jobs_db.set_item(record.id, seq, PENDING)
+        if record.folder:
+            stage_dir = os.path.join(record.folder, ".yt_gui_stage")
+            try:
+                leftovers = [os.path.join(stage_dir, name) for name in os.listdir(stage_dir)]
+            except OSError:
+                leftovers = []
+            try:
+                leftovers += [os.path.join(record.folder, name) for name in os.listdir(record.folder)
+                              if name.startswith(".yt_gui_") and name.endswith(".moved")]
+            except OSError:
+                pass
+            remove_files(leftovers)
+        if interrupted:
+            self._log(f"{len(interrupted)} item(s) were interrupted; removed {removed} partial file(s).")
+
+    def _sync_entries(self, job: _Job, entries: Generator[dict, None, bool]) -> Generator[dict, None, None]:
+        """
+        Sync mode: reads the whole listing, renumbers files whose items moved, optionally prunes
+        items that left the playlist, and yields only the entries that still need downloading.
+        """
+        assert job.index is not None
+        listed: List[dict] = []
+        complete = False
+        try:
+            while True:
+                entry = next(entries)
+                # Positions are fixed up front: file names depend on them, not on what is downloaded
+                listed.append(dict(entry, playlist_index=entry.get("playlist_index") or len(listed) + 1))
+        except StopIteration as done:
+            complete = bool(done.value)
+        finally:
+            entries.close()
+
+        plan = job.index.plan(listed)
+        renamed = job.index.apply_moves(plan.moved, self._log) if plan.moved else 0
+        pruned = 0
+        if plan.removed and job.opt.prune:
+            if complete:
+                pruned = job.index.prune(plan.removed, self._log)
+            else:
+                self._log("Sync: playlist listing is incomplete, not pruning.")
+        job.index.save()
+        kept = len(listed) - len(plan.new)
+        job.seen += kept
+        job.skipped += kept
+        self._log(
+            f"Sync: {len(listed)} listed, {len(plan.new)} to download, {plan.unchanged} unchanged, "
+            f"{renamed} renumbered, {len(plan.removed)} no longer listed" + (f" ({pruned} pruned)." if job.opt.prune else ".")
+        )
+        yield from plan.new
+
+    def _listed_entries(self, opts: List[DownloadOptions], info: dict | None) -> Generator[Tuple[_Job, dict, int], None, None]:
+        """Opens each URL in turn and yields (job, entry, position) as its listing streams in."""
+        crawled: Set[str] = set()  # video ids scheduled by crawls so far
+        for opt in opts:
+            if self._stop_requested:
+                return
+            if opt.crawl:
+                yield from self._crawled_entries(opt, crawled)
+                continue
+            opened = self._open_job(opt, info if len(opts) == 1 else None)
+            if opened is None:
+                self.jobs.append(_Job(opt=opt, kind="unknown", folder="", archive=None, base_cmd=[], failed=1))
+                continue
+            job, entries = opened
+            self.jobs.append(job)
+            try:
+                for i, entry in enumerate(entries, start=1):
+                    if self._stop_requested:
+                        break
+                    yield job, entry, i
+            finally:
+                entries.close()
+            if job.index is None:
+                self._log(f"Enumerated {job.seen} item(s)" + (
+                    f"; {job.skipped} already in the download archive." if job.archive is not None else "."))
+
+    def _crawl_listing(self, opt: DownloadOptions, url: str) -> Tuple[str, List[dict], List[dict], bool]:
+        """(title, videos, nested playlists, complete) listed at url; videos keep their position in it."""
+        info = None if opt.refresh_probe else self.probe_cache.get(url, opt.cookies_from_browser)
+        entries = self._iter_entries(replace(opt, url=url), info)
+        title = (info or {}).get("title") or ""
+        videos: List[dict] = []
+        nested: List[dict] = []
+        complete = False
+        try:
+            while True:
+                entry = next(entries)
+                title = title or entry.get("playlist_title") or entry.get("playlist") or ""
+                if self._is_nested(entry):
+                    nested.append(entry)
+                elif self._is_playlist_entry(entry):
+                    position = len(videos) + len(nested) + 1
+                    videos.append(dict(entry, playlist_index=entry.get("playlist_index") or position))
+                else:
+                    videos.append(entry)
+        except StopIteration as done:
+            complete = done.value is not False
+        finally:
+            entries.close()
+        return title, videos, nested, complete
+
+    def _crawled_entries(self, opt: DownloadOptions, crawled: Set[str]) -> Generator[Tuple[_Job, dict, int], None, None]:
+        """
+        Crawl mode: walks a channel or a playlist of playlists, listing the nested ones
+        opt.crawl_workers at a time. Each one that lists videos becomes a job with its own folder
+        inside the crawled URL's folder. Jobs join the shared pool in the order the channel lists
+        them, each as soon as it and every playlist before it are listed. A video listed again
+        (or already in `crawled`) is marked as a copy: the content store places the file of its
+        first listing instead of downloading it again.
+        """
+        if opt.sync:
+            self._log("Sync is not used when crawling: a playlist folder also holds copies of videos filed elsewhere.")
+            opt = replace(opt, sync=False, prune=False)
+        results: queue.Queue = queue.Queue()
+
+        def visit(key: Tuple[int, ...], url: str, title: str) -> None:
+            try:
+                listed = self._crawl_listing(opt, url)
+            except Exception as e:
+                self._log(f"Crawl: cannot list {url} ({e}).")
+                listed = None
+            results.put((key, url, title, listed))
+
+        self._log(f"Crawling {opt.url} ({max(1, opt.crawl_workers)} listing(s) at a time)...")
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, opt.crawl_workers), thread_name_prefix="crawl")
+        seen_urls = {opt.url}
+        # Position in the channel's listing (indices from the root down): playlists are listed in
+        # any order but scheduled in this one, so the same playlist always owns a shared video
+        unlisted: Set[Tuple[int, ...]] = {()}
+        ready: List[Tuple[Tuple[int, ...], str, str, List[dict]]] = []
+        pool.submit(visit, (), opt.url, "")
+        root_folder = opt.output_dir
+        playlists = videos_total = copies = 0
+        try:
+            while (unlisted or ready) and not self._stop_requested:
+                if not ready or (unlisted and min(unlisted) < ready[0][0]):
+                    try:
+                        key, url, title, listed = results.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    unlisted.discard(key)
+                    if listed is None:
+                        continue
+                    list_title, videos, nested, complete = listed
+                    if not key:
+                        if not videos and not nested:
+                            self._log(f"No entries found for {opt.url}")
+                            self.jobs.append(_Job(opt=opt, kind="unknown", folder="", archive=None, base_cmd=[], failed=1))
+                            return
+                        title = list_title or "Unknown_Channel"
+                        root_folder = os.path.join(opt.output_dir, _safe_title(title))
+                    if not complete and not self._stop_requested:
+                        self._log(f"Crawl: the listing of {title or url} was cut short; crawl again for the rest.")
+                    for n, sub in enumerate(nested):
+                        sub_url = sub.get("url") or sub.get("webpage_url") or ""
+                        if not sub_url or sub_url in seen_urls:
+                            continue
+                        if len(key) + 1 >= _CRAWL_DEPTH:
+                            self._log(f"Crawl: not following {sub_url}, nested too deep.")
+                            continue
+                        seen_urls.add(sub_url)
+                        unlisted.add(key + (n,))
+                        pool.submit(visit, key + (n,), sub_url, sub.get("title") or "")
+                    if videos:
+                        ready.append((key, url, title or list_title or "Unknown_Playlist", videos))
+                        ready.sort(key=lambda r: r[0])
+                    continue
+
+                key, url, title, videos = ready.pop(0)
+                listing: List[dict] = []
+                for v in videos:
+                    if v.get("id") and v["id"] in crawled:
+                        v = dict(v, **{_COPY: True})
+                    elif v.get("id"):
+                        crawled.add(v["id"])
+                    listing.append(v)
+                repeated = sum(1 for v in listing if v.get(_COPY))
+                playlists += 1
+                videos_total += len(listing) - repeated
+                copies += repeated
+                self._log(f"Crawl: {title}: {len(listing)} video(s)" + (
+                    f", {repeated} of them listed earlier (placed from the content store)." if repeated else "."))
+                if not key:
+                    # Videos listed by the crawled URL itself go where a plain run would put them
+                    leaf = replace(opt, crawl=False)
+                else:
+                    leaf = replace(opt, url=url, output_dir=root_folder, crawl=False)
+                if len(listing) == 1 and not self._is_playlist_entry(listing[0]):
+                    leaf_info = listing[0]
+                else:
+                    leaf_info = {"_type": "playlist", "title": title, "entries": listing}
+                opened = self._open_job(leaf, leaf_info)
+                if opened is None:
+                    continue
+                job, entries = opened
+                self.jobs.append(job)
+                try:
+                    for i, entry in enumerate(entries, start=1):
+                        if self._stop_requested:
+                            break
+                        yield job, entry, i
+                finally:
+                    entries.close()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        self._log(f"Crawled {opt.url}: {playlists} playlist(s), {videos_total} video(s)" + (
+            f", {copies} more listed by several playlists." if copies else "."))
+
+    def _claimed_entries(self, shared: WorkQueue, head: DownloadOptions) -> Generator[Tuple[_Job, dict, int], None, None]:
+        """
+        Distributed worker: claims published items one at a time and yields (job, entry, position)
+        until every listing is complete and no item is left. Files a dead worker left of an item
+        it was downloading are removed before the item is downloaded again.
+        """
+        jobs: Dict[int, _Job] = {}
+        waiting = False
+        while not self._stop_requested:
+            claimed = shared.claim()
+            if claimed is None:
+                if shared.drained():
+                    return
+                if not waiting:
+                    self._log("Waiting for items to be published or handed back...")
+                    waiting = True
+                time.sleep(1.0)
+                continue
+            waiting = False
+            record, seq, entry, files, previous = claimed
+            job = jobs.get(record.id)
+            if job is None:
+                job = self._setup_job(worker_options(record.options, head), record.kind, record.folder)
+                job.record = record.id
+                jobs[record.id] = job
+                self.jobs.append(job)
+                self._log(f"Job {record.id}: {record.url} -> {record.folder}")
+            removed = 0
+            if files:
+                # Not done, so whatever an earlier attempt wrote is partial
+                removed = remove_files(files)
+                shared.set_files(record.id, seq, [])
+            if previous:
+                self._log(f"Taking over item {seq} of job {record.id} from {previous}" + (
+                    f"; removed {removed} partial file(s)." if removed else "."))
+            yield job, entry, entry.get("playlist_index") or seq
+
+    def publish(self, opts: List[DownloadOptions], work_queue: str) -> int:
+        """
+        Coordinator of a distributed run: enumerates each URL once into the shared work queue,
+        where workers (run_many with work_queue) claim its items. A URL whose earlier listing is
+        still being worked on is left alone; an interrupted listing is completed.
+        """
+        try:
+            shared = WorkQueue(work_queue)
+        except (OSError, sqlite3.Error) as e:
+            self._log(f"Cannot open the work queue {work_queue} ({e}).")
             return 1
-            
-        entries = info.get("entries")
-        if not entries:
-            self._log("No entries found.")
-            return 0
-            
-        playlist_title = info.get("title", "Unknown_Playlist")
-        safe_title = "".join([c if c.isalnum() or c in (" ", "-", "_", ".") else "_" for c in playlist_title])
-        base_folder = os.path.join(opt.output_dir, safe_title)
-        safe_mkdir(base_folder)
-        
-        self._log(f"Found {len(entries)} items. Destination: {base_folder}")
-        base_cmd = self._get_common_flags(opt)
-
-        def download_item(entry: dict, index: int) -> int:
-            if self._stop_requested: return 1
-            url = entry.get("url") or f"https://www.youtube.com/watch?v={entry.get('id')}"
-            title = entry.get("title", "Video")
-            out_file = os.path.join(base_folder, f"{index:03d} - %(title)s.%(ext)s")
-            cmd = list(base_cmd) + ["--no-playlist", "-o", out_file, url]
-            self._log(f"[{index:03d}] Queuing: {title}")
-            return self._run_cmd(cmd)
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=opt.workers) as executor:
-            futures = []
-            for i, entry in enumerate(entries, start=1):
-                if self._stop_requested: break
-                idx = entry.get("playlist_index") or i
-                futures.append(executor.submit(download_item, entry, idx))
-            concurrent.futures.wait(futures)
-            
+        self._jobs_db = shared
+        rc = 0
+        try:
+            for opt in opts:
+                if self._stop_requested:
+                    break
+                opt = replace(opt, resume=True)
+                if opt.crawl:
+                    # Every playlist found is published as its own job
+                    published = sum(1 for _ in self._crawled_entries(opt, set()))
+                    self._log(f"Published {published} crawled item(s) of {opt.url} to {work_queue}.")
+                    continue
+                left = shared.open_items(self._job_key(opt))
+                if left:
+                    self._log(f"{opt.url} is already published; {left} item(s) not done yet.")
+                    continue
+                opened = self._open_job(opt, None)
+                if opened is None:
+                    rc = 1
+                    continue
+                job, entries = opened
+                published = sum(1 for _ in entries)
+                if job.enumerated:
+                    self._log(f"Published {published} item(s) of {opt.url} to {work_queue}.")
+                else:
+                    rc = 1
+                    self._log(f"The listing of {opt.url} was cut short after {published} item(s); publish again to complete it.")
+        finally:
+            self._jobs_db = None
+            shared.close()
+        return 1 if self._stop_requested else rc
+
+    def run_batch(self, opts: List[DownloadOptions], info: dict | None = None, work_queue: str = "") -> int:
+        """
+        Downloads every URL in opts through one shared worker pool. Items are submitted as each
+        URL is enumerated, so a short playlist never leaves workers idle while a long one runs.
+        Pool, engine and worker settings come from the first options; `info` applies to a single URL.
+        With work_queue, items are claimed from that shared queue instead (distributed worker).
+        """
+        head = opts[0]
+        shared: WorkQueue | None = None
+        self._handoff = ""
+        if work_queue:
+            try:
+                shared = WorkQueue(work_queue, head.lease_s)
+            except (OSError, sqlite3.Error) as e:
+                self._log(f"Cannot open the work queue {work_queue} ({e}).")
+                return 1
+            shared.start()
+            # Other workers write handoff files into the same folders
+            self._handoff = re.sub(r"\W", "_", shared.owner) + "-"
+            self._log(f"Worker {shared.owner}: downloading items from {work_queue} (workers={head.workers})...")
+        else:
+            self._log(f"Preparing parallel download of {len(opts)} URL(s) (workers={head.workers})...")
+        self.jobs = []
+        if self._shared_archives is None:
+            self._archives = {}
+
+        # Auto mode: the pool is sized for the maximum and a limiter holds the current target
+        limiter: ConcurrencyLimiter | None = None
+        pool_size = head.workers
+        if head.auto_workers:
+            pool_size = max(head.min_workers, head.max_workers)
+            limiter = ConcurrencyLimiter(max(head.min_workers, min(head.max_workers, head.workers)))
+            self._tuner = AutoTuner(limiter, self.tracker, self._log, head.min_workers, head.max_workers)
+            self._log(f"Auto workers: starting at {limiter.limit} (bounds {head.min_workers}-{pool_size}).")
+
+        # Job-wide rate limit, redistributed among the running downloads
+        self._bandwidth = None
+        if head.rate_limit_mbps > 0:
+            self._bandwidth = BandwidthBudget(int(head.rate_limit_mbps * MB))
+            self._log(f"Bandwidth budget: {head.rate_limit_mbps:g} MB/s shared by all workers.")
+
+        # Job-wide connections, split between parallel items and the fragments each fetches at once
+        self._connections = None
+        if head.connections > 0:
+            self._connections = ConnectionBudget(head.connections)
+            self._log(f"Connection budget: {head.connections} shared by all workers "
+                      f"({max(1, head.connections // (limiter.limit if limiter is not None else pool_size))} fragment(s) per item, more when fewer items are left).")
+
+        try:
+            self.metrics = MetricsRecorder(expand_path(head.metrics_file) if head.metrics_file.strip() else "")
+        except OSError as e:
+            self._log(f"Cannot write metrics file ({e}); keeping metrics in memory only.")
+            self.metrics = MetricsRecorder()
+        metrics_server: MetricsServer | None = None
+        if head.metrics_port:
+            try:
+                metrics_server = MetricsServer(lambda: self.metrics.prometheus(self.tracker.snapshot().active), head.metrics_port)
+                metrics_server.start()
+                self._log(f"Metrics: http://127.0.0.1:{metrics_server.port}/metrics")
+            except OSError as e:
+                self._log(f"Metrics endpoint unavailable on port {head.metrics_port} ({e}).")
+                metrics_server = None
+
+        # Jobs, their listings and item states, so an interrupted run can be resumed
+        self._jobs_db = shared
+        self._running = {}
+        try:
+            if shared is None:
+                self._jobs_db = JobStore(expand_path(head.job_store) if head.job_store.strip() else "")
+        except (OSError, sqlite3.Error) as e:
+            self._log(f"Job store unavailable ({e}); this run cannot be resumed if interrupted.")
+
+        # Staging: downloads and post-processing on a local scratch disk, finished files moved into place
+        self._scratch = None
+        if head.scratch_dir.strip():
+            try:
+                self._scratch = ScratchSpace(expand_path(head.scratch_dir), head.scratch_keep_free_mb * MB)
+            except OSError as e:
+                self._log(f"Scratch folder unavailable ({e}); writing straight into the output folder.")
+            else:
+                self._log(f"Staging in {self._scratch.path} ({format_bytes(self._scratch.free())} free, "
+                          f"keeping {head.scratch_keep_free_mb} MB free).")
+                if self._scratch.stale:
+                    self._log(f"Removed {len(self._scratch.stale)} scratch folder(s) left by interrupted runs.")
+
+        self._store = None
+        # A crawl places videos listed by several playlists from the store instead of downloading them again
+        if head.dedupe or any(o.crawl for o in opts):
+            store_dir = expand_path(head.store_dir) if head.store_dir.strip() else os.path.join(head.output_dir, STORE_DIRNAME)
+            self._store = ContentStore(store_dir)
+            self._log(f"Content store: {store_dir}")
+
+        transcoder: TranscodeStage | None = None
+        # A worker only learns the jobs' options from the queue
+        if shared is not None or any(o.audio_only for o in opts):
+            transcoder = TranscodeStage(self._transcode_item, lambda: self._stop_requested, head.transcode_workers)
+            self._log(f"Pipeline: {pool_size} download worker(s), {transcoder.workers} transcode worker(s).")
+            transcoder.start()
+        self._transcoder = transcoder
+        self._download_timings = StageTimings("Download")
+
+        outstanding = 0  # submitted but not yet done
+        listed = False  # every URL is enumerated: fewer outstanding items than workers means the end of the run
+        outstanding_lock = threading.Lock()
+
+        def update_slots(delta: int) -> None:
+            nonlocal outstanding
+            with outstanding_lock:
+                outstanding += delta
+                concurrency = limiter.limit if limiter is not None else pool_size
+                for budget in (self._bandwidth, self._connections):
+                    if budget is not None:
+                        budget.set_slots(min(concurrency, outstanding) if listed else concurrency)
+
+        def download_item(item: _Item) -> int:
+            # This run's own limit first, then the host's budget, so a waiting item never holds a shared slot
+            gates = [g for g in (limiter, self._budget) if g is not None]
+            held: List[ConcurrencyLimiter] = []
+            try:
+                if self._stop_requested: return 1
+                for gate in gates:
+                    if not gate.acquire(lambda: self._stop_requested):
+                        return 1
+                    held.append(gate)
+                return self._process_item(item)
+            finally:
+                for gate in reversed(held):
+                    gate.release()
+                update_slots(-1)
+
+        # Failed items wait in the retry queue, off the pool, until their backoff expires
+        self._cooldown = CoolDown()
+        self._errors = {}
+        with self._open_cond:
+            self._open_items = 0
+        retry_futures: Set[concurrent.futures.Future[int]] = set()
+        retry_lock = threading.Lock()
+
+        self._start_engine(head)
+        wall_started = time.monotonic()
+        if self._tuner is not None:
+            self._tuner.start()
+        tag = 0
+        submitted = 0
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=pool_size) as executor:
+                def resubmit(item: _Item) -> None:
+                    update_slots(1)
+                    with retry_lock:
+                        retry_futures.add(executor.submit(download_item, item))
+
+                self._retries = RetryQueue(resubmit)
+                self._retries.start()
+                # Bounded submission window: memory stays flat however long the playlists are
+                window = max(2 * pool_size, 4)
+                in_flight: Set[concurrent.futures.Future[int]] = set()
+                source = self._claimed_entries(shared, head) if shared is not None else self._listed_entries(opts, info)
+                for job, entry, i in source:
+                    job.seen += 1
+                    tag += 1
+                    # A crawl's copy of a video is placed from the content store even once it is archived
+                    if (job.archive is not None and DownloadArchive.entry_key(entry) in job.archive and not entry.get(_COPY)
+                            or job.opt.only_ids and entry.get("id") not in job.opt.only_ids):
+                        job.skipped += 1
+                        if job.record is not None and self._jobs_db is not None and entry.get(_SEQ):
+                            self._jobs_db.set_item(job.record, entry[_SEQ], SKIPPED)
+                        continue
+                    submitted += 1
+                    self.tracker.set_total(submitted)
+                    if len(in_flight) >= window:
+                        _, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    if job.kind == "video" and job.opt is opts[-1]:
+                        listed = True  # a lone video: nothing else will need the connections
+                    update_slots(1)
+                    index = (entry.get("playlist_index") or i) if job.kind == "playlist" else None
+                    item = _Item(job, entry, tag, index)
+                    self.metrics.submitted(tag, item.url, entry.get("id") or "", item.title)
+                    with self._open_cond:
+                        self._open_items += 1
+                    in_flight.add(executor.submit(download_item, item))
+                listed = True
+                update_slots(0)
+                concurrent.futures.wait(in_flight)
+                # Failed items come back through the retry queue, from either stage
+                with self._open_cond:
+                    while self._open_items > 0 and not self._stop_requested:
+                        self._open_cond.wait(0.5)
+                dropped = self._retries.close()
+                if dropped:
+                    self._log(f"{len(dropped)} item(s) were still waiting to be retried.")
+                with retry_lock:
+                    pending = set(retry_futures)
+                concurrent.futures.wait(pending)
+            if self._jobs_db is not None and not self._stop_requested and shared is None:
+                for job in self.jobs:
+                    if job.enumerated:
+                        self._jobs_db.finish(job.key)
+            if shared is not None:
+                _, _, states = shared.counts()
+                self._log("Work queue: " + (", ".join(f"{n} {state}" for state, n in sorted(states.items())) or "empty") + ".")
+            if transcoder is not None:
+                transcoder.close()
+                self._log(f"Stage timings (wall {time.monotonic() - wall_started:.1f}s):")
+                self._log("  " + self._download_timings.summary())
+                self._log("  " + transcoder.timings.summary())
+                for job in self.jobs:
+                    if job.stage_dir:
+                        try:
+                            os.rmdir(job.stage_dir)
+                        except OSError:
+                            pass
+        finally:
+            if self._tuner is not None:
+                self._tuner.stop()
+                self._tuner = None
+            if self._engine is not None:
+                self._engine.close()
+                self._engine = None
+            self._transcoder = None
+            self._bandwidth = None
+            self._connections = None
+            self._store = None
+            if self._scratch is not None:
+                self._scratch.close()
+                self._scratch = None
+            if self._retries is not None:
+                self._retries.close()
+                self._retries = None
+            self._cooldown = None
+            if self._jobs_db is not None:
+                self._jobs_db.close()
+                self._jobs_db = None
+            for job in self.jobs:
+                if job.index is not None:
+                    job.index.save()
+            if metrics_server is not None:
+                metrics_server.stop()
+            self.metrics.close()
+
+        reused = sum(job.reused for job in self.jobs)
+        if reused:
+            self._log(f"Content store: {reused} item(s) reused, {format_bytes(sum(job.reused_bytes for job in self.jobs))} "
+                      f"and ~{sum(job.saved_seconds for job in self.jobs):.0f}s of downloading saved.")
+        for line in self.metrics.summary_lines():
+            self._log(line)
+        if shared is None:
+            # A worker's failures stay in the queue, next to those of the other workers
+            self._write_failed_report(head)
         self._log("Parallel download finished.")
+        return 1 if self._stop_requested or any(job.failed for job in self.jobs) else 0
+
+    def _write_failed_report(self, head: DownloadOptions) -> None:
+        """
+        Lists the items that failed for good, and why, as JSON that main_cli.py --retry-failed
+        can run again. Runs sharing an output folder share the report: the entries of the URLs
+        this run went through are replaced by its own failures, those of other URLs are kept,
+        and the report is removed once nothing in it has failed.
+        """
+        path = os.path.join(head.output_dir, FAILED_REPORT_NAME)
+        failures = [f for job in self.jobs for f in job.failures]
+        self.failed_report = ""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                earlier = json.load(f).get("items") or []
+        except (OSError, ValueError, AttributeError):
+            earlier = []
+        # A stopped run did not get through its URLs: only the items that failed again are replaced
+        settled = set() if self._stop_requested else {(job.opt.url, job.opt.output_dir) for job in self.jobs if job.kind != "unknown"}
+        renewed = {(f["url"], f["output_dir"], f["id"]) for f in failures}
+        kept = [f for f in earlier if isinstance(f, dict)
+                and (f.get("url"), f.get("output_dir")) not in settled
+                and (f.get("url"), f.get("output_dir"), f.get("id")) not in renewed]
+        items = kept + failures
+        if not items:
+            if not self._stop_requested and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return
+        if not failures and len(kept) == len(earlier):
+            self.failed_report = path  # nothing of ours in it: leave the file as it is
+            return
+        report = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"), "items": items}
+        try:
+            safe_mkdir(head.output_dir)
+            fd, tmp = tempfile.mkstemp(prefix=FAILED_REPORT_NAME + ".", suffix=".tmp", dir=head.output_dir)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=1)
+                os.replace(tmp, path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+        except OSError as e:
+            self._log(f"Could not write the failed-items report ({e}).")
+            return
+        self.failed_report = path
+        if not failures:
+            return
+        kinds: Dict[str, int] = {}
+        for f in failures:
+            kinds[f["kind"]] = kinds.get(f["kind"], 0) + 1
+        self._log(f"{len(failures)} item(s) failed (" + ", ".join(f"{n} {k}" for k, n in sorted(kinds.items())) + f"). Report: {path}")
+        self._log(f'  Retry them with: python main_cli.py --retry-failed "{path}"')
+
+    def _process_item(self, item: _Item) -> int:
+        job = item.job
+        if self._cooldown is not None:
+            self._cooldown.wait(lambda: self._stop_requested)
+        self._log(f"[{item.tag:03d}] " + (f"Retry {item.attempt}: " if item.attempt else "Queuing: ") + item.title)
+        self._running[item.tag] = item
+        self._set_item_state(item, RUNNING)
+        self._emit(item.tag, ProgressEvent(ITEM_STARTED, index=item.tag, video_id=item.entry.get("id") or "", title=item.title))
+        item.started = time.monotonic()
+        if self.metrics is not None:
+            self.metrics.mark(item.tag, "started")
+        if self._store is not None:
+            key = content_key(item.entry, self._output_options(job.opt))
+            stored = self._store.claim(key, lambda: self._stop_requested) if key else None
+            if stored is not None and self._reuse_item(item, key, stored):
+                return 0
+            item.key = key if stored is None else None
+        if self._scratch is not None and job.scratch:
+            def waiting(free: int) -> None:
+                self._log(f"[{item.tag:03d}] Scratch space low ({format_bytes(free)} free); waiting for downloads in progress.")
+            if not self._scratch.reserve(item.tag, estimate_size(item.entry, job.opt.audio_only),
+                                         lambda: self._stop_requested, waiting):
+                self._finish_item(item, 1)
+                return 1
+        if not job.stage_dir or self._transcoder is None:
+            rc = self._download(job.base_cmd, ["--no-playlist", "-o", item.out_template] + self._moved_args(item) + [item.url], item.tag)
+            self._finish_item(item, rc)
+            return rc
+
+        # "infojson:<stem>.%(ext)s" makes yt-dlp write <stem>.info.json
+        stem = os.path.join(job.stage_dir, f"{self._handoff}{item.tag:05d}")
+        info_json = stem + ".info.json"
+        started = time.monotonic()
+        rc = self._download(job.fetch_cmd, ["--no-playlist", "-o", item.out_template, "-o", f"infojson:{stem}.%(ext)s", item.url], item.tag)
+        self._download_timings.record(time.monotonic() - started, rc == 0)
+        if rc == 0 and not os.path.exists(info_json):
+            rc = 1
+        if self.metrics is not None:
+            self.metrics.mark(item.tag, "transcode_queued")
+        if rc != 0 or not self._transcoder.submit(TranscodeJob(item, info_json, item.out_template)):
+            self._finish_item(item, rc or 1)
+            return rc or 1
         return 0
 
+    def _transcode_item(self, tjob: TranscodeJob) -> int:
+        item: _Item = tjob.item
+        if self.metrics is not None:
+            self.metrics.mark(item.tag, "transcode_started")
+        # The source file is already on disk, so yt-dlp skips the download and only post-processes
+        rc = self._download(item.job.convert_cmd, ["--load-info-json", tjob.info_json, "-o", tjob.out_file] + self._moved_args(item),
+                            item.tag, fetch=False)
+        try:
+            os.remove(tjob.info_json)
+        except OSError:
+            pass
+        self._finish_item(item, rc)
+        return rc
+
+    @staticmethod
+    def _output_options(opt: DownloadOptions) -> dict:
+        """Options that change the produced file, for content store keys."""
+        return {
+            "audio_only": opt.audio_only,
+            "audio_format": (opt.audio_format.strip() or "mp3") if opt.audio_only else "",
+            "embed_metadata": opt.embed_metadata,
+            "subs_langs": (opt.subs_langs.strip() or "en.*") if opt.subtitles else "",
+        }
+
+    def _reuse_item(self, item: _Item, key: str, stored: StoredItem) -> bool:
+        """Places a stored file into the item's folder; False if that failed and it must be downloaded."""
+        assert self._store is not None
+        job = item.job
+        name = renumbered(stored.name, item.index) if item.index is not None else stored.name
+        dest = os.path.join(job.folder, name)
+        try:
+            method = self._store.materialize(key, dest)
+        except OSError as e:
+            self._log(f"[{item.tag:03d}] Content store: could not place {name} ({e}); downloading it.")
+            return False
+        self._log(f"[{item.tag:03d}] From content store ({method}): {name}")
+        with job.lock:
+            job.reused += 1
+            job.reused_bytes += stored.size
+            job.saved_seconds += stored.seconds
+        self._finish_item(item, 0, dest)
+        return True
+
+    def _moved_report(self, item: _Item) -> str:
+        return os.path.join(item.job.scratch or item.job.folder, f".yt_gui_{self._handoff}{item.tag:05d}.moved")
+
+    def _moved_args(self, item: _Item) -> List[str]:
+        """Sync, content store and staging: have yt-dlp report where the item's final file ended up."""
+        if item.job.index is None and item.key is None and not item.job.scratch:
+            return []
+        # The report path is an output template itself, so '%' must be escaped
+        return ["--print-to-file", "after_move:%(.{id,filepath})j", self._moved_report(item).replace("%", "%%")]
+
+    def _read_moved_report(self, item: _Item) -> str:
+        """The final file yt-dlp reported for the item (see _moved_args), "" if none; removes the report."""
+        report = self._moved_report(item)
+        try:
+            with open(report, "r", encoding="utf-8") as f:
+                filepath = json.loads(f.readline()).get("filepath") or ""
+            os.remove(report)
+        except (OSError, ValueError, AttributeError):
+            return ""
+        return filepath
+
+    def _place_staged(self, item: _Item) -> str:
+        """
+        Staging: moves the item's finished file, and any files yt-dlp kept next to it (subtitles
+        it could not embed), from scratch into the job's folder. Returns the final path, "" if
+        that failed.
+        """
+        job = item.job
+        src = self._read_moved_report(item)
+        if not src:
+            self._log(f"[{item.tag:03d}] yt-dlp did not report a finished file; nothing to move into place.")
+            return ""
+        stem = os.path.splitext(os.path.basename(src))[0] + "."
+        folder = os.path.dirname(src)
+        try:
+            extras = [name for name in os.listdir(folder)
+                      if name.startswith(stem) and os.path.join(folder, name) != src]
+        except OSError:
+            extras = []
+        dest = os.path.join(job.folder, os.path.relpath(src, job.scratch))
+        try:
+            move_into_place(src, dest)
+            for name in extras:
+                move_into_place(os.path.join(folder, name), os.path.join(os.path.dirname(dest), name))
+        except OSError as e:
+            self._log(f"[{item.tag:03d}] Could not move {os.path.basename(src)} into {job.folder} ({e}).")
+            return ""
+        return dest
+
+    def _retry_or_fail(self, item: _Item, rc: int) -> bool:
+        """
+        Sorts a failed attempt by kind and requeues the item with backoff if that kind is worth
+        retrying. Returns True if requeued; otherwise records the failure for the report.
+        """
+        with self._errors_lock:
+            errors = self._errors.pop(item.tag, [])
+        kind = classify(errors)
+        job = item.job
+        limit = retry_limit(kind, job.opt.retries)
+        error = ([e for e in errors if e.startswith("ERROR:")] or errors or [f"yt-dlp exited with code {rc}"])[-1]
+        if self._stop_requested:
+            # Interrupted, not failed: a resumed run picks it up again
+            self._set_item_state(item, PENDING)
+            return False
+        if self._retries is not None and item.attempt < limit:
+            item.attempt += 1
+            delay = backoff(kind, item.attempt, job.opt.retry_delay)
+            with job.lock:
+                job.retried += 1
+            if self.metrics is not None:
+                self.metrics.note_retry(item.tag)
+            self._log(f"[{item.tag:03d}] Failed ({kind}); retry {item.attempt}/{limit} in {delay:.0f}s.")
+            self._set_item_state(item, PENDING, error)
+            self._retries.schedule(item, delay)
+            return True
+        self._set_item_state(item, FAILED, error)
+        with job.lock:
+            job.failures.append({
+                "url": job.opt.url, "output_dir": job.opt.output_dir, "id": item.entry.get("id") or "",
+                "item_url": item.url, "title": item.title, "index": item.index, "kind": kind,
+                "error": error, "attempts": item.attempt + 1,
+            })
+        return False
+
+    def _set_item_state(self, item: _Item, state: str, error: str = "") -> None:
+        if self._jobs_db is None or item.job.record is None or not item.seq:
+            return
+        try:
+            self._jobs_db.set_item(item.job.record, item.seq, state, error, attempt=state == RUNNING)
+        except sqlite3.Error as e:
+            self._log(f"[{item.tag:03d}] Job store: {e}")
+
+    def _note_file(self, tag: int, path: str) -> None:
+        """yt-dlp announced a file for the item; recorded so a failed or interrupted attempt can be cleaned up."""
+        item = self._running.get(tag)
+        if item is None or path in item.files:
+            return
+        item.files.append(path)
+        if self._jobs_db is not None and item.job.record is not None and item.seq:
+            try:
+                self._jobs_db.set_files(item.job.record, item.seq, item.files)
+            except sqlite3.Error:
+                pass
+
+    def _discard_files(self, item: _Item) -> None:
+        """Deletes what a failed attempt wrote: with --no-part a partial file looks finished to yt-dlp."""
+        if item.files:
+            removed = remove_files(item.files)
+            if removed:
+                self._log(f"[{item.tag:03d}] Removed {removed} partial file(s).")
+            item.files = []
+            if self._jobs_db is not None and item.job.record is not None and item.seq:
+                try:
+                    self._jobs_db.set_files(item.job.record, item.seq, [])
+                except sqlite3.Error:
+                    pass
+
+    def _finish_item(self, item: _Item, rc: int, filepath: str = "") -> None:
+        """filepath: where the item's file is, when known without yt-dlp's report (content store)."""
+        job = item.job
+        reused = bool(filepath)  # only a content store hit passes the file in
+        if rc == 0 and job.scratch and not reused:
+            filepath = self._place_staged(item)
+            rc = 0 if filepath else 1
+        if self._scratch is not None:
+            self._scratch.release(item.tag)
+        if rc != 0:
+            self._discard_files(item)
+        if rc != 0 and self._retry_or_fail(item, rc):
+            try:
+                os.remove(self._moved_report(item))
+            except OSError:
+                pass
+            if item.key is not None and self._store is not None:
+                # Other playlists listing the same video may go ahead meanwhile
+                self._store.release(item.key)
+                item.key = None
+            return
+        self._running.pop(item.tag, None)
+        if rc == 0:
+            with self._errors_lock:
+                self._errors.pop(item.tag, None)
+            self._set_item_state(item, DONE)
+        if rc == 0 and job.archive is not None:
+            started = time.monotonic()
+            job.archive.add(DownloadArchive.entry_key(item.entry))
+            if self.metrics is not None:
+                self.metrics.add_phase(item.tag, "archive", time.monotonic() - started)
+        if not filepath and (job.index is not None or item.key is not None):
+            filepath = self._read_moved_report(item)
+        if rc == 0 and filepath:
+            if job.index is not None:
+                job.index.record(item.entry.get("id") or "", filepath, item.index, item.title)
+            if item.key is not None and self._store is not None:
+                self._store.add(item.key, filepath, unnumbered(os.path.basename(filepath)), time.monotonic() - item.started)
+        if item.key is not None and self._store is not None:
+            self._store.release(item.key)
+            item.key = None
+        if self.metrics is not None:
+            self.metrics.finish(item.tag, rc, reused)
+        with self._open_cond:
+            self._open_items -= 1
+            self._open_cond.notify_all()
+        with job.lock:
+            if rc == 0:
+                job.completed += 1
+            else:
+                job.failed += 1
+        kind = ITEM_FINISHED if rc == 0 else ITEM_FAILED
+        self._emit(item.tag, ProgressEvent(kind, index=item.tag, video_id=item.entry.get("id") or "", title=item.title))
+
+    def summary(self) -> List[dict]:
+        """Per-URL results of the last parallel run, for machine-readable reports."""
+        return [job.summary() for job in self.jobs]
+
     def run(self, opt: DownloadOptions) -> int:
+        return self.run_many([opt])
+
+    def run_many(self, opts: List[DownloadOptions], work_queue: str = "", publish: bool = False) -> int:
+        """
+        Runs one or more URLs. With several workers all URLs share one pool (see run_batch).
+        With work_queue, publishes the URLs to that shared queue (publish) or, as a worker,
+        downloads items claimed from it using the first options' worker settings.
+        """
         self._stop_requested = False
         with self._proc_lock:
              self._active_procs.clear()
+        self.tracker.reset()
+        self._current_item = None
+        head = opts[0]
+        self._audio_format = (head.audio_format.strip() or "mp3") if head.audio_only else ""
+        self._audio_actions = {"remux": 0, "transcode": 0}
+        self.jobs = []
+        self.metrics = None
         
         self.check_deps()
-        resolved_type = self.probe_url_type(opt.url, opt.cookies_from_browser) if opt.mode == "auto" else opt.mode
+        if head.cookies_from_browser and self._cookie_cache is not None:
+            self._cookies = self._cookie_cache.get(head.cookies_from_browser, head.url, self._log)
+        elif head.cookies_from_browser:
+            self._cookies = CookieJarExport.export(head.cookies_from_browser, head.url, self._log)
+        try:
+            if work_queue and publish:
+                return self.publish(opts, work_queue)
+            if work_queue:
+                rc = self.run_batch(opts[:1], work_queue=work_queue)
+                self._log_audio_summary()
+                return rc
+            if len(opts) > 1 and self._item_by_item(head):
+                rc = self.run_batch(opts)
+                self._log_audio_summary()
+                return rc
+            rc = 0
+            for opt in opts:
+                if self._stop_requested:
+                    break
+                rc = max(rc, self._run_job(opt))
+            return rc
+        finally:
+            if self._cookies is not None:
+                # A cached jar's view only removes this run's worker copies
+                self._cookies.cleanup()
+            self._cookies = None
+
+    @staticmethod
+    def _item_by_item(opt: DownloadOptions) -> bool:
+        # Sync, dedupe, id filters and staging need run_batch even with one worker, so every file can be tracked;
+        # a crawl feeds every playlist it finds into one pool
+        return (opt.workers > 1 or opt.auto_workers or opt.sync or opt.dedupe or bool(opt.only_ids)
+                or bool(opt.scratch_dir.strip()) or opt.crawl)
+
+    def _run_job(self, opt: DownloadOptions) -> int:
+        parallel = self._item_by_item(opt)
+        if opt.mode == "auto" and parallel:
+            # No separate probe: run_batch streams the listing and tells a video from a playlist
+            resolved_type = "auto"
+        elif opt.mode == "auto":
+            resolved_type = self.probe_url_type(opt.url, opt.cookies_from_browser, opt.refresh_probe)
+        else:
+            resolved_type = opt.mode
+
+        if parallel and (resolved_type in ("auto", "playlist") or opt.scratch_dir.strip() or opt.crawl):
+            rc = self.run_batch([opt])
+        elif self._budget is not None:
+            # One process downloading item after item: one slot of the shared budget
+            if not self._budget.acquire(lambda: self._stop_requested):
+                return 1
+            try:
+                rc = self._run_single(opt, resolved_type)
+            finally:
+                self._budget.release()
+        else:
+            rc = self._run_single(opt, resolved_type)
+        self._log_audio_summary()
+        return rc
 
-        if resolved_type == "playlist" and opt.workers > 1:
-            return self.run_parallel(opt)
+    def _log_audio_summary(self) -> None:
+        with self._audio_lock:
+            remuxed, transcoded = self._audio_actions["remux"], self._audio_actions["transcode"]
+        if remuxed or transcoded:
+            self._log(f"Audio: {remuxed} remuxed without re-encoding, {transcoded} transcoded.")
 
+    def _run_single(self, opt: DownloadOptions, resolved_type: str) -> int:
         cmd = self.build_cmd(opt, resolved_type)
+        if opt.rate_limit_mbps > 0:
+            # One process: the whole budget is its own limit
+            cmd[1:1] = ["--limit-rate", str(int(opt.rate_limit_mbps * MB))]
+        if opt.connections > 1:
+            # Items are fetched one after another, so each may use every connection for its fragments
+            cmd[1:1] = ["--concurrent-fragments", str(opt.connections)]
         self._log("Running:\n  " + " ".join(cmd) + "\n")
         
         # Compatibility with legacy self.proc
@@ -197,14 +1683,10 @@ class YtDlpRunner:
             text=True, bufsize=1, universal_newlines=True
         )
         self._register_proc(self.proc)
-        
-        assert self.proc.stdout is not None
-        for line in self.proc.stdout:
-            if self._stop_requested:
-                self.proc.terminate()
-                break
-            self._log(line.rstrip("\n"))
+        self._read_output(self.proc, None)
 
         rc = self.proc.wait()
         self._unregister_proc(self.proc)
+        if self._current_item is not None:
+            self._emit(self._current_item, ProgressEvent(ITEM_FINISHED if rc == 0 else ITEM_FAILED))
         return rc
@@ -0,0 +1,500 @@
+import itertools
+import json
+import os
+import queue
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+from .archive import DownloadArchive
+from .autotune import ConcurrencyLimiter
+from .cache import ProbeCache
+from .config import DownloadOptions
+from .cookies import CookieJarCache
+from .progress import ProgressSnapshot
+from .runner import YtDlpRunner
+from .utils import expand_path
+
+DEFAULT_PORT = 8765
+_LOG_KEEP = 5000  # log lines kept per job for clients that (re)connect
+_KEEP_JOBS = 100  # finished jobs kept for listing
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"  # exit code 0
+FAILED = "failed"
+CANCELLED = "cancelled"
+_DONE_STATES = (FINISHED, FAILED, CANCELLED)
+
+# Required DownloadOptions fields a request may leave out
+_OPTION_DEFAULTS = {
+    "output_dir": ".", "mode": "auto", "audio_only": False, "audio_format": "mp3", "subtitles": False,
+    "subs_langs": "en.*", "embed_metadata": True, "download_archive": "", "cookies_from_browser": "",
+}
+# Options naming files or folders on the service's machine; they must stay inside its root
+_PATH_OPTIONS = ("output_dir", "download_archive", "store_dir", "metrics_file", "job_store", "scratch_dir")
+_CHOICES = {"mode": ("auto", "playlist", "video"), "engine": ("subprocess", "inprocess")}
+
+
+def _check_type(name: str, kind: Any, value: Any) -> None:
+    if kind is bool:
+        ok = isinstance(value, bool)
+    elif kind is int:
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    elif kind is float:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif kind is str:
+        ok = isinstance(value, str)
+    else:  # List[str]
+        ok = isinstance(value, list) and all(isinstance(v, str) for v in value)
+    if not ok:
+        raise ValueError(f"{name}: expected {getattr(kind, '__name__', 'a list of strings')}, got {json.dumps(value)}")
+
+
+def _inside(root: str, name: str, value: str) -> str:
+    """value resolved against root; a path leading out of root (.., links, absolute) is refused."""
+    path = os.path.realpath(os.path.join(root, os.path.expanduser(value.strip())))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"{name}: {value} is outside the service's folder {root}")
+    return path
+
+
+def options_from_json(data: Any, root: str) -> List[DownloadOptions]:
+    """
+    DownloadOptions from a request body: one options object or a list of them. Values are
+    checked against the option types, and paths are resolved inside `root`. Raises ValueError.
+    """
+    items = data if isinstance(data, list) else [data]
+    types = {f.name: f.type for f in fields(DownloadOptions)}
+    root = os.path.realpath(root)
+    opts = []
+    for item in items:
+        if not isinstance(item, dict) or not str(item.get("url") or "").strip():
+            raise ValueError("every job needs a url")
+        unknown = set(item) - set(types)
+        if unknown:
+            raise ValueError("unknown options: " + ", ".join(sorted(unknown)))
+        values = {**_OPTION_DEFAULTS, **item}
+        for name, value in values.items():
+            _check_type(name, types[name], value)
+            if name in _CHOICES and value not in _CHOICES[name]:
+                raise ValueError(f"{name}: one of " + ", ".join(_CHOICES[name]))
+        for name in _PATH_OPTIONS:
+            if values.get(name, "").strip() or name == "output_dir":
+                values[name] = _inside(root, name, values[name])
+        # BROWSER[+KEYRING][:PROFILE][::CONTAINER]; a profile given as a path would read any folder
+        if re.search(r"[/\\]", values["cookies_from_browser"].split("::")[0]):
+            raise ValueError("cookies_from_browser: give the browser profile by name, not by path")
+        opts.append(DownloadOptions(**values))
+    if not opts:
+        raise ValueError("no jobs given")
+    return opts
+
+
+class LogBuffer(queue.Queue):
+    """
+    Log sink handed to a job's runner in place of its log queue. Keeps the most recent lines
+    numbered, so any number of clients can follow a job and pick up where they left off.
+    """
+
+    def __init__(self, keep: int = _LOG_KEEP) -> None:
+        super().__init__()
+        self._lines: Deque[Tuple[int, str]] = deque(maxlen=keep)
+        self._next = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item: str, block: bool = True, timeout: float | None = None) -> None:
+        with self._cond:
+            self._lines.append((self._next, item))
+            self._next += 1
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def since(self, seq: int, wait: float = 0.0) -> Tuple[List[Tuple[int, str]], int, bool]:
+        """
+        (number, line) from number seq on, waiting up to `wait` seconds for one; the next number;
+        and whether the log is closed. Lines older than the kept window are skipped.
+        """
+        with self._cond:
+            if wait > 0 and self._next <= seq and not self._closed:
+                self._cond.wait(wait)
+            return [(n, line) for n, line in self._lines if n >= seq], self._next, self._closed
+
+
+@dataclass
+class ServiceJob:
+    id: str
+    opts: List[DownloadOptions]
+    runner: YtDlpRunner
+    log: LogBuffer
+    state: str = QUEUED
+    rc: int | None = None
+    error: str = ""
+    submitted: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    future: "Future[None] | None" = None
+
+    def describe(self, detail: bool = False) -> dict:
+        out = {
+            "id": self.id, "state": self.state, "rc": self.rc, "urls": [o.url for o in self.opts],
+            "submitted": self.submitted, "started": self.started, "finished": self.finished,
+            "progress": asdict(self.runner.tracker.snapshot()),
+        }
+        if detail:
+            out["error"] = self.error
+            out["results"] = self.runner.summary()
+            out["metrics"] = self.runner.metrics.summary() if self.runner.metrics is not None else None
+            out["failed_report"] = self.runner.failed_report
+        return out
+
+
+class DownloadService:
+    """
+    Runs submitted jobs in this process, up to `max_jobs` at once, all drawing item slots from
+    one budget of `workers`. Probe results, loaded download archives and exported cookies stay
+    warm between jobs. Jobs only write inside `root`. Thread-safe; the HTTP front end is ServiceServer.
+    """
+
+    def __init__(self, workers: int = 8, max_jobs: int = 4, root: str = "downloads") -> None:
+        self.root = expand_path(root)
+        self.probe_cache = ProbeCache()
+        self.archives: Dict[str, DownloadArchive] = {}
+        self.cookies = CookieJarCache()
+        self.budget = ConcurrencyLimiter(workers)
+        self.max_jobs = max(1, max_jobs)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="yt_gui_job")
+        self._jobs: Dict[str, ServiceJob] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def submit(self, opts: List[DownloadOptions]) -> ServiceJob:
+        log = LogBuffer()
+        runner = YtDlpRunner(log, probe_cache=self.probe_cache, archives=self.archives,
+                             cookie_cache=self.cookies, budget=self.budget)
+        with self._lock:
+            job = ServiceJob(id=str(next(self._ids)), opts=opts, runner=runner, log=log)
+            self._jobs[job.id] = job
+            self._trim()
+        job.future = self._pool.submit(self._run, job)
+        return job
+
+    def _trim(self) -> None:
+        done = [job_id for job_id, job in self._jobs.items() if job.state in _DONE_STATES]
+        for job_id in done[:max(0, len(done) - _KEEP_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: ServiceJob) -> None:
+        with self._lock:
+            if job.state == CANCELLED:
+                return
+            job.state, job.started = RUNNING, time.time()
+        try:
+            job.rc = job.runner.run_many(job.opts)
+        except Exception as e:
+            job.error = str(e)
+            job.log.put(f"ERROR: {e}")
+            job.rc = 1
+        with self._lock:
+            if job.state != CANCELLED:
+                job.state = FINISHED if job.rc == 0 else FAILED
+            job.finished = time.time()
+        job.log.close()
+
+    def get(self, job_id: str) -> ServiceJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[ServiceJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """Stops a running job or drops a queued one; False if there is no such unfinished job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in _DONE_STATES:
+                return False
+            queued = job.state == QUEUED
+            job.state = CANCELLED
+            if queued:
+                job.finished = time.time()
+        if queued:
+            job.log.put("Cancelled before it started.")
+            job.log.close()
+        else:
+            job.runner.stop()
+        return True
+
+    def close(self) -> None:
+        for job in self.list():
+            self.cancel(job.id)
+        self._pool.shutdown(wait=True)
+        self.cookies.cleanup()
+
+
+class ServiceServer:
+    """
+    HTTP/JSON front end of a DownloadService, in a background thread:
+
+      GET    /health                     service status
+      GET    /jobs                       all jobs
+      POST   /jobs                       submit: {"options": [<DownloadOptions fields>, ...]}
+      GET    /jobs/<id>                  one job, with results and metrics when done
+      POST   /jobs/<id>/cancel           (or DELETE /jobs/<id>) stop or drop it
+      GET    /jobs/<id>/log?after=N&wait=S   log lines from number N, waiting up to S seconds
+      GET    /jobs/<id>/stream?after=N   JSON lines: log and progress records until the job ends
+
+    With a token, every request needs "Authorization: Bearer <token>".
+    """
+
+    def __init__(self, service: DownloadService, port: int = DEFAULT_PORT, host: str = "127.0.0.1", token: str = "") -> None:
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, body: Any) -> None:
+                data = (json.dumps(body) + "\n").encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _route(self) -> Tuple[List[str], Dict[str, str]] | None:
+                if token and self.headers.get("Authorization", "") != f"Bearer {token}":
+                    self._send(401, {"error": "unauthorized"})
+                    return None
+                parts = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                return [p for p in parts.path.split("/") if p], query
+
+            def _job(self, job_id: str) -> ServiceJob | None:
+                job = service.get(job_id)
+                if job is None:
+                    self._send(404, {"error": f"no job {job_id}"})
+                return job
+
+            def do_GET(self) -> None:
+                routed = self._route()
+                if routed is None:
+                    return
+                path, query = routed
+                if path == ["health"]:
+                    self._send(200, {"ok": True, "jobs": len(service.list()), "workers": service.budget.limit,
+                                     "busy": service.budget.running, "max_jobs": service.max_jobs})
+                elif path == ["jobs"]:
+                    self._send(200, {"jobs": [job.describe() for job in service.list()]})
+                elif len(path) == 2 and path[0] == "jobs":
+                    job = self._job(path[1])
+                    if job is not None:
+                        self._send(200, job.describe(detail=True))
+                elif len(path) == 3 and path[0] == "jobs" and path[2] in ("log", "stream"):
+                    job = self._job(path[1])
+                    if job is None:
+                        return
+                    try:
+                        after = int(query.get("after", 0))
+                        wait = min(60.0, float(query.get("wait", 0)))
+                    except ValueError:
+                        self._send(400, {"error": "after and wait must be numbers"})
+                        return
+                    if path[2] == "log":
+                        lines, after, _ = job.log.since(after, wait)
+                        self._send(200, {"lines": [line for _, line in lines], "next": after, "state": job.state})
+                    else:
+                        self._stream(job, after)
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def _stream(self, job: ServiceJob, after: int) -> None:
+                # No Content-Length: the body ends when the job does and the connection closes
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                last_progress = 0.0
+                try:
+                    while True:
+                        lines, after, closed = job.log.since(after, wait=1.0)
+                        out = [{"type": "log", "n": n, "line": line} for n, line in lines]
+                        if time.monotonic() - last_progress >= 1.0 or closed:
+                            last_progress = time.monotonic()
+                            out.append({"type": "progress", **asdict(job.runner.tracker.snapshot())})
+                        if closed and not lines:
+                            out.append({"type": "end", **job.describe(detail=True)})
+                        self.wfile.write("".join(json.dumps(rec) + "\n" for rec in out).encode("utf-8"))
+                        self.wfile.flush()
+                        if closed and not lines:
+                            return
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def do_POST(self) -> None:
+                routed = self._route()
+                if routed is None:
+                    return
+                path, _ = routed
+                if path == ["jobs"]:
+                    try:
+                        length = int(self.headers.get("Content-Length") or 0)
+                        body = json.loads(self.rfile.read(length) or b"{}")
+                        opts = options_from_json(body.get("options") if isinstance(body, dict) and "options" in body else body,
+                                                 service.root)
+                    except ValueError as e:
+                        self._send(400, {"error": str(e)})
+                        return
+                    job = service.submit(opts)
+                    self._send(201, job.describe())
+                elif len(path) == 3 and path[0] == "jobs" and path[2] == "cancel":
+                    self._cancel(path[1])
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_DELETE(self) -> None:
+                routed = self._route()
+                if routed is None:
+                    return
+                path, _ = routed
+                if len(path) == 2 and path[0] == "jobs":
+                    self._cancel(path[1])
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def _cancel(self, job_id: str) -> None:
+                if self._job(job_id) is not None:
+                    self._send(200, {"cancelled": service.cancel(job_id)})
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _RemoteTracker:
+    def __init__(self) -> None:
+        self._snap = ProgressSnapshot(0, 0, 0, 0, 0, 0.0, 0.0)
+
+    def snapshot(self) -> ProgressSnapshot:
+        return self._snap
+
+
+class _RemoteMetrics:
+    def __init__(self, summary: dict) -> None:
+        self._summary = summary
+
+    def summary(self) -> dict:
+        return self._summary
+
+
+class RemoteRunner:
+    """
+    Runs jobs on a download service instead of in this process. Offers the part of YtDlpRunner's
+    interface the GUI and CLI use (run, run_many, stop, tracker, summary, metrics), so either
+    can be a client of a service by swapping the runner.
+    """
+
+    def __init__(self, log_queue: queue.Queue[str], server: str, token: str = "") -> None:
+        self.log_queue = log_queue
+        self.server = server.rstrip("/")
+        if "://" not in self.server:
+            self.server = "http://" + self.server
+        self.token = token
+        self.tracker = _RemoteTracker()
+        self.metrics: _RemoteMetrics | None = None
+        self.failed_report = ""
+        self._job_id: str | None = None
+        self._results: List[dict] = []
+
+    def _request(self, method: str, path: str, body: Any = None, timeout: float | None = 30.0):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(self.server + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        return urllib.request.urlopen(req, timeout=timeout)
+
+    def _call(self, method: str, path: str, body: Any = None) -> dict:
+        try:
+            with self._request(method, path, body) as resp:
+                return json.loads(resp.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            try:
+                detail = json.loads(e.read()).get("error") or e.reason
+            except ValueError:
+                detail = e.reason
+            raise RuntimeError(f"{self.server}: {detail}") from None
+        except (urllib.error.URLError, OSError) as e:
+            raise RuntimeError(f"Cannot reach the download service at {self.server} ({e})") from None
+
+    def run(self, opt: DownloadOptions) -> int:
+        return self.run_many([opt])
+
+    def run_many(self, opts: List[DownloadOptions]) -> int:
+        self.metrics, self.failed_report, self._results = None, "", []
+        job = self._call("POST", "/jobs", {"options": [asdict(o) for o in opts]})
+        self._job_id = job["id"]
+        self.log_queue.put(f"Submitted to {self.server} as job {self._job_id}.")
+        after = 0
+        while True:
+            try:
+                end = self._follow(after)
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                raise RuntimeError(f"Lost the connection to {self.server} ({e})") from None
+            if isinstance(end, dict):
+                break
+            after = end  # the stream broke off; reconnect from the next line
+            time.sleep(1.0)
+        self._results = end.get("results") or []
+        if end.get("metrics"):
+            self.metrics = _RemoteMetrics(end["metrics"])
+        self.failed_report = end.get("failed_report") or ""
+        if end.get("error"):
+            raise RuntimeError(end["error"])
+        return end["rc"] if end.get("rc") is not None else 1
+
+    def _follow(self, after: int) -> "dict | int":
+        """Relays the job's stream; returns its end record, or the next line number if the stream broke off."""
+        with self._request("GET", f"/jobs/{self._job_id}/stream?after={after}", timeout=None) as resp:
+            for raw in resp:
+                rec = json.loads(raw)
+                kind = rec.pop("type", "")
+                if kind == "log":
+                    self.log_queue.put(rec["line"])
+                    after = rec["n"] + 1
+                elif kind == "progress":
+                    self.tracker._snap = ProgressSnapshot(**rec)
+                elif kind == "end":
+                    return rec
+        return after
+
+    def stop(self) -> None:
+        if self._job_id is not None:
+            self.log_queue.put("Stopping the job on the service...")
+            try:
+                self._call("POST", f"/jobs/{self._job_id}/cancel")
+            except RuntimeError as e:
+                self.log_queue.put(str(e))
+
+    def summary(self) -> List[dict]:
+        return self._results
@@ -0,0 +1,149 @@
+import errno
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from typing import Callable, Dict, List
+from .utils import is_windows, safe_mkdir
+
+MB = 1024 * 1024
+
+# Expected scratch use per second of media, before post-processing: ~192 kbit/s audio, ~5 Mbit/s video
+_AUDIO_BPS = 24 * 1024
+_VIDEO_BPS = 640 * 1024
+_UNKNOWN_SIZE = 200 * MB
+# A converted or merged file sits next to its source until the source is deleted
+_POSTPROCESS_FACTOR = 2
+
+
+def estimate_size(entry: dict, audio_only: bool) -> int:
+    """Scratch bytes an item is expected to need at its peak, from the listing's size or duration."""
+    size = entry.get("filesize") or entry.get("filesize_approx")
+    if not size and entry.get("duration"):
+        size = float(entry["duration"]) * (_AUDIO_BPS if audio_only else _VIDEO_BPS)
+    return int((size or _UNKNOWN_SIZE) * _POSTPROCESS_FACTOR)
+
+
+def move_into_place(src: str, dest: str) -> None:
+    """
+    Moves a finished file to dest so that dest appears complete or not at all: a rename when
+    both are on one filesystem, otherwise a copy to a hidden name beside dest, flushed to disk,
+    then renamed over dest.
+    """
+    safe_mkdir(os.path.dirname(dest) or ".")
+    try:
+        os.replace(src, dest)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    tmp = os.path.join(os.path.dirname(dest), f".{os.path.basename(dest)}.yt_gui_tmp")
+    try:
+        with open(src, "rb") as fin, open(tmp, "wb") as fout:
+            shutil.copyfileobj(fin, fout, 4 * MB)
+            fout.flush()
+            os.fsync(fout.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    os.remove(src)
+
+
+def _remove_stale(root: str, prefix: str) -> List[str]:
+    """Run folders of this host whose process is gone (killed or crashed runs)."""
+    removed = []
+    if is_windows():
+        return removed
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return removed
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        try:
+            pid = int(name[len(prefix):].split("_", 1)[0])
+            os.kill(pid, 0)
+            continue
+        except ProcessLookupError:
+            pass
+        except (ValueError, OSError):
+            continue
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        removed.append(name)
+    return removed
+
+
+class ScratchSpace:
+    """
+    A run's private folder on fast local storage (tmpfs, SSD), where items are downloaded and
+    post-processed before their finished files are moved into the output folder, and an account
+    of the space they will need. A download waits while the expected remaining size of those in
+    progress would leave less than keep_free bytes free. One download is always let through, so
+    an item larger than the scratch disk fails instead of stalling the run.
+    """
+
+    def __init__(self, root: str, keep_free: int) -> None:
+        safe_mkdir(root)
+        prefix = f"yt_gui_{socket.gethostname()}_"
+        self.stale = _remove_stale(root, prefix)
+        self.path = tempfile.mkdtemp(prefix=f"{prefix}{os.getpid()}_", dir=root)
+        self.keep_free = max(0, keep_free)
+        self._cond = threading.Condition()
+        self._held: Dict[object, List[int]] = {}  # key -> [expected bytes, bytes written so far, real size known]
+        self._folders = 0
+
+    def folder(self) -> str:
+        """A new folder inside the run's scratch space, one per job."""
+        with self._cond:
+            self._folders += 1
+            path = os.path.join(self.path, str(self._folders))
+        safe_mkdir(path)
+        return path
+
+    def free(self) -> int:
+        return shutil.disk_usage(self.path).free
+
+    def _outstanding(self) -> int:
+        return sum(max(0, expected - written) for expected, written, _ in self._held.values())
+
+    def reserve(self, key: object, expected: int, should_stop: Callable[[], bool],
+                on_wait: Callable[[int], None] | None = None) -> bool:
+        """Waits until there is room for `expected` more bytes; False if stopped meanwhile."""
+        with self._cond:
+            waited = False
+            while self._held and self.free() - self._outstanding() - expected < self.keep_free:
+                if should_stop():
+                    return False
+                if not waited and on_wait is not None:
+                    on_wait(self.free())
+                waited = True
+                self._cond.wait(1.0)
+            self._held[key] = [expected, 0, 0]
+            return True
+
+    def note(self, key: object, written: int, total: int | None = None) -> None:
+        """Download progress of a holder: its real size replaces the estimate once known."""
+        with self._cond:
+            held = self._held.get(key)
+            if held is None:
+                return
+            held[1] = max(held[1], written)
+            if total:
+                # Video and audio streams download one after the other: keep the largest
+                held[0] = max(held[0], total * _POSTPROCESS_FACTOR) if held[2] else total * _POSTPROCESS_FACTOR
+                held[2] = 1
+
+    def release(self, key: object) -> None:
+        with self._cond:
+            if self._held.pop(key, None) is not None:
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
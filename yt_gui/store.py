@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Tuple
+from .utils import safe_mkdir
+
+try:
+    import fcntl
+except ImportError:  # Windows: no reflinks, hardlinks and copies still work
+    fcntl = None
+
+STORE_DIRNAME = ".yt_gui_store"
+_FICLONE = 0x40049409  # Linux ioctl: share the source's extents (btrfs, xfs, ...)
+
+
+@dataclass
+class StoredItem:
+    name: str  # file name yt-dlp produced, without the playlist number
+    size: int
+    seconds: float  # how long producing it took (download + conversion)
+
+
+def content_key(entry: dict, output_options: dict) -> str | None:
+    """Video id plus every option that changes the produced file."""
+    video_id = entry.get("id")
+    if not video_id:
+        return None
+    ie_key = (entry.get("ie_key") or entry.get("extractor_key") or "Youtube").lower()
+    raw = json.dumps({"ie": ie_key, "id": video_id, **output_options}, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _reflink(src: str, dest: str) -> None:
+    if fcntl is None:
+        raise OSError("reflinks not supported here")
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dest)
+            raise
+
+
+def place(src: str, dest: str) -> str:
+    """
+    Puts a copy of src at dest, as cheaply as the filesystem allows: hardlink, then reflink,
+    then a real copy. Written under a temporary name and moved into place. Returns the method used.
+    """
+    try:
+        if os.path.samefile(src, dest):
+            # Already a hardlink of src; renaming another link over it would be a no-op
+            return "hardlink"
+    except OSError:
+        pass
+    tmp = dest + ".yt_gui_tmp"
+    try:
+        os.remove(tmp)
+    except OSError:
+        pass
+    for method, fn in (("hardlink", os.link), ("reflink", _reflink), ("copy", shutil.copy2)):
+        try:
+            fn(src, tmp)
+        except OSError:
+            if method == "copy":
+                raise
+            continue
+        os.replace(tmp, dest)
+        return method
+    return ""
+
+
+class ContentStore:
+    """
+    Finished files shared across playlists, keyed by content_key(). An item already in the
+    store is materialized into its playlist folder by place() instead of being downloaded again.
+    Each file sits next to a small JSON record with its name, size and production time.
+    Thread-safe.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._pending: Dict[str, threading.Event] = {}  # keys being produced by a worker right now
+        safe_mkdir(directory)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".data", base + ".json"
+
+    def get(self, key: str) -> StoredItem | None:
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                item = StoredItem(**json.load(f))
+            if os.path.getsize(data_path) != item.size:
+                return None
+        except (OSError, ValueError, TypeError):
+            return None
+        return item
+
+    def claim(self, key: str, should_stop: Callable[[], bool]) -> StoredItem | None:
+        """
+        Returns the stored item, or None if the caller should produce it. When another worker is
+        producing the same key, waits for it first, so a video listed twice is only fetched once.
+        A None return obliges the caller to call release(key) when done.
+        """
+        while True:
+            with self._lock:
+                item = self.get(key)
+                if item is not None:
+                    return item
+                busy = self._pending.get(key)
+                if busy is None:
+                    self._pending[key] = threading.Event()
+                    return None
+            while not busy.wait(0.5):
+                if should_stop():
+                    return None
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            busy = self._pending.pop(key, None)
+        if busy is not None:
+            busy.set()
+
+    def add(self, key: str, filepath: str, name: str, seconds: float) -> None:
+        data_path, meta_path = self._paths(key)
+        try:
+            safe_mkdir(os.path.dirname(data_path))
+            place(filepath, data_path)
+            meta = StoredItem(name=name, size=os.path.getsize(data_path), seconds=round(seconds, 2))
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(asdict(meta), f)
+            os.replace(meta_path + ".tmp", meta_path)
+        except OSError:
+            pass
+
+    def materialize(self, key: str, dest: str) -> str:
+        """Places the stored file at dest; returns the method used."""
+        data_path, _ = self._paths(key)
+        safe_mkdir(os.path.dirname(dest) or ".")
+        return place(data_path, dest)
@@ -0,0 +1,173 @@
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Tuple
+
+INDEX_NAME = ".yt_gui_index.json"
+_INDEX_VERSION = 1
+_MOVE_SUFFIX = ".yt_gui_move"
+_NUMBER_RE = re.compile(r"^\d+ - ")  # the "NNN - " prefix of playlist item file names
+
+
+@dataclass
+class IndexEntry:
+    path: str  # relative to the folder
+    size: int
+    index: int | None
+    title: str = ""
+
+
+@dataclass
+class SyncPlan:
+    new: List[dict] = field(default_factory=list)  # entries to download (new, or their file is gone)
+    moved: List[Tuple[str, int]] = field(default_factory=list)  # (video id, new playlist index)
+    unchanged: int = 0
+    removed: List[str] = field(default_factory=list)  # indexed ids no longer in the playlist
+
+
+def unnumbered(name: str) -> str:
+    """A playlist item's file name without its "NNN - " prefix."""
+    return _NUMBER_RE.sub("", name, count=1)
+
+
+def renumbered(path: str, index: int) -> str:
+    """The file name an item gets at a new playlist position: "005 - T.mp3" -> "012 - T.mp3"."""
+    head, name = os.path.split(path)
+    return os.path.join(head, f"{index:03d} - " + unnumbered(name))
+
+
+class FolderIndex:
+    """
+    What a destination folder holds: video id -> file path, size and playlist index, stored as
+    JSON next to the files. Lets a sync tell new, moved and removed items apart with one stat
+    per item instead of asking yt-dlp about each one. Thread-safe; save() writes atomically.
+    """
+
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+        self.path = os.path.join(folder, INDEX_NAME)
+        self._items: Dict[str, IndexEntry] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != _INDEX_VERSION:
+            return
+        for video_id, item in (data.get("items") or {}).items():
+            try:
+                self._items[video_id] = IndexEntry(**item)
+            except TypeError:
+                continue
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": _INDEX_VERSION, "items": {k: asdict(v) for k, v in self._items.items()}}
+            self._dirty = False
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def record(self, video_id: str, filepath: str, index: int | None, title: str = "") -> None:
+        """Adds or updates an item after its file reached its final location."""
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            return
+        with self._lock:
+            self._items[video_id] = IndexEntry(os.path.relpath(filepath, self.folder), size, index, title)
+            self._dirty = True
+
+    def _present(self, item: IndexEntry) -> bool:
+        try:
+            return os.path.getsize(os.path.join(self.folder, item.path)) == item.size
+        except OSError:
+            return False
+
+    def plan(self, entries: List[dict]) -> SyncPlan:
+        """Diffs the current playlist (entries with playlist_index set) against the folder."""
+        plan = SyncPlan()
+        listed = set()
+        with self._lock:
+            for entry in entries:
+                video_id = entry.get("id")
+                item = self._items.get(video_id) if video_id else None
+                if video_id:
+                    listed.add(video_id)
+                if item is None or not self._present(item):
+                    plan.new.append(entry)
+                elif item.index != entry.get("playlist_index"):
+                    plan.moved.append((video_id, entry["playlist_index"]))
+                else:
+                    plan.unchanged += 1
+            plan.removed = [video_id for video_id in self._items if video_id not in listed]
+        return plan
+
+    def apply_moves(self, moves: List[Tuple[str, int]], log: Callable[[str], None]) -> int:
+        """
+        Renames moved items to their new number. Done in two passes through temporary names,
+        so a reordered playlist can swap positions without one rename clobbering another.
+        Returns how many were renamed.
+        """
+        staged: List[Tuple[str, str, str, int]] = []  # (id, temp path, new relative path, index)
+        with self._lock:
+            for video_id, index in moves:
+                item = self._items[video_id]
+                old = os.path.join(self.folder, item.path)
+                try:
+                    os.replace(old, old + _MOVE_SUFFIX)
+                except OSError as e:
+                    log(f"Sync: could not rename {item.path} ({e})")
+                    continue
+                staged.append((video_id, old + _MOVE_SUFFIX, renumbered(item.path, index), index))
+
+            renamed = 0
+            for video_id, tmp, new_path, index in staged:
+                item = self._items[video_id]
+                target = os.path.join(self.folder, new_path)
+                if os.path.exists(target):
+                    # Taken by a file the index doesn't own; keep the old name
+                    log(f"Sync: {new_path} already exists, keeping {item.path}")
+                    target, new_path, index = tmp[:-len(_MOVE_SUFFIX)], item.path, item.index
+                try:
+                    os.replace(tmp, target)
+                except OSError as e:
+                    log(f"Sync: could not rename {item.path} ({e})")
+                    continue
+                if new_path != item.path:
+                    renamed += 1
+                item.path, item.index = new_path, index
+                self._dirty = True
+        return renamed
+
+    def prune(self, video_ids: List[str], log: Callable[[str], None]) -> int:
+        """Deletes the files of items that left the playlist and forgets them. Returns how many."""
+        pruned = 0
+        with self._lock:
+            for video_id in video_ids:
+                item = self._items.pop(video_id, None)
+                if item is None:
+                    continue
+                self._dirty = True
+                try:
+                    os.remove(os.path.join(self.folder, item.path))
+                    pruned += 1
+                    log(f"Sync: removed {item.path}")
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    log(f"Sync: could not remove {item.path} ({e})")
+        return pruned
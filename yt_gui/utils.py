@@ -12,3 +12,18 @@ def safe_mkdir(path: str) -> None:
 
 def is_windows() -> bool:
     return os.name == "nt"
+
+def cache_dir() -> str:
+    if is_windows():
+        base = os.environ.get("LOCALAPPDATA") or expand_path("~/AppData/Local")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or expand_path("~/.cache")
+    return os.path.join(base, "yt_gui")
+
+def state_dir() -> str:
+    """Where data that must survive between runs lives (unlike cache_dir, not safe to delete)."""
+    if is_windows():
+        base = os.environ.get("LOCALAPPDATA") or expand_path("~/AppData/Local")
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or expand_path("~/.local/state")
+    return os.path.join(base, "yt_gui")
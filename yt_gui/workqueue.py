@@ -0,0 +1,175 @@
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import fields, replace
+from typing import List, Tuple
+from .config import DownloadOptions
+from .jobstore import DONE, ENUMERATING, FAILED, FINISHED, PENDING, READY, RUNNING, SKIPPED, JobRecord, JobStore
+
+DEFAULT_LEASE = 60.0
+
+# Settings of the machine doing the work; everything else comes from the published job
+LOCAL_OPTIONS = (
+    "workers", "auto_workers", "min_workers", "max_workers", "rate_limit_mbps", "connections", "transcode_workers",
+    "metrics_file", "metrics_port", "retries", "retry_delay", "cookies_from_browser", "engine", "lease_s",
+    "scratch_dir", "scratch_keep_free_mb",
+)
+
+_LEASES = """
+CREATE TABLE IF NOT EXISTS leases (
+    job_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS leases_owner ON leases (owner);
+"""
+
+
+def worker_options(published: dict, local: DownloadOptions) -> DownloadOptions:
+    """A published job's options with this worker's own concurrency, limits and cookies."""
+    known = {f.name for f in fields(DownloadOptions)}
+    opt = DownloadOptions(**{k: v for k, v in published.items() if k in known})
+    return replace(opt, resume=False, **{name: getattr(local, name) for name in LOCAL_OPTIONS})
+
+
+class WorkQueue(JobStore):
+    """
+    A job store shared by several downloader processes or hosts, typically a file on shared
+    storage. A coordinator publishes each job's listing once; workers claim items one at a time
+    under a lease they keep renewing while the item is theirs. Items of a worker that died are
+    claimed again once its leases expire. Uses a rollback journal, since WAL needs shared
+    memory that network filesystems do not provide; the filesystem must support locking.
+    """
+
+    journal_mode = "DELETE"
+    shared = True
+
+    def __init__(self, path: str, lease: float = DEFAULT_LEASE) -> None:
+        super().__init__(path)
+        self.lease = max(5.0, lease)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        with self._lock:
+            self._db.executescript(_LEASES)
+        self._heartbeat: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Keeps this worker's leases alive until close()."""
+        self._heartbeat = threading.Thread(target=self._renew, daemon=True, name="lease-heartbeat")
+        self._heartbeat.start()
+
+    def _renew(self) -> None:
+        while not self._stop.wait(self.lease / 3):
+            try:
+                with self._lock:
+                    self._db.execute("UPDATE leases SET expires = ? WHERE owner = ?", (time.time() + self.lease, self.owner))
+            except Exception:
+                pass  # busy or briefly unreachable: try again next beat
+
+    def close(self) -> None:
+        """Stops renewing and hands back every item this worker still holds."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        with self._lock:
+            try:
+                self._db.execute("DELETE FROM leases WHERE owner = ?", (self.owner,))
+            except Exception:
+                pass
+        super().close()
+
+    def claim(self) -> Tuple[JobRecord, int, dict, List[str], str] | None:
+        """
+        Leases the next item nobody holds: (job, seq, entry, files left by an earlier holder,
+        that holder or ""), or None when every open item is taken.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT i.job_id, i.seq, i.entry, i.files, COALESCE(l.owner, '') FROM items i"
+                    " JOIN jobs j ON j.id = i.job_id"
+                    " LEFT JOIN leases l ON l.job_id = i.job_id AND l.seq = i.seq"
+                    " WHERE j.state != ? AND i.state IN (?, ?) AND (l.owner IS NULL OR l.expires < ?)"
+                    " ORDER BY i.job_id, i.seq LIMIT 1",
+                    (FINISHED, PENDING, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                job_id, seq, entry, files, previous = row
+                self._db.execute("INSERT OR REPLACE INTO leases (job_id, seq, owner, expires) VALUES (?, ?, ?, ?)",
+                                 (job_id, seq, self.owner, now + self.lease))
+                job = self._db.execute("SELECT id, url, options, kind, folder, state FROM jobs WHERE id = ?",
+                                       (job_id,)).fetchone()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return self._record(job), seq, json.loads(entry), json.loads(files), previous
+
+    def set_item(self, job_id: int, seq: int, state: str, error: str = "", attempt: bool = False) -> None:
+        """Only the lease holder's updates count; a final state gives the lease up."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                held = self._db.execute("SELECT 1 FROM leases WHERE job_id = ? AND seq = ? AND owner = ?",
+                                        (job_id, seq, self.owner)).fetchone()
+                if held:
+                    self._db.execute(
+                        "UPDATE items SET state = ?, error = ?, attempts = attempts + ? WHERE job_id = ? AND seq = ?",
+                        (state, error, int(attempt), job_id, seq),
+                    )
+                    if state in (DONE, FAILED, SKIPPED):
+                        self._db.execute("DELETE FROM leases WHERE job_id = ? AND seq = ?", (job_id, seq))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def reopen(self, job_id: int) -> int:
+        """
+        Publishing a job again: failed items go back to pending, and the job counts as being
+        listed until the new listing has added what the playlist gained. Returns the failed count.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                failed = self._db.execute("UPDATE items SET state = ?, error = '' WHERE job_id = ? AND state = ?",
+                                          (PENDING, job_id, FAILED)).rowcount
+                self._db.execute("UPDATE jobs SET state = ?, updated = ? WHERE id = ?", (ENUMERATING, time.time(), job_id))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return failed
+
+    def open_items(self, key: str) -> int:
+        """Items of fully published jobs with `key` that are not done yet."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM items i JOIN jobs j ON j.id = i.job_id"
+                " WHERE j.key = ? AND j.state = ? AND i.state IN (?, ?)",
+                (key, READY, PENDING, RUNNING),
+            ).fetchone()[0]
+
+    def counts(self) -> Tuple[int, int, dict]:
+        """(unfinished jobs, jobs still being listed, item count per state) across the queue."""
+        with self._lock:
+            jobs = self._db.execute("SELECT COUNT(*) FROM jobs WHERE state != ?", (FINISHED,)).fetchone()[0]
+            listing = self._db.execute("SELECT COUNT(*) FROM jobs WHERE state = ?", (ENUMERATING,)).fetchone()[0]
+            states = dict(self._db.execute(
+                "SELECT i.state, COUNT(*) FROM items i JOIN jobs j ON j.id = i.job_id WHERE j.state != ? GROUP BY i.state",
+                (FINISHED,),
+            ).fetchall())
+        return jobs, listing, states
+
+    def drained(self) -> bool:
+        """Something was published, its listings are complete and no item is left to download."""
+        jobs, listing, states = self.counts()
+        return jobs > 0 and not listing and not states.get(PENDING) and not states.get(RUNNING)